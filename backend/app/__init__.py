@@ -3,6 +3,19 @@ import os
 from backend.config import Config
 from .extensions import db, migrate, cors, mail
 from .extensions import init_limiter
+from .notifications import outbox_dispatcher
+from .escalation import escalation_sweeper
+from .media_metadata import metadata_extractor
+from .geo import init_service_locator
+from .dispatch import init_dispatch_engine
+from .events import init_event_broadcaster
+from .dedupe import init_duplicate_detector
+from .idempotency import init_idempotency
+from .ingest import init_group_commit
+from .media import init_media
+from .storage import init_storage
+from .variants import init_variant_renderer
+from .receipts import init_receipt_renderer
 from .routes.health import health_bp
 from .routes.auth import auth_bp
 from .routes.cases import cases_bp
@@ -12,6 +25,9 @@ from .routes.donations import donations_bp
 from .routes.uploads import uploads_bp
 from .routes.admin import admin_bp
 from .routes.data import data_bp
+from .routes.services import services_bp
+from .routes.stream import stream_bp
+from .routes.analytics import analytics_bp
 from werkzeug.exceptions import HTTPException
 import logging
 from backend.logging_config import configure_logging
@@ -25,6 +41,12 @@ def create_app(config_class: type = Config) -> Flask:
     app.config["UPLOAD_FOLDER"] = os.path.join(os.getcwd(), "uploads")
     app.config["MAX_CONTENT_LENGTH"] = 100 * 1024 * 1024
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    # Local folder or S3 bucket (STORAGE_BACKEND)
+    init_storage(app)
+    # Stream multipart files to disk in one pass (size limit, hash, type sniff)
+    init_media(app)
+    init_variant_renderer(app)
+    init_receipt_renderer(app)
 
     # Extensions
     db.init_app(app)
@@ -50,16 +72,42 @@ def create_app(config_class: type = Config) -> Flask:
     # Import models
     from . import models  # noqa
 
-    # Register blueprints under "/api"
+    # Background delivery of queued emails
+    outbox_dispatcher.init_app(app)
+
+    # Escalation of overdue PENDING cases (one sweep per interval across workers)
+    escalation_sweeper.init_app(app)
+
+    # EXIF/MP4 metadata of uploads, and case coordinates from it, off the request path
+    metadata_extractor.init_app(app)
+
+    # In-memory spatial index (nearby services, volunteer dispatch)
+    init_service_locator(app)
+    init_dispatch_engine(app)
+    init_duplicate_detector(app)
+
+    # Idempotency-Key replay cache for create endpoints
+    init_idempotency(app)
+
+    # Optional group commit of case reports (INGEST_GROUP_COMMIT)
+    init_group_commit(app)
+
+    # Live case feed (Server-Sent Events)
+    init_event_broadcaster(app)
+
+    # Register blueprints under "/api" (keeping each blueprint's own prefix)
     app.register_blueprint(health_bp, url_prefix="/api")
-    app.register_blueprint(auth_bp, url_prefix="/api")
-    app.register_blueprint(cases_bp, url_prefix="/api")
-    app.register_blueprint(registrations_bp, url_prefix="/api")
-    app.register_blueprint(hospitals_bp, url_prefix="/api")
-    app.register_blueprint(donations_bp, url_prefix="/api")
-    app.register_blueprint(uploads_bp, url_prefix="/api")
-    app.register_blueprint(admin_bp, url_prefix="/api")
-    app.register_blueprint(data_bp, url_prefix="/api")
+    app.register_blueprint(auth_bp, url_prefix="/api/auth")
+    app.register_blueprint(cases_bp, url_prefix="/api/cases")
+    app.register_blueprint(registrations_bp, url_prefix="/api/register")
+    app.register_blueprint(hospitals_bp, url_prefix="/api/hospitals")
+    app.register_blueprint(donations_bp, url_prefix="/api/donations")
+    app.register_blueprint(uploads_bp, url_prefix="/api/uploads")
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
+    app.register_blueprint(data_bp, url_prefix="/api/data")
+    app.register_blueprint(services_bp, url_prefix="/api/services")
+    app.register_blueprint(stream_bp, url_prefix="/api/stream")
+    app.register_blueprint(analytics_bp, url_prefix="/api/analytics")
 
     # Logging
     configure_logging(app)
@@ -0,0 +1,395 @@
+"""Set-based admin mutations over many NGOs, volunteers or cases.
+
+A request names an operation and either an explicit id list or a filter.
+Targets are processed in chunks: each chunk reads the current state of its
+rows with one SELECT, works out a per-id outcome, and changes the rows that
+need it with one UPDATE/DELETE ... WHERE id IN (...). All chunks share one
+transaction; side effects that must only happen after commit (live events,
+dispatch load and dedupe bookkeeping) run once it succeeds.
+"""
+from datetime import datetime
+from typing import Any, Callable
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from .case_metrics import record_bulk_status_change
+from .dedupe import get_duplicate_detector
+from .dispatch import OPEN_STATUSES, get_dispatch_engine
+from .events import publish_case_event
+from .extensions import db
+from .mailer import queue_email
+from .media import blob_hash, release_blobs, remove_blob_files
+from .models import NGO, AnimalCase, CaseStatus, CaseStatusEvent, Donation, MediaFile, ResumableUpload, Volunteer
+
+ENTITIES = {"ngo": NGO, "volunteer": Volunteer, "case": AnimalCase}
+OPERATIONS = {
+	"approve": ("ngo", "volunteer"),
+	"status": ("case",),
+	"reassign": ("case",),
+	"delete": ("ngo", "volunteer", "case"),
+}
+
+
+class BulkError(ValueError):
+	"""The bulk request itself is invalid (reported as 400)."""
+
+
+class BulkRun:
+	def __init__(self, op: str, entity: str, params: dict, actor: str | None = None):
+		self.op = op
+		self.entity = entity
+		self.model = ENTITIES[entity]
+		self.params = params
+		self.actor = actor
+		self.results: list[dict] = []
+		self.after_commit: list[Callable[[], None]] = []
+
+	def outcome(self, ids, outcome: str, reason: str | None = None) -> None:
+		for i in ids:
+			entry = {"id": i, "outcome": outcome}
+			if reason:
+				entry["reason"] = reason
+			self.results.append(entry)
+
+	def summary(self) -> dict[str, int]:
+		counts: dict[str, int] = {}
+		for r in self.results:
+			counts[r["outcome"]] = counts.get(r["outcome"], 0) + 1
+		return counts
+
+
+# ---- target selection --------------------------------------------------------
+
+def _parse_time(value: Any, key: str) -> datetime:
+	try:
+		return datetime.fromisoformat(str(value))
+	except ValueError:
+		raise BulkError(f"filter.{key} must be an ISO date/time") from None
+
+
+def _parse_bool(value: Any, key: str) -> bool:
+	# bool("false") is True, so only JSON booleans and their spelled-out strings are accepted
+	if isinstance(value, bool):
+		return value
+	if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+		return value.strip().lower() == "true"
+	raise BulkError(f"{key} must be true or false")
+
+
+def _parse_id(value: Any, key: str) -> int:
+	# int() would truncate 3.9 and turn true into 1
+	if isinstance(value, (bool, float)):
+		raise BulkError(f"{key} must be an integer")
+	try:
+		return int(value)
+	except (TypeError, ValueError):
+		raise BulkError(f"{key} must be an integer") from None
+
+
+def _filter_conditions(entity: str, filters: dict) -> list:
+	model = ENTITIES[entity]
+	allowed = {
+		"ngo": {"approved"},
+		"volunteer": {"approved", "ngo_id"},
+		"case": {"status", "ngo_id", "assigned_volunteer_id", "created_before", "created_after"},
+	}[entity]
+	unknown = set(filters) - allowed
+	if unknown:
+		raise BulkError(f"unsupported filter(s) for {entity}: {', '.join(sorted(unknown))}")
+	if not filters:
+		raise BulkError("filter must not be empty; pass ids to target everything explicitly")
+
+	conditions = []
+	for key, value in filters.items():
+		if key == "approved":
+			conditions.append(model.approved.is_(_parse_bool(value, f"filter.{key}")))
+		elif key in ("ngo_id", "assigned_volunteer_id"):
+			column = getattr(model, key)
+			conditions.append(column.is_(None) if value is None else column == _parse_id(value, f"filter.{key}"))
+		elif key == "status":
+			names = value if isinstance(value, list) else [value]
+			try:
+				conditions.append(model.status.in_([CaseStatus[str(n).upper()] for n in names]))
+			except KeyError:
+				raise BulkError("filter.status must be case statuses") from None
+		elif key == "created_before":
+			conditions.append(model.created_at < _parse_time(value, key))
+		elif key == "created_after":
+			conditions.append(model.created_at >= _parse_time(value, key))
+	return conditions
+
+
+def _id_chunks(ids: list[int], chunk_size: int):
+	for start in range(0, len(ids), chunk_size):
+		yield ids[start:start + chunk_size]
+
+
+def _filter_chunks(model, conditions: list, chunk_size: int, max_rows: int, state: dict):
+	# Keyset pagination on the primary key, so rows changed by an earlier chunk are never revisited
+	last_id, total = 0, 0
+	while total < max_rows:
+		ids = db.session.execute(
+			select(model.id).where(*conditions, model.id > last_id).order_by(model.id).limit(min(chunk_size, max_rows - total))
+		).scalars().all()
+		if not ids:
+			return
+		yield ids
+		last_id = ids[-1]
+		total += len(ids)
+	state["truncated"] = db.session.execute(
+		select(model.id).where(*conditions, model.id > last_id).limit(1)
+	).first() is not None
+
+
+def target_chunks(entity: str, ids, filters, state: dict):
+	"""Chunks of the ids named by ``ids`` or matching ``filters`` (pass exactly one); raises BulkError.
+
+	At most BULK_MAX_ROWS rows are targeted; with a filter that matches more,
+	state["truncated"] is set once the chunks have been consumed.
+	"""
+	chunk_size = int(current_app.config.get("BULK_CHUNK_SIZE", 500))
+	max_rows = int(current_app.config.get("BULK_MAX_ROWS", 10000))
+	if (ids is None) == (filters is None):
+		raise BulkError("pass exactly one of ids or filter")
+	if ids is not None:
+		if not isinstance(ids, list):
+			raise BulkError("ids must be a list of integers")
+		ids = list(dict.fromkeys(_parse_id(i, "ids") for i in ids))
+		if len(ids) > max_rows:
+			raise BulkError(f"at most {max_rows} ids per request")
+		return _id_chunks(ids, chunk_size)
+	if not isinstance(filters, dict):
+		raise BulkError("filter must be an object")
+	return _filter_chunks(ENTITIES[entity], _filter_conditions(entity, filters), chunk_size, max_rows, state)
+
+
+# ---- operations --------------------------------------------------------------
+
+def _approve(run: BulkRun, ids: list[int]) -> None:
+	model = run.model
+	approved = run.params["approved"]
+	current = dict(db.session.execute(select(model.id, model.approved).where(model.id.in_(ids))).all())
+	run.outcome([i for i in ids if i not in current], "not_found")
+	run.outcome([i for i in ids if i in current and current[i] == approved], "unchanged")
+	change = [i for i in ids if i in current and current[i] != approved]
+	if change:
+		db.session.execute(
+			update(model).where(model.id.in_(change)).values(approved=approved),
+			execution_options={"synchronize_session": False},
+		)
+	run.outcome(change, "updated")
+
+
+_CASE_COLUMNS = (
+	AnimalCase.id, AnimalCase.status, AnimalCase.created_at, AnimalCase.ngo_id, AnimalCase.location,
+	AnimalCase.parent_case_id, AnimalCase.assigned_volunteer_id,
+)
+
+
+def _case_rows(ids: list[int]) -> dict[int, Any]:
+	return {row.id: row for row in db.session.execute(select(*_CASE_COLUMNS).where(AnimalCase.id.in_(ids)))}
+
+
+def _status(run: BulkRun, ids: list[int]) -> None:
+	target = run.params["status"]
+	rows = _case_rows(ids)
+	run.outcome([i for i in ids if i not in rows], "not_found")
+	run.outcome([i for i in ids if i in rows and rows[i].status is target], "unchanged")
+	changed = [rows[i] for i in ids if i in rows and rows[i].status is not target]
+	if not changed:
+		return
+
+	db.session.execute(
+		update(AnimalCase).where(AnimalCase.id.in_([r.id for r in changed])).values(status=target),
+		execution_options={"synchronize_session": False},
+	)
+	record_bulk_status_change(changed, target, run.actor)
+
+	# Linked duplicate reports follow their parent (as in cases.update_status)
+	duplicates = db.session.execute(
+		select(*_CASE_COLUMNS).where(
+			AnimalCase.parent_case_id.in_([r.id for r in changed]),
+			AnimalCase.status != target,
+			AnimalCase.id.not_in(ids),
+		)
+	).all()
+	if duplicates:
+		db.session.execute(
+			update(AnimalCase).where(AnimalCase.id.in_([d.id for d in duplicates])).values(status=target),
+			execution_options={"synchronize_session": False},
+		)
+		record_bulk_status_change(duplicates, target, run.actor)
+	run.outcome([r.id for r in changed], "updated")
+
+	closing = [r for r in changed if r.status in OPEN_STATUSES and target not in OPEN_STATUSES]
+	changed_ids = [r.id for r in changed] + [d.id for d in duplicates]
+
+	def after() -> None:
+		engine = get_dispatch_engine()
+		detector = get_duplicate_detector()
+		for r in closing:
+			if engine is not None:
+				engine.release(r.assigned_volunteer_id)
+			if detector is not None:
+				detector.discard(r.id)
+		for case in AnimalCase.query.filter(AnimalCase.id.in_(changed_ids)).order_by(AnimalCase.id):
+			publish_case_event("case.status", case)
+
+	run.after_commit.append(after)
+
+
+def _reassign(run: BulkRun, ids: list[int]) -> None:
+	volunteer = run.params["volunteer"]
+	rows = _case_rows(ids)
+	run.outcome([i for i in ids if i not in rows], "not_found")
+	run.outcome([i for i in ids if i in rows and rows[i].status not in OPEN_STATUSES], "conflict", "case is not open")
+	open_rows = [rows[i] for i in ids if i in rows and rows[i].status in OPEN_STATUSES]
+	run.outcome([r.id for r in open_rows if r.assigned_volunteer_id == volunteer.id], "unchanged")
+	change = [r.id for r in open_rows if r.assigned_volunteer_id != volunteer.id]
+	if not change:
+		return
+
+	values = {"assigned_volunteer_id": volunteer.id}
+	if volunteer.ngo_id is not None:
+		values["ngo_id"] = volunteer.ngo_id
+	db.session.execute(
+		update(AnimalCase).where(AnimalCase.id.in_(change)).values(**values),
+		execution_options={"synchronize_session": False},
+	)
+	codes = db.session.execute(select(AnimalCase.case_code).where(AnimalCase.id.in_(change))).scalars().all()
+	queue_email(
+		"case_assignment",
+		volunteer.email,
+		f"ResQTrack: {len(codes)} case(s) assigned to you",
+		"The following cases were assigned to you by an administrator: " + ", ".join(codes) + ".",
+	)
+	run.outcome(change, "updated")
+
+	def after() -> None:
+		engine = get_dispatch_engine()
+		if engine is not None:
+			engine.invalidate()
+
+	run.after_commit.append(after)
+
+
+def _referenced(ids: list[int], *columns) -> set[int]:
+	found: set[int] = set()
+	for column in columns:
+		found.update(db.session.execute(select(column).where(column.in_(ids)).distinct()).scalars())
+	return found
+
+
+def _delete(run: BulkRun, ids: list[int]) -> None:
+	model = run.model
+	existing = set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars())
+	run.outcome([i for i in ids if i not in existing], "not_found")
+
+	if run.entity == "volunteer":
+		blocked = _referenced(list(existing), AnimalCase.assigned_volunteer_id)
+		reason = "volunteer has assigned cases"
+	elif run.entity == "ngo":
+		blocked = _referenced(list(existing), Volunteer.ngo_id, AnimalCase.ngo_id, Donation.ngo_id)
+		reason = "NGO has volunteers, cases or donations"
+	else:
+		blocked, reason = set(), None
+	run.outcome([i for i in ids if i in blocked], "conflict", reason)
+
+	doomed = [i for i in ids if i in existing and i not in blocked]
+	if not doomed:
+		return
+	unused_media = []
+	if run.entity == "case":
+		media_urls = db.session.execute(
+			select(AnimalCase.media_url).where(AnimalCase.id.in_(doomed), AnimalCase.media_url.is_not(None))
+		).scalars()
+		unused_media = release_blobs(blob_hash(url) for url in media_urls)
+		db.session.execute(delete(CaseStatusEvent).where(CaseStatusEvent.case_id.in_(doomed)))
+		db.session.execute(delete(MediaFile).where(MediaFile.case_id.in_(doomed)))
+		# Unfinished resumable uploads for these cases still complete, just unattached
+		db.session.execute(
+			update(ResumableUpload).where(ResumableUpload.case_id.in_(doomed)).values(case_id=None),
+			execution_options={"synchronize_session": False},
+		)
+		# Surviving duplicate reports become standalone cases
+		db.session.execute(
+			update(AnimalCase).where(AnimalCase.parent_case_id.in_(doomed)).values(parent_case_id=None),
+			execution_options={"synchronize_session": False},
+		)
+	db.session.execute(delete(model).where(model.id.in_(doomed)), execution_options={"synchronize_session": False})
+	run.outcome(doomed, "deleted")
+
+	if run.entity == "case":
+		def after() -> None:
+			engine = get_dispatch_engine()
+			detector = get_duplicate_detector()
+			if engine is not None:
+				engine.invalidate()
+			if detector is not None:
+				for i in doomed:
+					detector.discard(i)
+			remove_blob_files(unused_media)
+
+		run.after_commit.append(after)
+
+
+HANDLERS = {"approve": _approve, "status": _status, "reassign": _reassign, "delete": _delete}
+
+
+# ---- entry point -------------------------------------------------------------
+
+def _parse_params(op: str, payload: dict) -> dict:
+	if op == "approve":
+		return {"approved": _parse_bool(payload.get("approved", True), "approved")}
+	if op == "status":
+		try:
+			return {"status": CaseStatus[str(payload.get("status") or "").upper()]}
+		except KeyError:
+			raise BulkError("status must be one of " + ", ".join(s.name for s in CaseStatus)) from None
+	if op == "reassign":
+		try:
+			volunteer = db.session.get(Volunteer, int(payload.get("volunteer_id")))
+		except (TypeError, ValueError):
+			raise BulkError("volunteer_id is required") from None
+		if volunteer is None:
+			raise BulkError("volunteer not found")
+		return {"volunteer": volunteer}
+	return {}
+
+
+def run_bulk(payload: dict, actor: str | None = None) -> dict:
+	"""Validate and execute one bulk request; raises BulkError for bad requests."""
+	op = payload.get("op")
+	entity = payload.get("entity") or ("case" if op in ("status", "reassign") else None)
+	if op not in OPERATIONS:
+		raise BulkError("op must be one of " + ", ".join(OPERATIONS))
+	if entity not in OPERATIONS[op]:
+		raise BulkError(f"{op} applies to: {', '.join(OPERATIONS[op])}")
+
+	run = BulkRun(op, entity, _parse_params(op, payload), actor)
+	state = {"truncated": False}
+	chunks = target_chunks(entity, payload.get("ids"), payload.get("filter"), state)
+
+	handler = HANDLERS[op]
+	try:
+		for chunk in chunks:
+			handler(run, chunk)
+		db.session.commit()
+	except Exception:
+		db.session.rollback()
+		raise
+
+	for hook in run.after_commit:
+		try:
+			hook()
+		except Exception:
+			current_app.logger.exception("Bulk %s post-commit step failed", op)
+
+	return {
+		"op": op,
+		"entity": entity,
+		"summary": run.summary(),
+		"truncated": state["truncated"],
+		"results": run.results,
+	}
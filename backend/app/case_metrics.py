@@ -0,0 +1,182 @@
+"""Case status history and incrementally maintained rescue-time percentiles.
+
+Every status change appends a CaseStatusEvent. The first time a root case
+reaches a tracked status, the time since it was reported is added to a
+log-scale histogram in case_duration_rollups for the whole platform, the
+case's NGO and its city, so medians and p90s are read from a few dozen
+rows instead of scanning the history. Hourly and daily report counts for
+trend charts are bumped in the same place (see case_stats).
+"""
+import math
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import exists, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .case_stats import add_counts, case_city, stat_keys
+from .extensions import db
+from .models import AnimalCase, CaseDurationRollup, CaseStatus, CaseStatusEvent
+
+# Status reached -> metric name
+METRICS = {
+	CaseStatus.IN_PROGRESS: "assignment",
+	CaseStatus.RESCUED: "rescue",
+	CaseStatus.CLOSED: "resolution",
+}
+
+# Bucket 0 is under a minute; bucket i covers [60 * GROWTH**(i-1), 60 * GROWTH**i) seconds
+BUCKET_BASE_SECONDS = 60.0
+BUCKET_GROWTH = 1.25
+MAX_BUCKET = 80  # ~2.7 years
+
+
+def bucket_for(seconds: float) -> int:
+	if seconds < BUCKET_BASE_SECONDS:
+		return 0
+	return min(int(math.log(seconds / BUCKET_BASE_SECONDS, BUCKET_GROWTH)) + 1, MAX_BUCKET)
+
+
+def bucket_bounds(bucket: int) -> tuple[float, float]:
+	if bucket == 0:
+		return 0.0, BUCKET_BASE_SECONDS
+	return BUCKET_BASE_SECONDS * BUCKET_GROWTH ** (bucket - 1), BUCKET_BASE_SECONDS * BUCKET_GROWTH ** bucket
+
+
+def scopes_for(case: AnimalCase) -> list[str]:
+	scopes = ["all"]
+	if case.ngo_id is not None:
+		scopes.append(f"ngo:{case.ngo_id}")
+	city = case_city(case.location)
+	if city:
+		scopes.append(f"city:{city}")
+	return scopes
+
+
+def _increment(metric: str, scope: str, bucket: int, seconds: float, count: int = 1) -> None:
+	stmt = (
+		update(CaseDurationRollup)
+		.where(CaseDurationRollup.metric == metric, CaseDurationRollup.scope == scope, CaseDurationRollup.bucket == bucket)
+		.values(count=CaseDurationRollup.count + count, total_seconds=CaseDurationRollup.total_seconds + seconds)
+	)
+	if db.session.execute(stmt).rowcount:
+		return
+	try:
+		with db.session.begin_nested():
+			db.session.add(CaseDurationRollup(metric=metric, scope=scope, bucket=bucket, count=count, total_seconds=seconds))
+	except IntegrityError:
+		# Another transaction created the row first
+		db.session.execute(stmt)
+
+
+def record_status_change(
+	case: AnimalCase,
+	from_status: CaseStatus | None,
+	to_status: CaseStatus,
+	actor: str | None = None,
+	at: datetime | None = None,
+) -> CaseStatusEvent:
+	"""Append a history event and update the rollups, in the caller's transaction.
+
+	A new, unflushed case is fine as long as ``to_status`` is not a tracked metric.
+	"""
+	at = at or datetime.utcnow()
+	metric = METRICS.get(to_status)
+	first_time = metric is not None and case.parent_case_id is None and not db.session.execute(
+		select(exists().where(CaseStatusEvent.case_id == case.id, CaseStatusEvent.to_status == to_status))
+	).scalar()
+
+	event = CaseStatusEvent(case=case, from_status=from_status, to_status=to_status, actor=actor, created_at=at)
+	db.session.add(event)
+	add_counts(Counter(stat_keys(case, to_status, from_status is None, at)))
+
+	if first_time:
+		seconds = max((at - case.created_at).total_seconds(), 0.0)
+		bucket = bucket_for(seconds)
+		for scope in scopes_for(case):
+			_increment(metric, scope, bucket, seconds)
+	return event
+
+
+def record_bulk_status_change(cases, to_status: CaseStatus, actor: str | None = None, at: datetime | None = None) -> None:
+	"""Set-based record_status_change for many cases moving to ``to_status``.
+
+	``cases`` are rows with id, status (the old one), created_at, ngo_id,
+	location and parent_case_id. History is written with one INSERT and each
+	touched rollup row is incremented once.
+	"""
+	cases = list(cases)
+	if not cases:
+		return
+	at = at or datetime.utcnow()
+	metric = METRICS.get(to_status)
+	roots = [c for c in cases if c.parent_case_id is None] if metric is not None else []
+	seen = set()
+	if roots:
+		seen = set(db.session.execute(
+			select(CaseStatusEvent.case_id).where(
+				CaseStatusEvent.case_id.in_([c.id for c in roots]),
+				CaseStatusEvent.to_status == to_status,
+			)
+		).scalars())
+	db.session.execute(
+		insert(CaseStatusEvent),
+		[
+			{"case_id": c.id, "from_status": c.status, "to_status": to_status, "actor": actor, "created_at": at}
+			for c in cases
+		],
+	)
+	add_counts(Counter({key: len(cases) for key in stat_keys(cases[0], to_status, False, at)}))
+	increments: dict[tuple[str, int], list[float]] = {}
+	for c in roots:
+		if c.id in seen:
+			continue
+		seconds = max((at - c.created_at).total_seconds(), 0.0)
+		for scope in scopes_for(c):
+			acc = increments.setdefault((scope, bucket_for(seconds)), [0, 0.0])
+			acc[0] += 1
+			acc[1] += seconds
+	for (scope, bucket), (count, seconds) in increments.items():
+		_increment(metric, scope, bucket, seconds, count)
+
+
+def percentile(histogram: list[tuple[int, int]], q: float) -> float | None:
+	"""Approximate q-quantile (0..1) from (bucket, count) pairs, interpolating geometrically within a bucket."""
+	total = sum(count for _, count in histogram)
+	if not total:
+		return None
+	target = q * total
+	seen = 0
+	for bucket, count in sorted(histogram):
+		if seen + count >= target:
+			lo, hi = bucket_bounds(bucket)
+			frac = (target - seen) / count
+			if lo == 0:
+				return hi * frac
+			return lo * (hi / lo) ** frac
+		seen += count
+	return bucket_bounds(sorted(histogram)[-1][0])[1]
+
+
+def duration_summary(scope: str = "all") -> dict:
+	"""count, mean, p50 and p90 in seconds for each metric in ``scope``."""
+	rows = db.session.execute(
+		select(CaseDurationRollup.metric, CaseDurationRollup.bucket, CaseDurationRollup.count, CaseDurationRollup.total_seconds)
+		.where(CaseDurationRollup.scope == scope)
+	).all()
+	summary = {}
+	for metric in METRICS.values():
+		mine = [r for r in rows if r.metric == metric]
+		count = sum(r.count for r in mine)
+		histogram = [(r.bucket, r.count) for r in mine]
+		summary[metric] = {
+			"count": count,
+			"mean_seconds": round(sum(r.total_seconds for r in mine) / count, 1) if count else None,
+			"p50_seconds": _round(percentile(histogram, 0.5)),
+			"p90_seconds": _round(percentile(histogram, 0.9)),
+		}
+	return summary
+
+
+def _round(value: float | None) -> float | None:
+	return None if value is None else round(value, 1)
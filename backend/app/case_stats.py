@@ -0,0 +1,166 @@
+"""Hourly and daily case counts for trend charts.
+
+case_stat_buckets holds one counter per (granularity, dimension, value,
+bucket start): reports by animal type, urgency and city, plus the number of
+cases entering each status. Counters are bumped in the same transaction as
+the status change that causes them (see case_metrics.record_status_change),
+so a chart reads a range of pre-aggregated rows and never groups over
+animal_cases. backfill() rebuilds the table from the case history.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import AnimalCase, CaseStatBucket, CaseStatus, CaseStatusEvent
+
+GRANULARITIES = {
+	"hour": timedelta(hours=1),
+	"day": timedelta(days=1),
+}
+# "all" counts every report; the others break reports (or, for status, transitions) down
+DIMENSIONS = ("all", "animal_type", "urgency", "city", "status")
+
+Key = tuple[str, datetime, str, str]  # granularity, bucket_start, dimension, value
+
+
+def case_city(location: str | None) -> str | None:
+	"""City of a free-text case location: its last comma-separated part, lowercased."""
+	if not location or "," not in location:
+		return None
+	city = location.rsplit(",", 1)[1].strip().lower()
+	return city[:100] or None
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+	if granularity == "day":
+		return at.replace(hour=0, minute=0, second=0, microsecond=0)
+	return at.replace(minute=0, second=0, microsecond=0)
+
+
+def stat_keys(case, to_status: CaseStatus, reported: bool, at: datetime) -> list[Key]:
+	"""Counters bumped when ``case`` enters ``to_status`` at ``at``; ``reported`` marks the initial report."""
+	values = [("status", to_status.name)]
+	if reported:
+		values.append(("all", ""))
+		values.append(("animal_type", case.animal_type.value if case.animal_type else "Other"))
+		if case.urgency is not None:
+			values.append(("urgency", case.urgency.label))
+		city = case_city(case.location)
+		if city:
+			values.append(("city", city))
+	return [
+		(granularity, bucket_start(at, granularity), dimension, value)
+		for granularity in GRANULARITIES
+		for dimension, value in values
+	]
+
+
+def add_counts(counts: Counter) -> None:
+	"""Add ``counts`` (Key -> n) to case_stat_buckets in the caller's transaction."""
+	if not counts:
+		return
+	rows = [
+		{"granularity": g, "bucket_start": start, "dimension": dim, "value": value, "count": n}
+		for (g, start, dim, value), n in sorted(counts.items())  # fixed order avoids lock-order deadlocks
+	]
+	dialect = db.engine.dialect.name
+	table = CaseStatBucket.__table__
+	if dialect in ("mysql", "mariadb"):
+		stmt = mysql.insert(table)
+		db.session.execute(stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted["count"]), rows)
+	elif dialect in ("sqlite", "postgresql"):
+		stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+		db.session.execute(
+			stmt.on_conflict_do_update(
+				index_elements=["granularity", "dimension", "bucket_start", "value"],
+				set_={"count": table.c.count + stmt.excluded["count"]},
+			),
+			rows,
+		)
+	else:
+		for row in rows:
+			_increment(row)
+
+
+def _increment(row: dict) -> None:
+	stmt = (
+		update(CaseStatBucket)
+		.where(
+			CaseStatBucket.granularity == row["granularity"], CaseStatBucket.dimension == row["dimension"],
+			CaseStatBucket.bucket_start == row["bucket_start"], CaseStatBucket.value == row["value"],
+		)
+		.values(count=CaseStatBucket.count + row["count"])
+	)
+	if db.session.execute(stmt).rowcount:
+		return
+	try:
+		with db.session.begin_nested():
+			db.session.add(CaseStatBucket(**row))
+	except IntegrityError:
+		db.session.execute(stmt)
+
+
+def series(
+	granularity: str, dimension: str, start: datetime, end: datetime, values: list[str] | None = None
+) -> dict[str, list[dict]]:
+	"""value -> [{"t", "count"}] for buckets starting in [start, end), zero-filled."""
+	query = select(CaseStatBucket.bucket_start, CaseStatBucket.value, CaseStatBucket.count).where(
+		CaseStatBucket.granularity == granularity,
+		CaseStatBucket.dimension == dimension,
+		CaseStatBucket.bucket_start >= start,
+		CaseStatBucket.bucket_start < end,
+	)
+	if values:
+		query = query.where(CaseStatBucket.value.in_(values))
+	found: dict[str, dict[datetime, int]] = {}
+	for row in db.session.execute(query):
+		found.setdefault(row.value, {})[row.bucket_start] = row.count
+	for value in values or ():
+		found.setdefault(value, {})
+
+	step = GRANULARITIES[granularity]
+	starts = []
+	t = bucket_start(start, granularity)
+	if t < start:
+		t += step
+	while t < end:
+		starts.append(t)
+		t += step
+	return {
+		value: [{"t": s.isoformat(), "count": counts.get(s, 0)} for s in starts]
+		for value, counts in sorted(found.items())
+	}
+
+
+def backfill(batch_size: int = 5000) -> int:
+	"""Rebuild case_stat_buckets from animal_cases and case_status_events; returns the number of rows written.
+
+	Reads the history once in id order (keyset batches), so it is safe to run
+	on a large table, but the rebuilt counts replace the live ones: run it
+	while reports are paused, e.g. right after deploying the migration.
+	"""
+	counts: Counter = Counter()
+	last_id = 0
+	while True:
+		events = db.session.execute(
+			select(CaseStatusEvent.id, CaseStatusEvent.from_status, CaseStatusEvent.to_status, CaseStatusEvent.created_at, AnimalCase)
+			.join(AnimalCase, AnimalCase.id == CaseStatusEvent.case_id)
+			.where(CaseStatusEvent.id > last_id)
+			.order_by(CaseStatusEvent.id)
+			.limit(batch_size)
+		).all()
+		if not events:
+			break
+		for event in events:
+			counts.update(stat_keys(event.AnimalCase, event.to_status, event.from_status is None, event.created_at))
+		last_id = events[-1].id
+		db.session.expunge_all()
+
+	db.session.execute(delete(CaseStatBucket))
+	add_counts(counts)
+	db.session.commit()
+	return len(counts)
@@ -33,6 +33,15 @@ class DataValidator:
         """Basic location validation"""
         return location and len(location.strip()) > 3
 
+    @staticmethod
+    def parse_coordinate(value: Optional[str], limit: float) -> Optional[float]:
+        """Parse a latitude/longitude cell; blank or out-of-range values become None"""
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return number if -limit <= number <= limit else None
+
 
 class DatasetImporter:
     """Handles importing various dataset types"""
@@ -62,6 +71,8 @@ class DatasetImporter:
                             'email': row.get('email', '').strip().lower(),
                             'phone': row.get('phone', '').strip(),
                             'location': row.get('location', '').strip(),
+                            'latitude': self.validator.parse_coordinate(row.get('latitude'), 90),
+                            'longitude': self.validator.parse_coordinate(row.get('longitude'), 180),
                             'operating_zones': row.get('operating_zones', '').strip(),
                             'approved': row.get('approved', 'false').lower() == 'true'
                         }
@@ -117,6 +128,8 @@ class DatasetImporter:
                             'email': row.get('email', '').strip().lower(),
                             'phone': row.get('phone', '').strip(),
                             'location': row.get('location', '').strip(),
+                            'latitude': self.validator.parse_coordinate(row.get('latitude'), 90),
+                            'longitude': self.validator.parse_coordinate(row.get('longitude'), 180),
                             'expertise': row.get('expertise', '').strip(),
                             'availability': row.get('availability', '').strip(),
                             'approved': row.get('approved', 'false').lower() == 'true'
@@ -173,6 +186,8 @@ class DatasetImporter:
                             'address': row.get('address', '').strip(),
                             'phone': row.get('phone', '').strip(),
                             'location': row.get('location', '').strip(),
+                            'latitude': self.validator.parse_coordinate(row.get('latitude'), 90),
+                            'longitude': self.validator.parse_coordinate(row.get('longitude'), 180),
                             'is_24x7': row.get('is_24x7', 'false').lower() == 'true',
                             'treatment_types': row.get('treatment_types', '').strip()
                         }
@@ -216,6 +231,8 @@ class DatasetImporter:
                             'address': row.get('address', '').strip(),
                             'phone': row.get('phone', '').strip(),
                             'location': row.get('location', '').strip(),
+                            'latitude': self.validator.parse_coordinate(row.get('latitude'), 90),
+                            'longitude': self.validator.parse_coordinate(row.get('longitude'), 180),
                             'station_code': row.get('station_code', '').strip(),
                             'is_24x7': row.get('is_24x7', 'true').lower() == 'true',
                             'jurisdiction': row.get('jurisdiction', '').strip(),
@@ -261,6 +278,8 @@ class DatasetImporter:
                             'address': row.get('address', '').strip(),
                             'phone': row.get('phone', '').strip(),
                             'location': row.get('location', '').strip(),
+                            'latitude': self.validator.parse_coordinate(row.get('latitude'), 90),
+                            'longitude': self.validator.parse_coordinate(row.get('longitude'), 180),
                             'is_24x7': row.get('is_24x7', 'false').lower() == 'true',
                             'blood_types_available': row.get('blood_types_available', '').strip(),
                             'contact_person': row.get('contact_person', '').strip(),
@@ -306,6 +325,8 @@ class DatasetImporter:
                             'address': row.get('address', '').strip(),
                             'phone': row.get('phone', '').strip(),
                             'location': row.get('location', '').strip(),
+                            'latitude': self.validator.parse_coordinate(row.get('latitude'), 90),
+                            'longitude': self.validator.parse_coordinate(row.get('longitude'), 180),
                             'station_code': row.get('station_code', '').strip(),
                             'is_24x7': row.get('is_24x7', 'true').lower() == 'true',
                             'equipment_available': row.get('equipment_available', '').strip(),
@@ -0,0 +1,166 @@
+"""Detection of repeat reports of the same incident at ingest."""
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from .dispatch import OPEN_STATUSES
+from .extensions import db
+from .geo import haversine_km
+from .models import AnimalCase, AnimalType
+
+METRES_PER_DEGREE = 111_320.0
+
+
+class DuplicateIndex:
+	"""Recent root cases bucketed by (time window, lat cell, lon cell).
+
+	Cells are ``radius_m`` tall and time buckets are ``window_s`` long, so a
+	lookup only visits the neighbouring cells of the current and previous
+	bucket; buckets older than the window are dropped as time moves on.
+	"""
+
+	def __init__(self, radius_m: float = 150.0, window_s: float = 1800.0):
+		self.radius_m = radius_m
+		self.window_s = window_s
+		self.cell_deg = radius_m / METRES_PER_DEGREE
+		self._buckets: dict[tuple[int, int, int], list[tuple]] = {}
+		self._keys: dict[int, tuple[int, int, int]] = {}
+
+	def __len__(self) -> int:
+		return len(self._keys)
+
+	def _key(self, lat: float, lon: float, ts: float) -> tuple[int, int, int]:
+		return int(ts // self.window_s), math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+	def add(self, case_id: int, lat: float, lon: float, ts: float, animal_type: str | None = None) -> None:
+		self.discard(case_id)
+		key = self._key(lat, lon, ts)
+		self._buckets.setdefault(key, []).append((case_id, lat, lon, ts, animal_type))
+		self._keys[case_id] = key
+
+	def discard(self, case_id: int) -> None:
+		key = self._keys.pop(case_id, None)
+		if key is None:
+			return
+		entries = [e for e in self._buckets.get(key, ()) if e[0] != case_id]
+		if entries:
+			self._buckets[key] = entries
+		else:
+			self._buckets.pop(key, None)
+
+	def prune(self, now: float) -> None:
+		oldest = int(now // self.window_s) - 1
+		for key in [k for k in self._buckets if k[0] < oldest]:
+			for entry in self._buckets.pop(key):
+				self._keys.pop(entry[0], None)
+
+	def find(self, lat: float, lon: float, ts: float, animal_type: str | None = None) -> int | None:
+		"""Closest indexed case within radius_m and window_s of the report, if any."""
+		t, cy, cx = self._key(lat, lon, ts)
+		# A longitude cell is narrower than radius_m away from the equator
+		span = math.ceil(1 / max(math.cos(math.radians(lat)), 0.01))
+		radius_km = self.radius_m / 1000.0
+		best_id, best_dist = None, None
+		for bucket in (t, t - 1):
+			for dy in (-1, 0, 1):
+				for dx in range(-span, span + 1):
+					for case_id, clat, clon, cts, ctype in self._buckets.get((bucket, cy + dy, cx + dx), ()):
+						if abs(ts - cts) > self.window_s:
+							continue
+						if animal_type and ctype and animal_type != ctype and AnimalType.OTHER.value not in (animal_type, ctype):
+							continue
+						dist = haversine_km(lat, lon, clat, clon)
+						if dist <= radius_km and (best_dist is None or dist < best_dist):
+							best_id, best_dist = case_id, dist
+		return best_id
+
+
+class DuplicateDetector:
+	"""Links new reports to a recent open case nearby, per process.
+
+	The index is loaded from the database on first use and reloaded every
+	``refresh_s`` seconds, so cases reported to other workers are picked up
+	too; in between it is kept current from this process's own reports.
+	"""
+
+	def __init__(self, radius_m: float = 150.0, window_minutes: float = 30.0, refresh_s: float = 60.0):
+		self.radius_m = radius_m
+		self.window_s = window_minutes * 60.0
+		self.refresh_s = refresh_s
+		self.index = DuplicateIndex(radius_m, self.window_s)
+		self._loaded_at: float | None = None
+		self._lock = threading.Lock()
+
+	def init_app(self, app) -> None:
+		app.extensions["duplicate_detector"] = self
+
+	def _reload(self) -> None:
+		since = datetime.utcnow() - timedelta(seconds=self.window_s)
+		rows = (
+			db.session.query(AnimalCase.id, AnimalCase.latitude, AnimalCase.longitude, AnimalCase.created_at, AnimalCase.animal_type)
+			.filter(
+				AnimalCase.status.in_(OPEN_STATUSES),
+				AnimalCase.created_at >= since,
+				AnimalCase.parent_case_id.is_(None),
+				AnimalCase.latitude.isnot(None),
+				AnimalCase.longitude.isnot(None),
+			)
+			.all()
+		)
+		index = DuplicateIndex(self.radius_m, self.window_s)
+		for case_id, lat, lon, created_at, animal_type in rows:
+			index.add(case_id, lat, lon, _timestamp(created_at), animal_type.value if animal_type else None)
+		self.index = index
+		self._loaded_at = time.monotonic()
+
+	def _ensure_fresh(self) -> None:
+		if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_s:
+			self._reload()
+
+	def find_parent(self, case: AnimalCase) -> int | None:
+		if case.latitude is None or case.longitude is None:
+			return None
+		animal_type = case.animal_type.value if case.animal_type else None
+		with self._lock:
+			self._ensure_fresh()
+			return self.index.find(case.latitude, case.longitude, _timestamp(case.created_at), animal_type)
+
+	def register(self, case: AnimalCase) -> None:
+		"""Make a committed root case matchable by later reports."""
+		if case.parent_case_id is not None or case.latitude is None or case.longitude is None:
+			return
+		ts = _timestamp(case.created_at)
+		with self._lock:
+			self.index.prune(time.time())
+			self.index.add(case.id, case.latitude, case.longitude, ts, case.animal_type.value if case.animal_type else None)
+
+	def discard(self, case_id: int) -> None:
+		"""A case was closed; new reports should not attach to it."""
+		with self._lock:
+			self.index.discard(case_id)
+
+
+def _timestamp(value: datetime | None) -> float:
+	# created_at is naive UTC
+	if value is None:
+		return time.time()
+	return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+def init_duplicate_detector(app) -> DuplicateDetector:
+	detector = DuplicateDetector(
+		radius_m=float(app.config.get("DEDUPE_RADIUS_M", 150)),
+		window_minutes=float(app.config.get("DEDUPE_WINDOW_MINUTES", 30)),
+		refresh_s=float(app.config.get("DEDUPE_REFRESH_SECONDS", 60)),
+	)
+	detector.init_app(app)
+	return detector
+
+
+def get_duplicate_detector() -> DuplicateDetector | None:
+	if not current_app.config.get("DEDUPE_ENABLED", True):
+		return None
+	return current_app.extensions.get("duplicate_detector")
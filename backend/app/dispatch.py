@@ -0,0 +1,184 @@
+"""Automatic assignment of newly reported cases to nearby volunteers."""
+import heapq
+import threading
+import time
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .geo import GridIndex, get_service_locator
+from .mailer import queue_email
+from .models import AnimalCase, CaseStatus, Urgency, Volunteer
+
+OPEN_STATUSES = (CaseStatus.PENDING, CaseStatus.IN_PROGRESS)
+
+# Expertise keywords a volunteer's free-text `expertise` is matched against
+MEDICAL_SKILLS = ("first aid", "medical", "vet")
+RESCUE_SKILLS = ("pickup", "rescue", "transport")
+
+
+class Candidate(NamedTuple):
+	score: float
+	volunteer_id: int
+	distance_km: float
+	open_cases: int
+	ngo_id: int | None
+
+
+def wanted_skills(urgency: Urgency | str | None, animal_type: str | None) -> tuple[str, ...]:
+	urgent = urgency is not None and Urgency.parse(urgency) <= Urgency.HIGH
+	skills = MEDICAL_SKILLS if urgent else RESCUE_SKILLS
+	if animal_type and animal_type.lower() != "other":
+		skills += (animal_type.lower(),)
+	return skills
+
+
+class DispatchEngine:
+	"""Ranks approved volunteers by distance, expertise and open-case load.
+
+	Candidates come from the volunteer spatial index (nearest first), so a
+	decision looks at a bounded number of volunteers regardless of how many
+	are registered. Open-case counts are cached in memory, seeded from one
+	GROUP BY query and adjusted as cases are assigned and closed.
+	"""
+
+	def __init__(
+		self,
+		radius_km: float = 15.0,
+		candidate_pool: int = 50,
+		max_open_cases: int = 3,
+		km_per_open_case: float = 2.0,
+		km_per_skill_match: float = 3.0,
+		load_ttl: float = 300.0,
+	):
+		self.radius_km = radius_km
+		self.candidate_pool = candidate_pool
+		self.max_open_cases = max_open_cases
+		self.km_per_open_case = km_per_open_case
+		self.km_per_skill_match = km_per_skill_match
+		self.load_ttl = load_ttl
+		self._loads: dict[int, int] = {}
+		self._loads_at: float | None = None
+		self._lock = threading.Lock()
+
+	def init_app(self, app) -> None:
+		app.extensions["dispatch_engine"] = self
+
+	def open_cases(self) -> dict[int, int]:
+		with self._lock:
+			if self._loads_at is None or time.monotonic() - self._loads_at > self.load_ttl:
+				rows = (
+					db.session.query(AnimalCase.assigned_volunteer_id, func.count(AnimalCase.id))
+					.filter(AnimalCase.assigned_volunteer_id.isnot(None), AnimalCase.status.in_(OPEN_STATUSES))
+					.group_by(AnimalCase.assigned_volunteer_id)
+					.all()
+				)
+				self._loads = {vid: count for vid, count in rows}
+				self._loads_at = time.monotonic()
+			return self._loads
+
+	def rank(
+		self,
+		index: GridIndex,
+		lat: float,
+		lon: float,
+		urgency: Urgency | str | None = None,
+		animal_type: str | None = None,
+		loads: dict[int, int] | None = None,
+		k: int = 5,
+	) -> list[Candidate]:
+		"""Best k candidates, lowest score first (score is in effective kilometres)."""
+		loads = loads or {}
+		skills = wanted_skills(urgency, animal_type)
+
+		def available(summary: dict) -> bool:
+			return bool(summary.get("approved")) and loads.get(summary["id"], 0) < self.max_open_cases
+
+		scored = []
+		for distance, vid, summary in index.nearest(lat, lon, self.candidate_pool, self.radius_km, available):
+			expertise = (summary.get("expertise") or "").lower()
+			matches = sum(1 for skill in skills if skill and skill in expertise)
+			load = loads.get(vid, 0)
+			score = distance + load * self.km_per_open_case - matches * self.km_per_skill_match
+			scored.append(Candidate(score, vid, distance, load, summary.get("ngo_id")))
+		return heapq.nsmallest(k, scored)
+
+	def dispatch(self, case: AnimalCase) -> Candidate | None:
+		"""Assign the best volunteer to `case` in the current transaction."""
+		if case.assigned_volunteer_id or case.latitude is None or case.longitude is None:
+			return None
+		index = get_service_locator().index("volunteer")
+		animal_type = case.animal_type.value if case.animal_type else None
+		session = db.session()
+		pending = session.info.setdefault("dispatch_assignments", [])
+		loads = dict(self.open_cases())
+		for engine, volunteer_id in pending:  # earlier assignments in this transaction count too
+			if engine is self:
+				loads[volunteer_id] = loads.get(volunteer_id, 0) + 1
+		ranked = self.rank(index, case.latitude, case.longitude, case.urgency, animal_type, loads, k=1)
+		if not ranked:
+			return None
+
+		best = ranked[0]
+		case.assigned_volunteer_id = best.volunteer_id
+		if case.ngo_id is None:
+			case.ngo_id = best.ngo_id
+		# Counted once the transaction commits (see _count_assignments), so a failed commit frees the volunteer
+		pending.append((self, best.volunteer_id))
+
+		volunteer = db.session.get(Volunteer, best.volunteer_id)
+		if volunteer is not None:
+			queue_email(
+				"case_assignment",
+				volunteer.email,
+				f"ResQTrack: Case {case.case_code} assigned to you",
+				f"A {Urgency.parse(case.urgency).label} case was reported {best.distance_km:.1f} km from you at {case.location}. "
+				f"Case ID: {case.case_code}.",
+			)
+		return best
+
+	def invalidate(self) -> None:
+		"""Assignments changed outside dispatch(); reload open-case counts on next use."""
+		with self._lock:
+			self._loads_at = None
+
+	def count_assigned(self, volunteer_id: int) -> None:
+		with self._lock:
+			self._loads[volunteer_id] = self._loads.get(volunteer_id, 0) + 1
+
+	def release(self, volunteer_id: int | None) -> None:
+		"""A case assigned to `volunteer_id` was rescued or closed."""
+		if volunteer_id is None:
+			return
+		with self._lock:
+			if self._loads.get(volunteer_id, 0) > 0:
+				self._loads[volunteer_id] -= 1
+
+
+@event.listens_for(Session, "after_commit")
+def _count_assignments(session: Session) -> None:
+	for engine, volunteer_id in session.info.pop("dispatch_assignments", None) or ():
+		engine.count_assigned(volunteer_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_assignments(session: Session) -> None:
+	session.info.pop("dispatch_assignments", None)
+
+
+def init_dispatch_engine(app) -> DispatchEngine:
+	engine = DispatchEngine(
+		radius_km=float(app.config.get("DISPATCH_RADIUS_KM", 15)),
+		max_open_cases=int(app.config.get("DISPATCH_MAX_OPEN_CASES", 3)),
+	)
+	engine.init_app(app)
+	return engine
+
+
+def get_dispatch_engine() -> DispatchEngine | None:
+	if not current_app.config.get("DISPATCH_ENABLED", True):
+		return None
+	return current_app.extensions.get("dispatch_engine")
@@ -0,0 +1,190 @@
+"""Escalation of cases left PENDING past their urgency's deadline.
+
+Every worker runs an EscalationSweeper thread, but a sweep only starts after
+claiming the case_escalation row in scheduled_jobs (see jobs.JobLease),
+whose next_run_at makes it run once per ESCALATION_INTERVAL_SECONDS across
+all of them. The lease expires if its holder dies, and each batch re-checks
+it in the same transaction that writes the emails and the watermark, so a
+worker that lost its lease cannot escalate a case twice.
+
+Each urgency level is swept as a keyset range scan of ix_animal_cases_queue
+(status = PENDING, urgency = u, created_at up to now minus the deadline),
+resuming after that level's watermark, so a sweep reads only cases that
+became overdue since the previous one.
+"""
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import and_, or_, select
+
+from .events import case_event_data, get_event_broadcaster
+from .extensions import db
+from .jobs import JobLease, LeaseLost
+from .mailer import queue_case_escalation
+from .models import NGO, AnimalCase, CaseStatus, EscalationWatermark, ScheduledJob, Urgency
+
+JOB_NAME = "case_escalation"
+
+
+def parse_deadlines(raw: str) -> dict[Urgency, timedelta]:
+	"""Parse "Critical=15,High=60" into deadlines per urgency; unlisted levels are never escalated."""
+	deadlines = {}
+	for part in (raw or "").split(","):
+		if not part.strip():
+			continue
+		label, _, minutes = part.partition("=")
+		deadlines[Urgency.parse(label.strip())] = timedelta(minutes=float(minutes))
+	return deadlines
+
+
+class EscalationSweeper:
+	def __init__(self, app: Flask | None = None):
+		self.app = None
+		self._thread = None
+		self._stop = threading.Event()
+		self.owner = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+		self._job = JobLease(JOB_NAME, self.owner)
+		self.sweeps_total = 0
+		self.escalated_total = 0
+		self.last_run_at = None
+		if app is not None:
+			self.init_app(app)
+
+	def init_app(self, app: Flask) -> None:
+		self.app = app
+		app.extensions["escalation_sweeper"] = self
+		if app.config.get("BACKGROUND_WORKERS_ENABLED") and app.config.get("ESCALATION_ENABLED", True):
+			self.start()
+
+	def start(self) -> None:
+		if self._thread and self._thread.is_alive():
+			return
+		self._stop.clear()
+		self._thread = threading.Thread(target=self._run, name="escalation-sweeper", daemon=True)
+		self._thread.start()
+
+	def stop(self, timeout: float = 5.0) -> None:
+		self._stop.set()
+		if self._thread:
+			self._thread.join(timeout)
+
+	def _run(self) -> None:
+		# Poll more often than the interval so a dead lease holder delays a sweep by at most one poll
+		poll = min(float(self.app.config.get("ESCALATION_INTERVAL_SECONDS", 60)), 15.0)
+		while not self._stop.is_set():
+			try:
+				with self.app.app_context():
+					self.run_if_due()
+			except Exception:
+				self.app.logger.exception("Escalation sweep failed")
+			self._stop.wait(poll)
+
+	@property
+	def _lease(self) -> timedelta:
+		return timedelta(seconds=float(self.app.config.get("ESCALATION_LEASE_SECONDS", 300)))
+
+	def _claim(self, now: datetime) -> bool:
+		return self._job.claim(now, self._lease)
+
+	def _renew(self) -> None:
+		self._job.renew(self._lease)
+
+	def _release(self, started: datetime) -> None:
+		interval = timedelta(seconds=float(self.app.config.get("ESCALATION_INTERVAL_SECONDS", 60)))
+		self._job.release(started, interval)
+
+	def run_if_due(self, now: datetime | None = None) -> int | None:
+		"""Sweep if this interval's run has not happened yet; returns cases escalated, or None if not our turn."""
+		now = now or datetime.utcnow()
+		if not self._claim(now):
+			return None
+		try:
+			escalated = self.sweep(now)
+		except LeaseLost:
+			db.session.rollback()
+			self.app.logger.warning("Escalation lease lost mid-sweep; another worker will finish it")
+			return None
+		except Exception:
+			db.session.rollback()
+			self._release(now)
+			raise
+		self._release(now)
+		self.sweeps_total += 1
+		self.escalated_total += escalated
+		self.last_run_at = now
+		return escalated
+
+	def sweep(self, now: datetime) -> int:
+		cfg = self.app.config
+		deadlines = parse_deadlines(cfg.get("ESCALATION_DEADLINES_MINUTES", ""))
+		floor = now - timedelta(hours=float(cfg.get("ESCALATION_LOOKBACK_HOURS", 72)))
+		batch_size = int(cfg.get("ESCALATION_BATCH_SIZE", 200))
+		recipients = [e.strip() for e in (cfg.get("ESCALATION_EMAILS") or "").split(",") if e.strip()]
+
+		escalated = 0
+		for urgency in sorted(deadlines):  # most urgent first
+			cutoff = now - deadlines[urgency]
+			waited = int(deadlines[urgency].total_seconds() // 60)
+			mark = db.session.get(EscalationWatermark, urgency)
+			# Cases older than the lookback when first seen are left alone (e.g. on first deploy)
+			after = (mark.case_created_at, mark.case_id) if mark and mark.case_created_at >= floor else (floor, 0)
+			while True:
+				batch = AnimalCase.query.filter(
+					AnimalCase.status == CaseStatus.PENDING,
+					AnimalCase.urgency == urgency,
+					AnimalCase.created_at <= cutoff,
+					AnimalCase.created_at >= after[0],  # plain range bound for the index; the OR resolves ties
+					or_(
+						AnimalCase.created_at > after[0],
+						and_(AnimalCase.created_at == after[0], AnimalCase.id > after[1]),
+					),
+					AnimalCase.parent_case_id.is_(None),
+				).order_by(AnimalCase.created_at, AnimalCase.id).limit(batch_size).all()
+				if not batch:
+					break
+				ngo_emails = dict(db.session.execute(
+					select(NGO.id, NGO.email).where(NGO.id.in_({c.ngo_id for c in batch if c.ngo_id}))
+				).all())
+				for case in batch:
+					for email in recipients + ([ngo_emails[case.ngo_id]] if case.ngo_id in ngo_emails else []):
+						queue_case_escalation(email, case, waited)
+				after = (batch[-1].created_at, batch[-1].id)
+				if mark is None:
+					mark = EscalationWatermark(urgency=urgency, case_created_at=after[0], case_id=after[1])
+					db.session.add(mark)
+				else:
+					mark.case_created_at, mark.case_id = after
+				payloads = [case_event_data(case) for case in batch]  # before commit expires the cases
+				self._renew()
+				db.session.commit()
+				escalated += len(batch)
+				self._publish(payloads)
+				if len(batch) < batch_size:
+					break
+		return escalated
+
+	def _publish(self, payloads: list[dict]) -> None:
+		try:
+			broadcaster = get_event_broadcaster()
+			for data in payloads:
+				broadcaster.publish("case.escalated", data)
+		except Exception:
+			self.app.logger.exception("Failed to publish case.escalated events")
+
+	def metrics(self) -> dict:
+		job = db.session.get(ScheduledJob, JOB_NAME)
+		return {
+			"next_run_at": job.next_run_at.isoformat() if job else None,
+			"last_run_at": job.last_run_at.isoformat() if job and job.last_run_at else None,
+			"leased_by": job.owner if job else None,
+			"sweeps_total": self.sweeps_total,
+			"escalated_total": self.escalated_total,
+			"sweeper_running": bool(self._thread and self._thread.is_alive()),
+		}
+
+
+escalation_sweeper = EscalationSweeper()
@@ -0,0 +1,315 @@
+"""Case change events fanned out to Server-Sent Events subscribers.
+
+Every published event gets a monotonically increasing id and is kept in a
+short change log so a reconnecting client can resume from ``Last-Event-ID``.
+The default backend is in-process; with EVENTS_REDIS_URL set, events are
+numbered and logged in Redis and relayed to every worker over pub/sub.
+"""
+import itertools
+import json
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, NamedTuple
+
+from flask import Flask, current_app
+
+
+class Event(NamedTuple):
+	id: int
+	type: str
+	data: dict
+
+	def encode(self) -> str:
+		return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, separators=(',', ':'))}\n\n"
+
+
+class TooManySubscribers(Exception):
+	pass
+
+
+class EventLog:
+	"""Ring buffer of the most recent events."""
+
+	def __init__(self, size: int = 1000):
+		self._events: deque[Event] = deque(maxlen=size)
+		self._lock = threading.Lock()
+
+	def append(self, event: Event) -> None:
+		with self._lock:
+			self._events.append(event)
+
+	@property
+	def last_id(self) -> int:
+		with self._lock:
+			return self._events[-1].id if self._events else 0
+
+	def since(self, last_id: int) -> list[Event] | None:
+		"""Events after ``last_id``, or None if some of them have already been evicted."""
+		with self._lock:
+			if not self._events or last_id >= self._events[-1].id:
+				return []
+			if last_id < self._events[0].id - 1:
+				return None
+			return [e for e in self._events if e.id > last_id]
+
+
+class Subscription:
+	"""A subscriber's bounded mailbox. Overflowing it closes the subscription."""
+
+	def __init__(self, maxsize: int):
+		self._queue: queue.Queue[Event | None] = queue.Queue(maxsize)
+		self.closed = False
+
+	def put(self, event: Event) -> bool:
+		try:
+			self._queue.put_nowait(event)
+			return True
+		except queue.Full:
+			self.close()
+			return False
+
+	def get(self, timeout: float) -> Event | None:
+		try:
+			return self._queue.get(timeout=timeout)
+		except queue.Empty:
+			return None
+
+	def close(self) -> None:
+		self.closed = True
+		try:
+			# Wake a waiting reader; it checks ``closed`` after every get
+			self._queue.put_nowait(None)
+		except queue.Full:
+			pass
+
+
+class LocalBackend:
+	"""Numbers and logs events in this process only."""
+
+	def __init__(self, log_size: int):
+		self.log = EventLog(log_size)
+		self._ids = itertools.count(1)
+		self._lock = threading.Lock()
+		self.deliver = None
+
+	def publish(self, type_: str, data: dict) -> Event:
+		with self._lock:
+			event = Event(next(self._ids), type_, data)
+			self.log.append(event)
+		self.deliver(event)
+		return event
+
+	def since(self, last_id: int) -> list[Event] | None:
+		return self.log.since(last_id)
+
+	@property
+	def last_id(self) -> int:
+		return self.log.last_id
+
+	def close(self) -> None:
+		pass
+
+
+# Numbers, logs and relays an event in one step, so the log is always in id order
+# even with several workers publishing at once
+PUBLISH_SCRIPT = """
+local id = redis.call("INCR", KEYS[1])
+local payload = "[" .. id .. "," .. ARGV[1] .. "," .. ARGV[2] .. "]"
+redis.call("LPUSH", KEYS[2], payload)
+redis.call("LTRIM", KEYS[2], 0, tonumber(ARGV[3]) - 1)
+redis.call("PUBLISH", ARGV[4], payload)
+return id
+"""
+
+
+class RedisBackend:
+	"""Shares event ids, the change log and delivery across workers through Redis."""
+
+	def __init__(self, url: str, log_size: int, prefix: str = "resqtrack:events"):
+		import redis
+
+		self.redis = redis.Redis.from_url(url)
+		self.log_size = log_size
+		self.id_key = f"{prefix}:id"
+		self.log_key = f"{prefix}:log"
+		self.channel = f"{prefix}:pubsub"
+		self.deliver = None
+		self._publish = self.redis.register_script(PUBLISH_SCRIPT)
+		self._pubsub = None
+		self._thread = None
+
+	def start(self) -> None:
+		self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+		self._pubsub.subscribe(**{self.channel: self._on_message})
+		self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+	def _on_message(self, message: dict) -> None:
+		self.deliver(Event(*json.loads(message["data"])))
+
+	def publish(self, type_: str, data: dict) -> Event:
+		event_id = self._publish(
+			keys=[self.id_key, self.log_key], args=[json.dumps(type_), json.dumps(data), self.log_size, self.channel]
+		)
+		return Event(int(event_id), type_, data)
+
+	def since(self, last_id: int) -> list[Event] | None:
+		events = [Event(*json.loads(raw)) for raw in reversed(self.redis.lrange(self.log_key, 0, -1))]
+		if not events or last_id >= events[-1].id:
+			return []
+		if last_id < events[0].id - 1:
+			return None
+		return [e for e in events if e.id > last_id]
+
+	@property
+	def last_id(self) -> int:
+		return int(self.redis.get(self.id_key) or 0)
+
+	def close(self) -> None:
+		if self._thread is not None:
+			self._thread.stop()
+
+
+class Broadcaster:
+	"""Fans published events out to every subscription in this process."""
+
+	def __init__(self, backend, max_subscribers: int = 500, queue_size: int = 256):
+		self.backend = backend
+		self.backend.deliver = self._deliver
+		self.max_subscribers = max_subscribers
+		self.queue_size = queue_size
+		self._subscribers: set[Subscription] = set()
+		self._lock = threading.Lock()
+		self.published_total = 0
+		self.dropped_total = 0
+
+	def publish(self, type_: str, data: dict) -> Event:
+		self.published_total += 1
+		return self.backend.publish(type_, data)
+
+	def _deliver(self, event: Event) -> None:
+		with self._lock:
+			subscribers = list(self._subscribers)
+		for sub in subscribers:
+			if not sub.put(event):
+				# Slow consumer: drop it, the client reconnects and resumes from the log
+				self.dropped_total += 1
+				self.unsubscribe(sub)
+
+	def subscribe(self) -> Subscription:
+		with self._lock:
+			if len(self._subscribers) >= self.max_subscribers:
+				raise TooManySubscribers()
+			sub = Subscription(self.queue_size)
+			self._subscribers.add(sub)
+			return sub
+
+	def unsubscribe(self, sub: Subscription) -> None:
+		with self._lock:
+			self._subscribers.discard(sub)
+		sub.close()
+
+	def since(self, last_id: int) -> list[Event] | None:
+		return self.backend.since(last_id)
+
+	@property
+	def last_id(self) -> int:
+		return self.backend.last_id
+
+	@property
+	def subscriber_count(self) -> int:
+		with self._lock:
+			return len(self._subscribers)
+
+	def stream(self, sub: Subscription, last_id: int | None, heartbeat: float, max_seconds: float, retry_ms: int):
+		"""Yield SSE frames: backlog since ``last_id``, then live events and heartbeats until ``max_seconds``."""
+		try:
+			yield f"retry: {retry_ms}\n\n"
+			if last_id is not None:
+				backlog = self.since(last_id)
+				if backlog is None:
+					# Too far behind for the change log: tell the client to refetch in full
+					yield Event(self.last_id, "reset", {"reason": "log_truncated"}).encode()
+					backlog = []
+				for event in backlog:
+					last_id = event.id
+					yield event.encode()
+			deadline = time.monotonic() + max_seconds
+			while not sub.closed:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					break
+				event = sub.get(timeout=min(heartbeat, remaining))
+				if event is None:
+					if not sub.closed:
+						yield ": keepalive\n\n"
+					continue
+				if last_id is not None and event.id <= last_id:
+					continue  # already sent from the backlog
+				yield event.encode()
+		finally:
+			self.unsubscribe(sub)
+
+
+def _green() -> bool:
+	"""True when gevent has patched threading, so each stream is a greenlet rather than a server thread."""
+	monkey = sys.modules.get("gevent.monkey")
+	return monkey is not None and monkey.is_module_patched("threading")
+
+
+def stream_capacity(app: Flask) -> int:
+	"""STREAM_MAX_CONNECTIONS, kept below SERVER_THREADS on a threaded server so one thread is left for other requests."""
+	limit = int(app.config.get("STREAM_MAX_CONNECTIONS", 500))
+	if _green():
+		return limit
+	return max(0, min(limit, int(app.config.get("SERVER_THREADS", 8)) - 1))
+
+
+def init_event_broadcaster(app: Flask) -> Broadcaster:
+	log_size = int(app.config.get("STREAM_LOG_SIZE", 1000))
+	redis_url = app.config.get("EVENTS_REDIS_URL")
+	if redis_url:
+		backend = RedisBackend(redis_url, log_size)
+	else:
+		backend = LocalBackend(log_size)
+	broadcaster = Broadcaster(
+		backend,
+		max_subscribers=stream_capacity(app),
+		queue_size=int(app.config.get("STREAM_QUEUE_SIZE", 256)),
+	)
+	if redis_url:
+		backend.start()
+	app.extensions["event_broadcaster"] = broadcaster
+	return broadcaster
+
+
+def get_event_broadcaster() -> Broadcaster:
+	return current_app.extensions["event_broadcaster"]
+
+
+def case_event_data(case: Any) -> dict:
+	"""Public fields of a case for the live feed (reporter contact details are left out)."""
+	return {
+		"id": case.id,
+		"case_code": case.case_code,
+		"status": case.status.value if case.status else "PENDING",
+		"urgency": case.urgency.label if case.urgency is not None else None,
+		"animal_type": case.animal_type.value if case.animal_type else "Other",
+		"location": case.location,
+		"latitude": case.latitude,
+		"longitude": case.longitude,
+		"assigned_volunteer_id": case.assigned_volunteer_id,
+		"parent_case_id": case.parent_case_id,
+		"created_at": case.created_at.isoformat() if case.created_at else None,
+		"updated_at": case.updated_at.isoformat() if case.updated_at else None,
+	}
+
+
+def publish_case_event(type_: str, case: Any) -> None:
+	"""Publish a committed case change; a broken event backend must not fail the request."""
+	try:
+		get_event_broadcaster().publish(type_, case_event_data(case))
+	except Exception:
+		current_app.logger.exception("Failed to publish %s for case %s", type_, case.id)
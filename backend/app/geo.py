@@ -0,0 +1,305 @@
+"""In-memory spatial index for nearest-service lookups."""
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterator
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from .models import NGO, BloodBank, FireStation, Hospital, PoliceStation, Volunteer
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+# Public "type" names (match /data/emergency-services) -> model
+SERVICE_MODELS = {
+	"hospital": Hospital,
+	"police": PoliceStation,
+	"fire": FireStation,
+	"blood_bank": BloodBank,
+	"ngo": NGO,
+	"volunteer": Volunteer,
+}
+_KIND_BY_MODEL = {model: kind for kind, model in SERVICE_MODELS.items()}
+
+# Columns copied into the index so lookups never go back to the database
+_SUMMARY_FIELDS = (
+	"name", "address", "phone", "location", "is_24x7", "approved",
+	"treatment_types", "station_code", "expertise", "availability", "ngo_id",
+)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+	p1, p2 = math.radians(lat1), math.radians(lat2)
+	dp = p2 - p1
+	dl = math.radians(lon2 - lon1)
+	a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+	return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_coordinates(lat: Any, lon: Any) -> tuple[float, float] | None:
+	"""Return (lat, lon) floats, None if both are blank; raise ValueError if invalid."""
+	if lat in (None, "") and lon in (None, ""):
+		return None
+	lat, lon = float(lat), float(lon)
+	if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+		raise ValueError("coordinates out of range")
+	return lat, lon
+
+
+class GridIndex:
+	"""Uniform lat/lon grid; k-nearest search expands rings of cells around the query.
+
+	Updates are O(1). A query visits only the cells that can still contain
+	something closer than the current k-th best (or within the radius); once
+	a ring would be larger than the number of occupied cells it falls back to
+	walking the occupied cells in ring order, so sparse data stays cheap.
+	"""
+
+	def __init__(self, cell_deg: float = 0.02):
+		self.cell_deg = cell_deg
+		self._cells: dict[tuple[int, int], dict[Hashable, tuple[float, float, Any]]] = {}
+		self._where: dict[Hashable, tuple[int, int]] = {}
+
+	def __len__(self) -> int:
+		return len(self._where)
+
+	def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+		return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+	def upsert(self, key: Hashable, lat: float, lon: float, data: Any = None) -> None:
+		self.remove(key)
+		cell = self._cell(lat, lon)
+		self._cells.setdefault(cell, {})[key] = (lat, lon, data)
+		self._where[key] = cell
+
+	def remove(self, key: Hashable) -> None:
+		cell = self._where.pop(key, None)
+		if cell is None:
+			return
+		bucket = self._cells[cell]
+		bucket.pop(key, None)
+		if not bucket:
+			del self._cells[cell]
+
+	def get(self, key: Hashable) -> tuple[float, float, Any] | None:
+		cell = self._where.get(key)
+		return self._cells[cell][key] if cell is not None else None
+
+	def _rings(self, ci: int, cj: int) -> Iterator[tuple[int, tuple[int, int]]]:
+		r = 0
+		while True:
+			if 8 * max(r, 1) > len(self._cells):
+				rest = sorted(
+					(max(abs(i - ci), abs(j - cj)), (i, j))
+					for (i, j) in self._cells
+					if max(abs(i - ci), abs(j - cj)) >= r
+				)
+				yield from rest
+				return
+			if r == 0:
+				cells = [(ci, cj)]
+			else:
+				cells = [(ci + d, cj + e) for d in (-r, r) for e in range(-r, r + 1)]
+				cells += [(ci + d, cj + e) for e in (-r, r) for d in range(-r + 1, r)]
+			for cell in cells:
+				if cell in self._cells:
+					yield r, cell
+			r += 1
+
+	def _ring_floor_km(self, lat: float, ring: int) -> float:
+		"""Lower bound on the distance from a point to anything in ring `ring`."""
+		if ring <= 1:
+			return 0.0
+		widest_lat = min(abs(lat) + (ring + 1) * self.cell_deg, 89.9)
+		cell_km = self.cell_deg * KM_PER_DEG_LAT * min(1.0, math.cos(math.radians(widest_lat)))
+		return (ring - 1) * cell_km
+
+	def _cell_floor_km(self, lat: float, lon: float, cell: tuple[int, int]) -> float:
+		"""Distance to the nearest corner/edge point of a cell (slightly under-estimated)."""
+		i, j = cell
+		near_lat = min(max(lat, i * self.cell_deg), (i + 1) * self.cell_deg)
+		near_lon = min(max(lon, j * self.cell_deg), (j + 1) * self.cell_deg)
+		return haversine_km(lat, lon, near_lat, near_lon) * 0.99
+
+	def nearest(
+		self,
+		lat: float,
+		lon: float,
+		k: int | None = 10,
+		radius_km: float | None = None,
+		predicate: Callable[[Any], bool] | None = None,
+	) -> list[tuple[float, Hashable, Any]]:
+		"""Up to k (distance_km, key, data) tuples sorted by distance."""
+		best: list[tuple[float, int, Hashable, Any]] = []  # max-heap via negated distance
+		tiebreak = itertools.count()
+		ci, cj = self._cell(lat, lon)
+		for ring, cell in self._rings(ci, cj):
+			floor = self._ring_floor_km(lat, ring)
+			if radius_km is not None and floor > radius_km:
+				break
+			if k and len(best) >= k and floor > -best[0][0]:
+				break
+			if ring > 0:
+				cell_floor = self._cell_floor_km(lat, lon, cell)
+				if (radius_km is not None and cell_floor > radius_km) or (k and len(best) >= k and cell_floor > -best[0][0]):
+					continue
+			for key, (plat, plon, data) in self._cells[cell].items():
+				if predicate is not None and not predicate(data):
+					continue
+				dist = haversine_km(lat, lon, plat, plon)
+				if radius_km is not None and dist > radius_km:
+					continue
+				if not k or len(best) < k:
+					heapq.heappush(best, (-dist, next(tiebreak), key, data))
+				elif dist < -best[0][0]:
+					heapq.heapreplace(best, (-dist, next(tiebreak), key, data))
+		return sorted((-neg, key, data) for neg, _, key, data in best)
+
+
+def summarize(kind: str, obj: Any) -> dict:
+	summary = {"type": kind, "id": obj.id, "latitude": obj.latitude, "longitude": obj.longitude}
+	for field in _SUMMARY_FIELDS:
+		if hasattr(obj, field):
+			summary[field] = getattr(obj, field)
+	return summary
+
+
+class ServiceLocator:
+	"""One GridIndex per service type, built lazily and kept current on commit.
+
+	Writes in this process are applied incrementally after commit. Each index
+	is also rebuilt after SPATIAL_INDEX_TTL seconds so that writes made by
+	other workers show up.
+	"""
+
+	def __init__(self, cell_deg: float = 0.02, ttl: float = 300.0):
+		self.cell_deg = cell_deg
+		self.ttl = ttl
+		self._indexes: dict[str, GridIndex] = {}
+		self._built_at: dict[str, float] = {}
+		self._lock = threading.RLock()
+
+	def init_app(self, app) -> None:
+		app.extensions["service_locator"] = self
+
+	def index(self, kind: str) -> GridIndex:
+		with self._lock:
+			built = self._built_at.get(kind)
+			if built is None or time.monotonic() - built > self.ttl:
+				self.rebuild(kind)
+			return self._indexes[kind]
+
+	def rebuild(self, kind: str) -> None:
+		model = SERVICE_MODELS[kind]
+		rows = model.query.filter(model.latitude.isnot(None), model.longitude.isnot(None)).all()
+		index = GridIndex(self.cell_deg)
+		for row in rows:
+			index.upsert(row.id, row.latitude, row.longitude, summarize(kind, row))
+		with self._lock:
+			self._indexes[kind] = index
+			self._built_at[kind] = time.monotonic()
+
+	def invalidate(self, kind: str | None = None) -> None:
+		with self._lock:
+			for name in [kind] if kind else list(self._built_at):
+				self._built_at.pop(name, None)
+
+	def apply(self, changes: list[tuple]) -> None:
+		with self._lock:
+			for op, kind, key, *rest in changes:
+				if op == "invalidate":
+					self._built_at.pop(kind, None)
+					continue
+				index = self._indexes.get(kind)
+				if index is None or kind not in self._built_at:
+					continue  # built from the database on next use
+				if op == "upsert" and rest[0] is not None:
+					lat, lon, summary = rest
+					index.upsert(key, lat, lon, summary)
+				else:
+					index.remove(key)
+
+	def nearby(
+		self,
+		lat: float,
+		lon: float,
+		kinds: list[str],
+		k: int = 10,
+		radius_km: float | None = None,
+		predicate: Callable[[dict], bool] | None = None,
+	) -> list[tuple[float, dict]]:
+		found = []
+		with self._lock:
+			for kind in kinds:
+				for dist, _, summary in self.index(kind).nearest(lat, lon, k, radius_km, predicate):
+					found.append((dist, summary))
+		return heapq.nsmallest(k, found, key=lambda item: item[0])
+
+
+def init_service_locator(app) -> ServiceLocator:
+	locator = ServiceLocator(
+		cell_deg=float(app.config.get("SPATIAL_INDEX_CELL_DEG", 0.02)),
+		ttl=float(app.config.get("SPATIAL_INDEX_TTL", 300)),
+	)
+	locator.init_app(app)
+	return locator
+
+
+def get_service_locator() -> ServiceLocator:
+	return current_app.extensions["service_locator"]
+
+
+# -----------------------
+# Keep indexes in sync with ORM writes
+# -----------------------
+def _record(session: Session | None, change: tuple) -> None:
+	if session is not None:
+		session.info.setdefault("geo_changes", []).append(change)
+
+
+def _after_upsert(mapper, connection, target) -> None:
+	kind = _KIND_BY_MODEL[mapper.class_]
+	if target.latitude is None or target.longitude is None:
+		_record(object_session(target), ("upsert", kind, target.id, None))
+	else:
+		_record(object_session(target), ("upsert", kind, target.id, target.latitude, target.longitude, summarize(kind, target)))
+
+
+def _after_delete(mapper, connection, target) -> None:
+	_record(object_session(target), ("delete", _KIND_BY_MODEL[mapper.class_], target.id))
+
+
+for _model in SERVICE_MODELS.values():
+	event.listen(_model, "after_insert", _after_upsert)
+	event.listen(_model, "after_update", _after_upsert)
+	event.listen(_model, "after_delete", _after_delete)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_write(orm_execute_state) -> None:
+	# Set-based UPDATE/DELETE bypasses mapper events; rebuild those indexes instead.
+	if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+		return
+	for mapper in orm_execute_state.all_mappers:
+		kind = _KIND_BY_MODEL.get(mapper.class_)
+		if kind:
+			_record(orm_execute_state.session, ("invalidate", kind, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+	changes = session.info.pop("geo_changes", None)
+	if changes and has_app_context():
+		locator = current_app.extensions.get("service_locator")
+		if locator is not None:
+			locator.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+	session.info.pop("geo_changes", None)
@@ -0,0 +1,226 @@
+"""Idempotency-Key support for endpoints that create rows.
+
+The first request with a given key claims it in the idempotency_keys table
+(committed before the handler runs, so a concurrent retry on another worker
+sees the claim), runs the handler and stores the response. Retries with the
+same key and the same request get the stored response back without running
+the handler again; the same key with a different request is rejected.
+Completed responses are also kept in a per-process LRU so most replays never
+touch the database.
+"""
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from flask import Response, current_app, request
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .media import UploadSink
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse(NamedTuple):
+	fingerprint: str
+	status_code: int
+	body: str
+	expires_at: float  # time.time()
+
+
+class IdempotencyCache:
+	"""Thread-safe LRU of completed responses with per-entry expiry."""
+
+	def __init__(self, capacity: int = 10000):
+		self.capacity = capacity
+		self._entries: OrderedDict[tuple[str, str], StoredResponse] = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, scope: str, key: str) -> StoredResponse | None:
+		with self._lock:
+			entry = self._entries.get((scope, key))
+			if entry is None:
+				return None
+			if entry.expires_at <= time.time():
+				del self._entries[(scope, key)]
+				return None
+			self._entries.move_to_end((scope, key))
+			return entry
+
+	def put(self, scope: str, key: str, entry: StoredResponse) -> None:
+		with self._lock:
+			self._entries[(scope, key)] = entry
+			self._entries.move_to_end((scope, key))
+			while len(self._entries) > self.capacity:
+				self._entries.popitem(last=False)
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+
+def request_fingerprint() -> str:
+	"""sha256 over method, path and body (form fields and uploaded file contents for multipart)."""
+	h = hashlib.sha256(f"{request.method} {request.path}\n".encode())
+	if request.files or request.form:
+		for name, value in sorted(request.form.items(multi=True)):
+			h.update(f"{name}={value}\n".encode())
+		for name, storage in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+			h.update(f"{name}:{storage.filename}\n".encode())
+			if isinstance(storage.stream, UploadSink):
+				h.update(storage.stream.sha256.encode())  # hashed while it was received
+				continue
+			for chunk in iter(lambda: storage.stream.read(64 * 1024), b""):
+				h.update(chunk)
+			storage.stream.seek(0)
+	else:
+		h.update(request.get_data(cache=True))
+	return h.hexdigest()
+
+
+def _replay(entry: StoredResponse) -> Response:
+	response = current_app.response_class(entry.body, status=entry.status_code, mimetype="application/json")
+	response.headers["Idempotent-Replayed"] = "true"
+	return response
+
+
+def _conflict(message: str, status: int) -> Response:
+	response = current_app.make_response(({"error": message}, status))
+	if status == 409:
+		response.headers["Retry-After"] = "1"
+	return response
+
+
+def _claim(scope: str, key: str, fingerprint: str) -> IdempotencyKey | StoredResponse | None:
+	"""Claim the key; return the stored response if it is already complete, or None if it is in flight."""
+	cfg = current_app.config
+	now = datetime.utcnow()
+	row = IdempotencyKey(
+		scope=scope, key=key, fingerprint=fingerprint,
+		locked_until=now + timedelta(seconds=float(cfg.get("IDEMPOTENCY_LOCK_SECONDS", 60))),
+		expires_at=now + timedelta(seconds=float(cfg.get("IDEMPOTENCY_TTL_SECONDS", 86400))),
+	)
+	try:
+		db.session.add(row)
+		db.session.commit()
+		return row
+	except IntegrityError:
+		db.session.rollback()
+
+	existing = db.session.execute(
+		select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+	).scalar_one_or_none()
+	if existing is None:
+		return None  # deleted by its owner in the meantime; let the client retry
+	if existing.status_code is not None and existing.expires_at > now:
+		return StoredResponse(
+			existing.fingerprint, existing.status_code, existing.response_body,
+			time.time() + (existing.expires_at - now).total_seconds(),
+		)
+	if existing.expires_at <= now or (existing.locked_until and existing.locked_until <= now):
+		# Expired, or abandoned by a worker that died mid-request: take it over
+		claimed = db.session.execute(
+			IdempotencyKey.__table__.update()
+			.where(IdempotencyKey.id == existing.id, IdempotencyKey.created_at == existing.created_at)
+			.values(
+				fingerprint=fingerprint, status_code=None, response_body=None,
+				locked_until=row.locked_until, expires_at=row.expires_at, created_at=now,
+			)
+		).rowcount
+		db.session.commit()
+		if claimed:
+			return db.session.get(IdempotencyKey, existing.id)
+	return None
+
+
+def _purge_expired() -> None:
+	# Two statements: MySQL rejects DELETE with a LIMITed subquery on the same table
+	expired = db.session.execute(
+		select(IdempotencyKey.id).where(IdempotencyKey.expires_at < datetime.utcnow()).limit(500)
+	).scalars().all()
+	if expired:
+		db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired)))
+
+
+def idempotent(scope: str):
+	"""Make a create endpoint safe to retry when the client sends an Idempotency-Key."""
+
+	def decorator(view):
+		@functools.wraps(view)
+		def wrapper(*args, **kwargs):
+			key = (request.headers.get(HEADER) or "").strip()
+			if not key:
+				return view(*args, **kwargs)
+			if len(key) > MAX_KEY_LENGTH:
+				return _conflict(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters", 400)
+
+			cache = get_idempotency_cache()
+			fingerprint = request_fingerprint()
+			cached = cache.get(scope, key)
+			if cached is not None:
+				if cached.fingerprint != fingerprint:
+					return _conflict(f"{HEADER} was already used for a different request", 422)
+				return _replay(cached)
+
+			claim = _claim(scope, key, fingerprint)
+			if claim is None:
+				return _conflict("a request with this Idempotency-Key is still being processed", 409)
+			if isinstance(claim, StoredResponse):
+				if claim.fingerprint != fingerprint:
+					return _conflict(f"{HEADER} was already used for a different request", 422)
+				cache.put(scope, key, claim)
+				return _replay(claim)
+
+			claim_id = claim.id
+			try:
+				response = current_app.make_response(view(*args, **kwargs))
+			except Exception:
+				db.session.rollback()
+				_release(claim_id)
+				raise
+			if response.status_code >= 400 or response.mimetype != "application/json":
+				# Failed requests are not remembered; a retry runs the handler again
+				_release(claim_id)
+				return response
+
+			body = response.get_data(as_text=True)
+			row = db.session.get(IdempotencyKey, claim_id)
+			row.status_code = response.status_code
+			row.response_body = body
+			row.locked_until = None
+			if claim_id % 100 == 0:
+				_purge_expired()
+			db.session.commit()
+			cache.put(scope, key, StoredResponse(
+				fingerprint, response.status_code, body, time.time() + (row.expires_at - datetime.utcnow()).total_seconds(),
+			))
+			return response
+
+		return wrapper
+
+	return decorator
+
+
+def _release(claim_id: int) -> None:
+	try:
+		db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id == claim_id))
+		db.session.commit()
+	except Exception:
+		db.session.rollback()
+		current_app.logger.exception("Failed to release idempotency key %s", claim_id)
+
+
+def init_idempotency(app) -> IdempotencyCache:
+	cache = IdempotencyCache(int(app.config.get("IDEMPOTENCY_CACHE_SIZE", 10000)))
+	app.extensions["idempotency_cache"] = cache
+	return cache
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+	return current_app.extensions["idempotency_cache"]
@@ -0,0 +1,138 @@
+"""Group commit for write bursts.
+
+Request threads hand a unit of work to a single writer thread and wait on a
+future. The writer runs every unit queued within a few milliseconds in one
+transaction, so a burst of reports costs one commit (and one fsync on the
+database) instead of one per request, and the ORM flushes each table's rows
+together. A request returns only after its rows are committed, so callers
+keep read-your-writes semantics.
+
+A unit is a callable that adds objects to ``db.session`` without committing
+and returns a ``finish`` callable; ``finish`` runs after the commit and
+returns the unit's result. If a batch fails, each of its units is retried
+in a transaction of its own so one bad report cannot fail its neighbours.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from flask import Flask, current_app
+
+from .extensions import db
+
+Finish = Callable[[], Any]
+Unit = Callable[[], Finish]
+
+
+class GroupCommitWriter:
+	def __init__(self, app: Flask | None = None, max_batch: int = 200, max_wait_ms: float = 5.0):
+		self.app = app
+		self.max_batch = max_batch
+		self.max_wait = max_wait_ms / 1000.0
+		self._queue: queue.Queue[tuple[Unit, Future] | None] = queue.Queue()
+		self._thread: threading.Thread | None = None
+		self._lock = threading.Lock()
+		self.batches_total = 0
+		self.units_total = 0
+		self.fallbacks_total = 0
+
+	def init_app(self, app: Flask) -> None:
+		self.app = app
+		app.extensions["group_commit_writer"] = self
+
+	def _ensure_started(self) -> None:
+		if self._thread is not None and self._thread.is_alive():
+			return
+		with self._lock:
+			if self._thread is None or not self._thread.is_alive():
+				self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+				self._thread.start()
+
+	def submit(self, unit: Unit) -> Future:
+		future: Future = Future()
+		self._ensure_started()
+		self._queue.put((unit, future))
+		return future
+
+	def stop(self, timeout: float = 5.0) -> None:
+		if self._thread is not None:
+			self._queue.put(None)
+			self._thread.join(timeout)
+			self._thread = None
+
+	def _next_batch(self) -> list[tuple[Unit, Future]] | None:
+		first = self._queue.get()
+		if first is None:
+			return None
+		batch = [first]
+		deadline = time.monotonic() + self.max_wait
+		while len(batch) < self.max_batch:
+			remaining = deadline - time.monotonic()
+			try:
+				item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+			except queue.Empty:
+				break
+			if item is None:
+				self._queue.put(None)  # stop after this batch
+				break
+			batch.append(item)
+		return batch
+
+	def _run(self) -> None:
+		while True:
+			batch = self._next_batch()
+			if batch is None:
+				return
+			with self.app.app_context():
+				# Objects are not reused after the batch, so skip reloading them for finish()
+				db.session().expire_on_commit = False
+				try:
+					self._commit_batch(batch)
+				except Exception:
+					self.app.logger.exception("Group commit of %d units failed; retrying one by one", len(batch))
+					db.session.rollback()
+					self.fallbacks_total += 1
+					for unit, future in batch:
+						self._commit_batch([(unit, future)], raise_errors=False)
+				finally:
+					db.session.remove()
+
+	def _commit_batch(self, batch: list[tuple[Unit, Future]], raise_errors: bool = True) -> None:
+		try:
+			finishers = [unit() for unit, _ in batch]
+			db.session.commit()
+		except Exception as exc:
+			db.session.rollback()
+			if raise_errors:
+				raise
+			batch[0][1].set_exception(exc)
+			return
+		self.batches_total += 1
+		self.units_total += len(batch)
+		for finish, (_, future) in zip(finishers, batch):
+			try:
+				future.set_result(finish())
+			except Exception as exc:
+				future.set_exception(exc)
+
+
+def run_unit(unit: Unit) -> Any:
+	"""Run ``unit`` through the group-commit writer if enabled, otherwise in the caller's transaction."""
+	writer = current_app.extensions.get("group_commit_writer")
+	if writer is None or not current_app.config.get("INGEST_GROUP_COMMIT"):
+		finish = unit()
+		db.session.commit()
+		return finish()
+	timeout = float(current_app.config.get("INGEST_COMMIT_TIMEOUT", 10))
+	return writer.submit(unit).result(timeout)
+
+
+def init_group_commit(app: Flask) -> GroupCommitWriter:
+	writer = GroupCommitWriter(
+		max_batch=int(app.config.get("INGEST_MAX_BATCH", 200)),
+		max_wait_ms=float(app.config.get("INGEST_MAX_WAIT_MS", 5)),
+	)
+	writer.init_app(app)
+	return writer
@@ -0,0 +1,66 @@
+"""Leases on scheduled_jobs rows, for background jobs that one worker at a time should run.
+
+Every worker runs the job's thread, but a run only starts after claim()
+takes the row (its next_run_at is due and no unexpired lease is held).
+Long runs call renew() in each transaction that writes results: it raises
+LeaseLost if the lease expired and another worker took the job over, so the
+late worker's transaction is rolled back instead of repeating work.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import ScheduledJob
+
+
+class LeaseLost(Exception):
+	pass
+
+
+class JobLease:
+	def __init__(self, name: str, owner: str):
+		self.name = name
+		self.owner = owner
+
+	def claim(self, now: datetime, lease: timedelta) -> bool:
+		"""Take the job if its run is due and nobody holds it; commits."""
+		try:
+			with db.session.begin_nested():
+				db.session.add(ScheduledJob(name=self.name, next_run_at=now))
+		except IntegrityError:
+			pass  # another worker created it
+		claimed = db.session.execute(
+			update(ScheduledJob)
+			.where(
+				ScheduledJob.name == self.name,
+				ScheduledJob.next_run_at <= now,
+				or_(ScheduledJob.leased_until.is_(None), ScheduledJob.leased_until < now),
+			)
+			.values(owner=self.owner, leased_until=now + lease)
+			.execution_options(synchronize_session=False)
+		).rowcount
+		db.session.commit()
+		return claimed == 1
+
+	def renew(self, lease: timedelta) -> None:
+		"""Extend the lease in the current transaction; raises LeaseLost if another worker took it over."""
+		renewed = db.session.execute(
+			update(ScheduledJob)
+			.where(ScheduledJob.name == self.name, ScheduledJob.owner == self.owner)
+			.values(leased_until=datetime.utcnow() + lease)
+			.execution_options(synchronize_session=False)
+		).rowcount
+		if renewed != 1:
+			raise LeaseLost(self.name)
+
+	def release(self, started: datetime, interval: timedelta) -> None:
+		"""Give the job up and schedule its next run ``interval`` after this one started; commits."""
+		db.session.execute(
+			update(ScheduledJob)
+			.where(ScheduledJob.name == self.name, ScheduledJob.owner == self.owner)
+			.values(owner=None, leased_until=None, last_run_at=started, next_run_at=started + interval)
+			.execution_options(synchronize_session=False)
+		)
+		db.session.commit()
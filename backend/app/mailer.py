@@ -1,21 +1,205 @@
-from flask_mail import Message
+import smtplib
+import threading
+import time
+from collections import deque
+
 from flask import current_app
-from .extensions import mail
+from flask_mail import Message
+from .extensions import db, mail
+from .models import NotificationOutbox
 
 
-def send_case_confirmation(to_email: str, case_code: str) -> None:
+def queue_email(kind: str, to_email: str, subject: str, body: str) -> NotificationOutbox | None:
+	"""Add an email to the outbox in the caller's transaction; the dispatcher sends it after commit."""
 	if not to_email:
-		return
+		return None
+	item = NotificationOutbox(kind=kind, recipient=to_email, subject=subject, body=body)
+	db.session.add(item)
+	return item
+
+
+def queue_case_confirmation(to_email: str, case_code: str) -> NotificationOutbox | None:
 	subject = f"ResQTrack: Case {case_code} Received"
 	body = f"Thank you for reporting. Your case ID is {case_code}. Our team will coordinate shortly."
-	msg = Message(subject=subject, recipients=[to_email], body=body)
-	mail.send(msg)
+	return queue_email("case_confirmation", to_email, subject, body)
 
 
-def send_donation_receipt(to_email: str, amount: str, currency: str, donation_id: int) -> None:
-	if not to_email:
-		return
+def queue_donation_receipt(
+	to_email: str, amount: str, currency: str, donation_id: int, receipt_url: str,
+) -> NotificationOutbox | None:
 	subject = "ResQTrack: Donation Receipt"
-	body = f"Thank you for your donation of {currency} {amount}. Receipt ID: {donation_id}."
-	msg = Message(subject=subject, recipients=[to_email], body=body)
-	mail.send(msg)
+	link = current_app.config.get("PUBLIC_BASE_URL", "").rstrip("/") + receipt_url
+	body = f"Thank you for your donation of {currency} {amount}. Receipt ID: {donation_id}.\nYour receipt: {link}"
+	return queue_email("donation_receipt", to_email, subject, body)
+
+
+def queue_case_escalation(to_email: str, case, waited_minutes: int) -> NotificationOutbox | None:
+	subject = f"ResQTrack: {case.urgency.label} case {case.case_code} still pending after {waited_minutes} min"
+	body = (
+		f"Case {case.case_code} ({case.animal_type.value if case.animal_type else 'Other'}, {case.urgency.label} urgency) "
+		f"at {case.location} was reported at {case.created_at:%Y-%m-%d %H:%M} UTC and has not been picked up. "
+		"Please assign a volunteer."
+	)
+	return queue_email("case_escalation", to_email, subject, body)
+
+
+def build_message(item: NotificationOutbox) -> Message:
+	return Message(subject=item.subject, recipients=[item.recipient], body=item.body)
+
+
+def is_transient_smtp_error(exc: Exception) -> bool:
+	"""4xx replies and dropped/refused connections are worth retrying; 5xx replies are not."""
+	if isinstance(exc, smtplib.SMTPResponseException):
+		return 400 <= exc.smtp_code < 500
+	if isinstance(exc, smtplib.SMTPRecipientsRefused):
+		return False
+	return isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+class _PooledConnection:
+	def __init__(self, conn):
+		self.conn = conn
+		self.sent = 0
+		self.last_used = time.monotonic()
+
+	def send(self, message: Message) -> None:
+		self.conn.send(message)
+		self.sent += 1
+		self.last_used = time.monotonic()
+
+	def close(self) -> None:
+		try:
+			self.conn.__exit__(None, None, None)
+		except Exception:
+			pass
+
+
+class SMTPConnectionPool:
+	"""Authenticated SMTP connections kept open between batches.
+
+	A connection is opened (TLS handshake + login) once and reused for up to
+	MAIL_POOL_MAX_MESSAGES messages; connections idle for longer than
+	MAIL_POOL_IDLE_TIMEOUT seconds are closed instead of reused, since most
+	servers drop them anyway.
+	"""
+
+	def __init__(self, max_size: int = 4, idle_timeout: float = 60.0, max_messages: int = 500, retries: int = 2):
+		self.max_size = max_size
+		self.idle_timeout = idle_timeout
+		self.max_messages = max_messages
+		self.retries = retries
+		self._idle = deque()
+		self._lock = threading.Lock()
+		self._slots = threading.BoundedSemaphore(max_size)
+		self.opened_total = 0
+
+	def _open(self) -> _PooledConnection:
+		conn = mail.connect()
+		conn.__enter__()
+		with self._lock:
+			self.opened_total += 1
+		return _PooledConnection(conn)
+
+	def acquire(self) -> _PooledConnection:
+		self._slots.acquire()
+		try:
+			with self._lock:
+				while self._idle:
+					pooled = self._idle.pop()
+					if time.monotonic() - pooled.last_used <= self.idle_timeout:
+						return pooled
+					pooled.close()
+			return self._open()
+		except BaseException:
+			self._slots.release()
+			raise
+
+	def release(self, pooled: _PooledConnection, broken: bool = False) -> None:
+		try:
+			if broken or pooled.sent >= self.max_messages:
+				pooled.close()
+			else:
+				with self._lock:
+					self._idle.append(pooled)
+		finally:
+			self._slots.release()
+
+	def prune(self) -> None:
+		"""Close connections that have sat idle past the timeout."""
+		now = time.monotonic()
+		with self._lock:
+			keep = deque(p for p in self._idle if now - p.last_used <= self.idle_timeout)
+			stale = [p for p in self._idle if now - p.last_used > self.idle_timeout]
+			self._idle = keep
+		for pooled in stale:
+			pooled.close()
+
+	def close_all(self) -> None:
+		with self._lock:
+			idle, self._idle = list(self._idle), deque()
+		for pooled in idle:
+			pooled.close()
+
+	def send_batch(self, messages: list[Message]) -> list[Exception | None]:
+		"""Send messages over pooled connections; returns one error (or None) per message.
+
+		Transient failures reconnect and resume from the failed message, up to
+		`retries` times; permanent rejections only fail that message.
+		"""
+		results: list[Exception | None] = [None] * len(messages)
+		queue = deque(range(len(messages)))
+		failures = 0
+		while queue:
+			try:
+				pooled = self.acquire()
+			except Exception as exc:
+				if not is_transient_smtp_error(exc) or failures >= self.retries:
+					for i in queue:
+						results[i] = exc
+					break
+				failures += 1
+				time.sleep(min(0.5 * 2 ** (failures - 1), 5.0))
+				continue
+
+			broken = False
+			try:
+				while queue:
+					i = queue[0]
+					try:
+						pooled.send(messages[i])
+					except Exception as exc:
+						if not is_transient_smtp_error(exc):
+							results[i] = exc
+						elif failures < self.retries:
+							# Reconnect and resume from this message
+							failures += 1
+							broken = True
+							break
+						else:
+							broken = True
+							for j in queue:
+								results[j] = exc
+							queue.clear()
+							break
+					queue.popleft()
+			finally:
+				self.release(pooled, broken)
+		return results
+
+
+def get_mail_pool() -> SMTPConnectionPool:
+	app = current_app._get_current_object()
+	pool = app.extensions.get("smtp_pool")
+	if pool is None:
+		pool = app.extensions.setdefault("smtp_pool", SMTPConnectionPool(
+			max_size=int(app.config.get("MAIL_POOL_SIZE", 4)),
+			idle_timeout=float(app.config.get("MAIL_POOL_IDLE_TIMEOUT", 60)),
+			max_messages=int(app.config.get("MAIL_POOL_MAX_MESSAGES", 500)),
+			retries=int(app.config.get("MAIL_SEND_RETRIES", 2)),
+		))
+	return pool
+
+
+def send_messages(messages: list[Message]) -> list[Exception | None]:
+	"""Send a batch of messages over a pooled SMTP connection."""
+	return get_mail_pool().send_batch(messages)
@@ -0,0 +1,502 @@
+"""Single-pass handling of uploaded media.
+
+Werkzeug normally spools each multipart file to a temporary file, and the
+views then copied it into UPLOAD_FOLDER and checked its size afterwards.
+MediaRequest instead hands the multipart parser an UploadSink: every chunk
+read off the socket is counted, hashed (SHA-256) and written straight to a
+temporary file next to the final location, and the file type is sniffed
+from its first bytes. The upload is rejected with 413 as soon as it passes
+UPLOAD_MAX_FILE_BYTES, and saving it is a rename, so the bytes are written
+once and never read back.
+
+Stored files are content-addressed: key ab/cd/<sha256> in the configured
+storage (storage.py: UPLOAD_FOLDER or S3), with a media_blobs row counting
+references. Uploading content that is already stored only increments its
+count, and names chosen by clients never reach the filesystem.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from typing import BinaryIO, NamedTuple
+
+from flask import Flask, Request, current_app
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from .extensions import db
+from .models import AnimalCase, MediaBlob, MediaFile
+from .storage import StorageError, get_storage
+from .variants import get_variant_renderer
+
+INCOMING_DIR = ".incoming"
+STAGING_PREFIX = "incoming/"  # storage keys of multipart direct uploads awaiting their hash check
+SNIFF_BYTES = 16
+
+# kind -> extensions whose content must sniff as that kind
+KIND_EXTENSIONS = {
+	"image": {"png", "jpg", "jpeg", "gif"},
+	"video": {"mp4", "mov", "avi"},
+	"text": {"csv"},
+}
+
+
+def sniff_content_type(head: bytes) -> str | None:
+	"""MIME type from a file's leading magic bytes, or None if unrecognised."""
+	if head.startswith(b"\x89PNG\r\n\x1a\n"):
+		return "image/png"
+	if head.startswith(b"\xff\xd8\xff"):
+		return "image/jpeg"
+	if head[:6] in (b"GIF87a", b"GIF89a"):
+		return "image/gif"
+	if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+		return "image/webp"
+	if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+		return "video/x-msvideo"
+	if head[4:8] == b"ftyp":
+		return "video/quicktime" if head[8:12] == b"qt  " else "video/mp4"
+	if head and b"\x00" not in head:
+		return "text/plain"
+	return None
+
+
+def content_kind(content_type: str | None) -> str | None:
+	if not content_type:
+		return None
+	return content_type.split("/", 1)[0]
+
+
+def upload_limit() -> int:
+	cfg = current_app.config
+	return int(cfg.get("UPLOAD_MAX_FILE_BYTES") or cfg.get("MAX_CONTENT_LENGTH") or 16 * 1024 * 1024)
+
+
+def incoming_dir() -> str:
+	path = os.path.join(current_app.config["UPLOAD_FOLDER"], INCOMING_DIR)
+	os.makedirs(path, exist_ok=True)
+	return path
+
+
+class UploadSink:
+	"""Writable, readable temporary file that hashes, sizes and sniffs what is written to it."""
+
+	def __init__(self, directory: str, limit: int):
+		self.limit = limit
+		self.size = 0
+		self._hash = hashlib.sha256()
+		self._head = b""
+		self._file = tempfile.NamedTemporaryFile(dir=directory, prefix="up-", delete=False)
+		self.path = self._file.name
+		self.committed = False
+
+	def write(self, data: bytes) -> int:
+		self.size += len(data)
+		if self.size > self.limit:
+			self.close()
+			raise RequestEntityTooLarge(f"File is larger than {self.limit} bytes")
+		if len(self._head) < SNIFF_BYTES:
+			self._head += data[:SNIFF_BYTES - len(self._head)]
+		self._hash.update(data)
+		return self._file.write(data)
+
+	@property
+	def sha256(self) -> str:
+		return self._hash.hexdigest()
+
+	@property
+	def content_type(self) -> str | None:
+		return sniff_content_type(self._head)
+
+	def detach(self) -> str:
+		"""Close the finished upload and hand its temporary file over to the caller."""
+		self._file.close()
+		self.committed = True
+		return self.path
+
+	def close(self) -> None:
+		if not self._file.closed:
+			self._file.close()
+		if not self.committed and os.path.exists(self.path):
+			os.unlink(self.path)
+
+	def __getattr__(self, name):
+		# read/seek/readline/tell etc. for code that reads the upload (CSV imports)
+		return getattr(self._file, name)
+
+
+class MediaRequest(Request):
+	def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None) -> BinaryIO:
+		return UploadSink(incoming_dir(), upload_limit())
+
+
+class UploadRejected(Exception):
+	def __init__(self, message: str, status: int = 400):
+		super().__init__(message)
+		self.message = message
+		self.status = status
+
+
+class SavedUpload(NamedTuple):
+	filename: str  # the client's (sanitised) name, for display only
+	sha256: str
+	size: int
+	content_type: str | None
+	deduplicated: bool  # the same content was already stored
+	file_id: int  # its media_files catalog entry
+
+	@property
+	def url(self) -> str:
+		return media_url(self.sha256)
+
+
+SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+UPLOAD_KEY = re.compile(r"[0-9a-f]{32}")
+BLOB_URL = re.compile(r"/uploads/([0-9a-f]{64})$")
+
+
+def media_url(sha256: str) -> str:
+	return f"/api/uploads/{sha256}"
+
+
+def blob_hash(url: str | None) -> str | None:
+	"""SHA-256 of a content-addressed media URL, or None for legacy filename URLs."""
+	match = BLOB_URL.search(url or "")
+	return match.group(1) if match else None
+
+
+def blob_key(sha256: str) -> str:
+	"""ab/cd/abcd..., so no directory holds more than 65536 entries per level."""
+	return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def blob_path(sha256: str) -> str:
+	"""Local path of a stored blob (with S3 storage, a cached copy fetched on first use)."""
+	return get_storage().local_path(blob_key(sha256))
+
+
+def _sink_for(storage: FileStorage) -> UploadSink:
+	if isinstance(storage.stream, UploadSink):
+		return storage.stream
+	# Not parsed by MediaRequest (e.g. a FileStorage built by hand): run it through a sink once
+	sink = UploadSink(incoming_dir(), upload_limit())
+	shutil.copyfileobj(storage.stream, sink, 64 * 1024)
+	return sink
+
+
+def add_reference(
+	sha256: str, size: int, content_type: str | None, filename: str, source: str, case_id: int | None = None,
+) -> tuple[MediaFile, bool]:
+	"""Insert the blob's row or increment its count, and catalog the reference, in the caller's transaction.
+
+	Returns the media_files row and whether the content was already stored.
+	"""
+	duplicate = False
+	while True:
+		try:
+			with db.session.begin_nested():
+				db.session.add(MediaBlob(sha256=sha256, size=size, content_type=content_type, ref_count=1))
+			break
+		except IntegrityError:
+			bumped = db.session.execute(
+				update(MediaBlob).where(MediaBlob.sha256 == sha256).values(ref_count=MediaBlob.ref_count + 1)
+			).rowcount
+			if bumped:
+				# A released blob's row (ref_count 0, see release_blobs) is revived rather than duplicated
+				duplicate = db.session.execute(select(MediaBlob.ref_count).where(MediaBlob.sha256 == sha256)).scalar_one() > 1
+				break
+			# remove_blob_files() deleted the row while we waited on it: store the content afresh
+	entry = MediaFile(
+		sha256=sha256, filename=filename[:255], size=size, content_type=content_type,
+		kind=content_kind(content_type), source=source, case_id=case_id,
+	)
+	db.session.add(entry)
+	return entry, duplicate
+
+
+def store_file(
+	path: str, sha256: str, size: int, content_type: str | None, filename: str, source: str,
+	case_id: int | None = None, commit: bool = True,
+) -> tuple[MediaFile, bool]:
+	"""Add a reference to the finished local file at ``path`` (which this takes over), storing it if new.
+
+	Commits the caller's transaction (unless ``commit`` is False, for callers
+	storing a batch of files in one). Returns the file's catalog entry and
+	whether the content was already stored. The blob row is inserted or
+	incremented (and so locked) before the file is looked at, so a concurrent
+	remove_blob_files() of the same blob either finds it referenced again or
+	has deleted the file before this checks for it.
+	"""
+	entry, duplicate = add_reference(sha256, size, content_type, filename, source, case_id)
+	storage = get_storage()
+	key = blob_key(sha256)
+	if storage.exists(key):
+		os.unlink(path)  # same bytes already stored: drop the temp file
+	else:
+		storage.put_file(key, path, content_type)
+	if commit:
+		db.session.commit()
+	if content_kind(content_type) == "image" and not duplicate and current_app.config.get("BACKGROUND_WORKERS_ENABLED"):
+		get_variant_renderer().prerender(blob_path(sha256), sha256)
+	return entry, duplicate
+
+
+def check_filename(name: str | None, kinds: set[str] | None) -> tuple[str, str]:
+	"""Sanitised filename and the kind its extension promises; raises UploadRejected."""
+	filename = secure_filename(name or "")
+	ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+	expected = next((kind for kind, exts in KIND_EXTENSIONS.items() if ext in exts), None)
+	if expected is None or (kinds is not None and expected not in kinds):
+		raise UploadRejected("Unsupported file type")
+	return filename, expected
+
+
+def save_upload(storage: FileStorage, kinds: set[str] | None = None, source: str = "upload") -> SavedUpload:
+	"""Store an uploaded file after checking its content against its extension.
+
+	``kinds`` limits what may be uploaded ("image", "video", "text").
+	Content is stored once per SHA-256; uploading it again only adds a
+	reference. Raises UploadRejected.
+	"""
+	filename, expected = check_filename(storage.filename, kinds)
+	sink = _sink_for(storage)
+	sniffed = sink.content_type
+	if content_kind(sniffed) != expected:
+		sink.close()
+		raise UploadRejected("File content does not match its type")
+	content_type = "text/csv" if expected == "text" else sniffed
+
+	entry, duplicate = store_file(sink.detach(), sink.sha256, sink.size, content_type, filename, source)
+	return SavedUpload(filename, sink.sha256, sink.size, content_type, duplicate, entry.id)
+
+
+def _remote_storage():
+	storage = get_storage()
+	if not storage.remote:
+		raise UploadRejected("Direct uploads need STORAGE_BACKEND=s3", 501)
+	return storage
+
+
+def start_direct_upload(name: str | None, size: int, sha256: str, kinds: set[str] | None = None) -> dict:
+	"""Presigned upload of a file straight to the bucket: one PUT, or parts of a multipart upload if it is large.
+
+	The client declares the file's size and SHA-256 up front, uploads, then
+	calls finish_direct_upload(). Content that is already stored gets
+	{"method": "STORED"} and no URLs; completing it just adds a reference.
+	Multipart uploads go to a staging key named by the returned upload_key.
+	Raises UploadRejected.
+	"""
+	storage = _remote_storage()
+	filename, _ = check_filename(name, kinds)
+	sha256 = (sha256 or "").lower()
+	if not SHA256_HEX.fullmatch(sha256):
+		raise UploadRejected("sha256 must be the file's hex SHA-256")
+	if size <= 0:
+		raise UploadRejected("size must be positive")
+	if size > upload_limit():
+		raise UploadRejected(f"File is larger than {upload_limit()} bytes", 413)
+	key = blob_key(sha256)
+	referenced = db.session.execute(
+		select(MediaBlob.sha256).where(MediaBlob.sha256 == sha256, MediaBlob.ref_count > 0)
+	).first()
+	if referenced is not None or storage.exists(key):
+		return {"method": "STORED"}
+	content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+	if size > storage.multipart_threshold:
+		upload_key = uuid.uuid4().hex
+		return {**storage.start_multipart(STAGING_PREFIX + upload_key, size, content_type), "upload_key": upload_key}
+	return storage.presign_put(key, size, content_type, sha256)
+
+
+def _verify_staged(storage, staged: str, sha256: str) -> None:
+	"""Hash a completed multipart upload server-side (S3 only checksums its parts); raises UploadRejected."""
+	head = storage.head(staged)
+	if head is None:
+		raise UploadRejected("Upload not found; send the file before completing it", 409)
+	if head["ContentLength"] > upload_limit():
+		raise UploadRejected(f"File is larger than {upload_limit()} bytes", 413)
+	digest = hashlib.sha256()
+	with storage.open(staged) as body:
+		for chunk in iter(lambda: body.read(1024 * 1024), b""):
+			digest.update(chunk)
+	if digest.hexdigest() != sha256:
+		raise UploadRejected("File content does not match its sha256")
+
+
+def finish_direct_upload(
+	name: str | None, sha256: str, upload_id: str | None = None, etags: list[str] | None = None,
+	kinds: set[str] | None = None, upload_key: str | None = None,
+) -> SavedUpload:
+	"""Check a direct upload that has reached the bucket and add a reference to it; commits.
+
+	A multipart upload is completed at its staging key, hashed there and
+	copied to ab/cd/<sha256> only if it matches the declared SHA-256; the
+	staged object is always deleted. Single PUTs were verified against the
+	declared SHA-256 by S3 itself. The object's size and leading bytes are
+	then read from S3 (a HEAD and a 16-byte ranged GET) and checked like any
+	other upload; rejected objects are deleted. Raises UploadRejected.
+	"""
+	storage = _remote_storage()
+	filename, expected = check_filename(name, kinds)
+	sha256 = (sha256 or "").lower()
+	if not SHA256_HEX.fullmatch(sha256):
+		raise UploadRejected("sha256 must be the file's hex SHA-256")
+	key = blob_key(sha256)
+	if upload_id:
+		if not isinstance(upload_key, str) or not UPLOAD_KEY.fullmatch(upload_key):
+			raise UploadRejected("upload_key from /direct is required to complete a multipart upload")
+		staged = STAGING_PREFIX + upload_key
+		try:
+			storage.complete_multipart(staged, upload_id, etags or [])
+		except StorageError as exc:
+			raise UploadRejected(str(exc)) from exc
+		try:
+			_verify_staged(storage, staged, sha256)
+			storage.copy(staged, key, mimetypes.guess_type(filename)[0] or "application/octet-stream")
+		finally:
+			storage.delete(staged)
+	head = storage.head(key)
+	if head is None:
+		raise UploadRejected("Upload not found; send the file before completing it", 409)
+
+	known = db.session.execute(
+		select(MediaBlob.size, MediaBlob.content_type).where(MediaBlob.sha256 == sha256)
+	).first()
+	if known is not None:
+		size, content_type = known.size, known.content_type
+	else:
+		size = head["ContentLength"]
+		sniffed = sniff_content_type(storage.read_head(key, SNIFF_BYTES))
+		problem = None
+		if size > upload_limit():
+			problem = UploadRejected(f"File is larger than {upload_limit()} bytes", 413)
+		elif content_kind(sniffed) != expected:
+			problem = UploadRejected("File content does not match its type")
+		if problem is not None:
+			storage.delete(key)
+			raise problem
+		content_type = "text/csv" if expected == "text" else sniffed
+
+	entry, duplicate = add_reference(sha256, size, content_type, filename, "direct")
+	db.session.commit()
+	return SavedUpload(filename, sha256, size, content_type, duplicate, entry.id)
+
+
+def discard_upload(file_id: int) -> None:
+	"""Release an upload saved for a record that was never created; commits.
+
+	Its catalog entry is only dropped while no case owns it, in case a
+	group commit that timed out went through after all.
+	"""
+	db.session.rollback()
+	entry = db.session.get(MediaFile, file_id)
+	if entry is None:
+		return
+	sha256 = entry.sha256
+	dropped = db.session.execute(
+		delete(MediaFile).where(MediaFile.id == file_id, MediaFile.case_id.is_(None)),
+		execution_options={"synchronize_session": False},
+	).rowcount
+	unused = release_blobs([sha256]) if dropped else []
+	db.session.commit()
+	remove_blob_files(unused)
+
+
+def hash_file(path: str) -> tuple[str, int, bytes]:
+	"""SHA-256, size and leading bytes (for sniffing) of a local file, read once."""
+	digest = hashlib.sha256()
+	with open(path, "rb") as f:
+		head = f.read(SNIFF_BYTES)
+		digest.update(head)
+		size = len(head)
+		for chunk in iter(lambda: f.read(1024 * 1024), b""):
+			digest.update(chunk)
+			size += len(chunk)
+	return digest.hexdigest(), size, head
+
+
+def release_blobs(hashes) -> list[str]:
+	"""Drop one reference per hash in the caller's transaction; returns the hashes no longer referenced.
+
+	Unreferenced rows stay, with ref_count 0, until their files are removed:
+	pass the result to remove_blob_files() after the transaction commits.
+	"""
+	counts: dict[str, int] = {}
+	for sha256 in hashes:
+		if sha256:
+			counts[sha256] = counts.get(sha256, 0) + 1
+	for sha256, n in counts.items():
+		db.session.execute(
+			update(MediaBlob).where(MediaBlob.sha256 == sha256).values(ref_count=MediaBlob.ref_count - n)
+		)
+	if not counts:
+		return []
+	return list(db.session.execute(
+		select(MediaBlob.sha256).where(MediaBlob.sha256.in_(counts), MediaBlob.ref_count <= 0)
+	).scalars())
+
+
+def remove_blob_files(hashes: list[str]) -> None:
+	"""Delete the files of released blobs that are still unreferenced, one transaction each; commits.
+
+	The row is deleted first and the file only if that took, so the file goes
+	while the row is locked: an upload of the same content has either
+	referenced the row again (and the file stays) or waits and stores it anew.
+	"""
+	for sha256 in hashes:
+		removed = db.session.execute(
+			delete(MediaBlob).where(MediaBlob.sha256 == sha256, MediaBlob.ref_count <= 0)
+		).rowcount
+		if removed:
+			get_storage().delete(blob_key(sha256))
+			get_variant_renderer().discard(sha256)
+		db.session.commit()
+
+
+def shard_legacy_files() -> int:
+	"""Move files saved by name directly in UPLOAD_FOLDER into the content-addressed store; returns how many.
+
+	Cases pointing at a moved file get its new URL, and each reference is
+	cataloged in media_files (source "legacy"), which also lets old URLs
+	redirect. Files whose content does not match their extension are left
+	alone, as are the CSV exports that /api/data/export rewrites in place.
+	"""
+	folder = current_app.config["UPLOAD_FOLDER"]
+	moved = 0
+	for name in sorted(os.listdir(folder)):
+		path = os.path.join(folder, name)
+		if name.startswith((".", "temp_")) or name.endswith("_export.csv") or not os.path.isfile(path):
+			continue
+		try:
+			_, expected = check_filename(name, None)
+		except UploadRejected:
+			continue
+		sha256, size, head = hash_file(path)
+		sniffed = sniff_content_type(head)
+		if content_kind(sniffed) != expected:
+			continue
+		content_type = "text/csv" if expected == "text" else sniffed
+
+		old_urls = [f"/uploads/{name}", f"/api/uploads/{name}"]
+		case_ids = list(db.session.execute(
+			select(AnimalCase.id).where(AnimalCase.media_url.in_(old_urls)).order_by(AnimalCase.id)
+		).scalars())
+		db.session.execute(
+			update(AnimalCase).where(AnimalCase.media_url.in_(old_urls)).values(media_url=media_url(sha256))
+			.execution_options(synchronize_session=False)
+		)
+		first, *others = case_ids or [None]
+		for case_id in others:
+			add_reference(sha256, size, content_type, name, "legacy", case_id)
+		store_file(path, sha256, size, content_type, name, "legacy", first)  # moves the file and commits
+		moved += 1
+	return moved
+
+
+def init_media(app: Flask) -> None:
+	app.request_class = MediaRequest
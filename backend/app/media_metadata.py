@@ -0,0 +1,303 @@
+"""Background extraction of photo and video metadata, and case coordinates from it.
+
+Phones record where and when a photo or video was taken (EXIF GPS and
+DateTimeOriginal; the ©xyz and mvhd boxes of MP4/MOV), but reports often
+arrive without coordinates. Reading that on the request path would slow
+reporting down, so uploads are stored with media_blobs.metadata_at NULL and
+a MetadataExtractor thread picks them up in batches: it reads dimensions,
+duration, capture time and GPS (headers only, never decoding pixels),
+stores them on the blob, and fills latitude/longitude of cases using a
+located file that have none, including cases reporting content extracted
+earlier. Those cases are then dispatched and made matchable for
+duplicate detection as if they had been reported with coordinates.
+
+One worker at a time runs the batches (the media_metadata row in
+scheduled_jobs, see jobs.JobLease), every MEDIA_METADATA_INTERVAL_SECONDS.
+"""
+import os
+import re
+import socket
+import struct
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import or_
+
+from .dedupe import get_duplicate_detector
+from .dispatch import get_dispatch_engine
+from .events import publish_case_event
+from .extensions import db
+from .jobs import JobLease, LeaseLost
+from .media import blob_path
+from .models import AnimalCase, CaseStatus, MediaBlob, MediaFile
+
+JOB_NAME = "media_metadata"
+
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+ORIENTATION = 0x0112
+DATETIME = 0x0132
+DATETIME_ORIGINAL = 0x9003
+OFFSET_TIME_ORIGINAL = 0x9011
+
+MP4_EPOCH = datetime(1904, 1, 1)
+MP4_CONTAINERS = {b"moov", b"trak", b"udta"}
+ISO6709 = re.compile(r"([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)")
+
+
+def _degrees(value, ref: str | None) -> float | None:
+	try:
+		degrees, minutes, seconds = (float(v) for v in value)
+	except (TypeError, ValueError, ZeroDivisionError):
+		return None
+	result = degrees + minutes / 60 + seconds / 3600
+	return -result if ref in ("S", "W") else result
+
+
+def _valid(lat: float | None, lon: float | None) -> tuple[float, float] | tuple[None, None]:
+	if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat == 0 and lon == 0):
+		return None, None
+	return lat, lon
+
+
+def _exif_time(value: str | None, offset: str | None) -> datetime | None:
+	try:
+		taken = datetime.strptime((value or "").strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+	except ValueError:
+		return None
+	match = re.fullmatch(r"([+-])(\d\d):(\d\d)", (offset or "").strip("\x00 "))
+	if match:
+		delta = timedelta(hours=int(match.group(2)), minutes=int(match.group(3)))
+		taken -= delta if match.group(1) == "+" else -delta
+	return taken
+
+
+def extract_image(path: str) -> dict:
+	"""Dimensions as displayed, capture time and GPS position from an image's headers."""
+	from PIL import Image
+
+	with Image.open(path) as image:
+		width, height = image.size
+		exif = image.getexif()
+	if exif.get(ORIENTATION) in (5, 6, 7, 8):  # rotated 90 degrees
+		width, height = height, width
+	details = exif.get_ifd(EXIF_IFD)
+	gps = exif.get_ifd(GPS_IFD)
+	lat, lon = _valid(_degrees(gps.get(2), gps.get(1)), _degrees(gps.get(4), gps.get(3)))
+	return {
+		"width": width,
+		"height": height,
+		"captured_at": _exif_time(details.get(DATETIME_ORIGINAL) or exif.get(DATETIME), details.get(OFFSET_TIME_ORIGINAL)),
+		"latitude": lat,
+		"longitude": lon,
+	}
+
+
+def _boxes(f, start: int, end: int):
+	"""(type, body start, body end) of the ISO base media boxes between ``start`` and ``end``."""
+	pos = start
+	while pos + 8 <= end:
+		f.seek(pos)
+		size, kind = struct.unpack(">I4s", f.read(8))
+		header = 8
+		if size == 1:
+			size = struct.unpack(">Q", f.read(8))[0]
+			header = 16
+		elif size == 0:
+			size = end - pos
+		if size < header:
+			return
+		yield kind, pos + header, min(pos + size, end)
+		pos += size
+
+
+def extract_mp4(path: str) -> dict:
+	"""Duration, creation time, frame size and ©xyz location from an MP4/MOV's moov box (no sample data is read)."""
+	found: dict = {}
+	with open(path, "rb") as f:
+		def walk(start: int, end: int) -> None:
+			for kind, body, stop in _boxes(f, start, end):
+				f.seek(body)
+				if kind in MP4_CONTAINERS:
+					walk(body, stop)
+				elif kind == b"mvhd":
+					version = f.read(4)[0]
+					if version == 1:
+						created, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+					else:
+						created, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+					if timescale:
+						found["duration_seconds"] = round(duration / timescale, 3)
+					if created:
+						found["captured_at"] = MP4_EPOCH + timedelta(seconds=created)
+				elif kind == b"tkhd" and "width" not in found:
+					version = f.read(4)[0]
+					f.seek(body + (88 if version == 1 else 76))
+					width, height = (v >> 16 for v in struct.unpack(">II", f.read(8)))
+					if width and height:  # audio tracks have no frame size
+						found["width"], found["height"] = width, height
+				elif kind == b"\xa9xyz":
+					match = ISO6709.match(f.read(stop - body)[4:].decode("ascii", "ignore"))
+					if match:
+						found["latitude"], found["longitude"] = _valid(float(match.group(1)), float(match.group(2)))
+
+		walk(0, os.fstat(f.fileno()).st_size)
+	return found
+
+
+def extract(path: str, content_type: str | None) -> dict:
+	if (content_type or "").startswith("image/"):
+		return extract_image(path)
+	if content_type in ("video/mp4", "video/quicktime"):
+		return extract_mp4(path)
+	return {}
+
+
+class MetadataExtractor:
+	def __init__(self, app: Flask | None = None):
+		self.app = None
+		self._thread = None
+		self._stop = threading.Event()
+		self.owner = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+		self._job = JobLease(JOB_NAME, self.owner)
+		self.extracted_total = 0
+		self.located_cases_total = 0
+		if app is not None:
+			self.init_app(app)
+
+	def init_app(self, app: Flask) -> None:
+		self.app = app
+		app.extensions["metadata_extractor"] = self
+		if app.config.get("BACKGROUND_WORKERS_ENABLED") and app.config.get("MEDIA_METADATA_ENABLED", True):
+			self.start()
+
+	def start(self) -> None:
+		if self._thread and self._thread.is_alive():
+			return
+		self._stop.clear()
+		self._thread = threading.Thread(target=self._run, name="metadata-extractor", daemon=True)
+		self._thread.start()
+
+	def stop(self, timeout: float = 5.0) -> None:
+		self._stop.set()
+		if self._thread:
+			self._thread.join(timeout)
+
+	def _run(self) -> None:
+		poll = float(self.app.config.get("MEDIA_METADATA_INTERVAL_SECONDS", 10))
+		while not self._stop.is_set():
+			try:
+				with self.app.app_context():
+					self.run_if_due()
+			except Exception:
+				self.app.logger.exception("Media metadata extraction failed")
+			self._stop.wait(poll)
+
+	@property
+	def _lease(self) -> timedelta:
+		return timedelta(seconds=float(self.app.config.get("MEDIA_METADATA_LEASE_SECONDS", 120)))
+
+	def run_if_due(self, now: datetime | None = None) -> int | None:
+		"""Work through pending files if it is our turn; returns files processed, or None if another worker is on it."""
+		now = now or datetime.utcnow()
+		if not self._job.claim(now, self._lease):
+			return None
+		interval = timedelta(seconds=float(self.app.config.get("MEDIA_METADATA_INTERVAL_SECONDS", 10)))
+		processed = 0
+		try:
+			while True:
+				done = self.run_batch()
+				processed += done
+				if done < int(self.app.config.get("MEDIA_METADATA_BATCH_SIZE", 50)):
+					break
+		except LeaseLost:
+			db.session.rollback()
+			self.app.logger.warning("Media metadata lease lost; another worker will continue")
+			return processed
+		except Exception:
+			db.session.rollback()
+			self._job.release(now, interval)
+			raise
+		self._job.release(now, interval)
+		return processed
+
+	def run_batch(self) -> int:
+		"""Extract one batch of pending photos/videos and locate cases; commits. Returns files processed."""
+		batch_size = int(self.app.config.get("MEDIA_METADATA_BATCH_SIZE", 50))
+		blobs = MediaBlob.query.filter(
+			MediaBlob.metadata_at.is_(None),
+			or_(MediaBlob.content_type.like("image/%"), MediaBlob.content_type.like("video/%")),
+		).limit(batch_size).all()
+
+		now = datetime.utcnow()
+		for blob in blobs:
+			try:
+				found = extract(blob_path(blob.sha256), blob.content_type)
+			except Exception as exc:  # unreadable or truncated file: record it as done, without metadata
+				self.app.logger.warning("Could not read metadata of %s: %s", blob.sha256, exc)
+				found = {}
+			for field in ("width", "height", "duration_seconds", "captured_at", "latitude", "longitude"):
+				setattr(blob, field, found.get(field))
+			blob.metadata_at = now
+
+		cases = self._locate_cases()
+		if not blobs and not cases:
+			return 0
+		self._job.renew(self._lease)
+		db.session.commit()
+		self.extracted_total += len(blobs)
+		self.located_cases_total += len(cases)
+		self._after_locating(cases)
+		return len(blobs)
+
+	def _locate_cases(self) -> list[AnimalCase]:
+		"""Give cases without coordinates those of their file, dispatching open ones, in the current transaction.
+
+		Any located file counts, not just this batch's: a case reporting content
+		that was extracted earlier (a re-report, or a catalog entry linked to its
+		case after the file was extracted) is picked up on the next run.
+		"""
+		rows = (
+			db.session.query(AnimalCase, MediaBlob.latitude, MediaBlob.longitude)
+			.join(MediaFile, MediaFile.case_id == AnimalCase.id)
+			.join(MediaBlob, MediaBlob.sha256 == MediaFile.sha256)
+			.filter(MediaBlob.latitude.is_not(None), AnimalCase.latitude.is_(None), AnimalCase.longitude.is_(None))
+			.all()
+		)
+		engine = get_dispatch_engine()
+		cases = []
+		for case, lat, lon in rows:
+			if case in cases:
+				continue  # several located files
+			case.latitude, case.longitude = lat, lon
+			if engine is not None and case.status is CaseStatus.PENDING and case.parent_case_id is None:
+				engine.dispatch(case)
+			cases.append(case)
+		return cases
+
+	def _after_locating(self, cases: list[AnimalCase]) -> None:
+		detector = get_duplicate_detector()
+		for case in cases:
+			try:
+				if detector is not None and case.status is CaseStatus.PENDING:
+					detector.register(case)
+				publish_case_event("case.located", case)
+			except Exception:
+				self.app.logger.exception("Failed to publish location of case %s", case.id)
+
+	def metrics(self) -> dict:
+		pending = MediaBlob.query.filter(
+			MediaBlob.metadata_at.is_(None),
+			or_(MediaBlob.content_type.like("image/%"), MediaBlob.content_type.like("video/%")),
+		).count()
+		return {
+			"pending": pending,
+			"extracted_total": self.extracted_total,
+			"located_cases_total": self.located_cases_total,
+			"extractor_running": bool(self._thread and self._thread.is_alive()),
+		}
+
+
+metadata_extractor = MetadataExtractor()
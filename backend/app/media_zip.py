@@ -0,0 +1,153 @@
+"""ZIP bundles of the photos and videos of many cases, streamed as they are built.
+
+NGOs handing evidence to police or vets download everything attached to a
+set of cases at once (GET /api/admin/cases/media.zip). zipfile writes the
+archive into a pipe that the response drains after every CHUNK_BYTES read
+from storage, so neither the archive nor a whole file is ever held in memory
+or staged on disk, whatever the size of the bundle. Entries are stored
+uncompressed (photos and videos are compressed already), are followed by a
+data descriptor because the output cannot seek back to their headers, and
+switch to ZIP64 above 2 GiB. Only the central directory and the manifest, a
+few hundred bytes per file, grow with the bundle.
+
+Files are laid out as <case_code>/<filename>. MANIFEST.csv, written last,
+lists each file's case, path, size and SHA-256 (recipients can check what
+they received against it) and any file that could not be read.
+"""
+import csv
+import io
+import mimetypes
+import zipfile
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+from sqlalchemy import select
+
+from .extensions import db
+from .media import blob_hash, blob_key
+from .models import AnimalCase, MediaBlob, MediaFile
+from .storage import get_storage
+
+CHUNK_BYTES = 64 * 1024
+MANIFEST = "MANIFEST.csv"
+
+
+class _Pipe:
+	"""Unseekable file object holding what zipfile wrote until the response takes it."""
+
+	def __init__(self):
+		self._chunks: list[bytes] = []
+
+	def write(self, data) -> int:
+		self._chunks.append(bytes(data))
+		return len(data)
+
+	def flush(self) -> None:
+		pass
+
+	def drain(self) -> bytes:
+		data = b"".join(self._chunks)
+		self._chunks.clear()
+		return data
+
+
+def case_files(case_ids: list[int]) -> list[dict]:
+	"""Files of the given cases, in id order: their catalog entries and their media_url blob, once per content."""
+	cases = db.session.execute(
+		select(AnimalCase.id, AnimalCase.case_code, AnimalCase.media_url)
+		.where(AnimalCase.id.in_(case_ids))
+		.order_by(AnimalCase.id)
+	).all()
+	cataloged: dict[int, list] = {}
+	for row in db.session.execute(
+		select(MediaFile.case_id, MediaFile.sha256, MediaFile.filename, MediaFile.created_at)
+		.where(MediaFile.case_id.in_(case_ids))
+		.order_by(MediaFile.id)
+	):
+		cataloged.setdefault(row.case_id, []).append((row.sha256, row.filename, row.created_at))
+	for case in cases:
+		sha256 = blob_hash(case.media_url)
+		if sha256:  # attached by URL without a catalog entry pointing at the case
+			cataloged.setdefault(case.id, []).append((sha256, None, None))
+
+	hashes = {sha256 for entries in cataloged.values() for sha256, _, _ in entries}
+	blobs = {
+		row.sha256: row
+		for row in db.session.execute(
+			select(MediaBlob.sha256, MediaBlob.size, MediaBlob.content_type).where(MediaBlob.sha256.in_(hashes))
+		)
+	} if hashes else {}
+
+	files = []
+	for case in cases:
+		folder = case.case_code or f"case-{case.id}"
+		seen = set()
+		for sha256, filename, created_at in cataloged.get(case.id, []):
+			if sha256 in seen:
+				continue
+			seen.add(sha256)
+			blob = blobs.get(sha256)
+			content_type = blob.content_type if blob else None
+			if not filename:
+				filename = sha256[:16] + (mimetypes.guess_extension(content_type or "") or "")
+			files.append({
+				"case_code": folder,
+				"path": f"{folder}/{filename.replace('/', '_')}",
+				"sha256": sha256,
+				"size": blob.size if blob else None,
+				"created_at": created_at,
+			})
+	return files
+
+
+def _unique(path: str, taken: set[str]) -> str:
+	stem, dot, ext = path.rpartition(".")
+	if not dot or "/" in ext:
+		stem, dot, ext = path, "", ""
+	candidate, n = path, 1
+	while candidate in taken:
+		n += 1
+		candidate = f"{stem}-{n}{dot}{ext}"
+	taken.add(candidate)
+	return candidate
+
+
+def stream_bundle(chunks: Iterable[list[int]], state: dict | None = None) -> Iterator[bytes]:
+	"""The ZIP of the files of each chunk of case ids, in pieces of about CHUNK_BYTES.
+
+	``chunks`` is consumed lazily (see bulk.target_chunks); if it sets
+	state["truncated"], the manifest says so.
+	"""
+	pipe = _Pipe()
+	storage = get_storage()
+	manifest = [("case_code", "path", "size", "sha256", "status")]
+	taken: set[str] = set()
+	with zipfile.ZipFile(pipe, "w", zipfile.ZIP_STORED) as bundle:
+		for case_ids in chunks:
+			for entry in case_files(case_ids):
+				path = _unique(entry["path"], taken)
+				try:
+					source = storage.open(blob_key(entry["sha256"]))
+				except FileNotFoundError:
+					manifest.append((entry["case_code"], path, "", entry["sha256"], "missing"))
+					continue
+				info = zipfile.ZipInfo(path, date_time=(entry["created_at"] or datetime.utcnow()).timetuple()[:6])
+				info.compress_type = zipfile.ZIP_STORED
+				info.file_size = entry["size"] or 0  # zipfile decides on ZIP64 from the expected size
+				written = 0
+				try:
+					with bundle.open(info, "w", force_zip64=entry["size"] is None) as out:
+						for chunk in iter(lambda: source.read(CHUNK_BYTES), b""):
+							out.write(chunk)
+							written += len(chunk)
+							yield pipe.drain()
+				finally:
+					source.close()
+				manifest.append((entry["case_code"], path, written, entry["sha256"], "ok"))
+
+		if state and state.get("truncated"):
+			manifest.append(("", "", "", "", "truncated: more cases matched than BULK_MAX_ROWS"))
+		text = io.StringIO()
+		csv.writer(text).writerows(manifest)
+		bundle.writestr(MANIFEST, text.getvalue())
+	yield pipe.drain()
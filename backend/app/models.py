@@ -1,5 +1,6 @@
 from datetime import datetime
-from enum import Enum
+from enum import Enum, IntEnum
+from sqlalchemy.types import SmallInteger, TypeDecorator
 from .extensions import db
 
 
@@ -18,6 +19,12 @@ class TimestampMixin:
 	)
 
 
+class GeoPointMixin:
+	"""WGS84 coordinates, indexed in memory by geo.ServiceLocator for nearby lookups."""
+	latitude = db.Column(db.Float, nullable=True)
+	longitude = db.Column(db.Float, nullable=True)
+
+
 class Admin(db.Model, TimestampMixin):
 	__tablename__ = "admins"
 
@@ -28,7 +35,7 @@ class Admin(db.Model, TimestampMixin):
 	is_superadmin = db.Column(db.Boolean, default=False, nullable=False)
 
 
-class NGO(db.Model, TimestampMixin):
+class NGO(db.Model, TimestampMixin, GeoPointMixin):
 	__tablename__ = "ngos"
 
 	id = db.Column(db.Integer, primary_key=True)
@@ -44,7 +51,7 @@ class NGO(db.Model, TimestampMixin):
 	cases = db.relationship("AnimalCase", back_populates="ngo", lazy=True)
 
 
-class Volunteer(db.Model, TimestampMixin):
+class Volunteer(db.Model, TimestampMixin, GeoPointMixin):
 	__tablename__ = "volunteers"
 
 	id = db.Column(db.Integer, primary_key=True)
@@ -64,7 +71,7 @@ class Volunteer(db.Model, TimestampMixin):
 	)
 
 
-class Hospital(db.Model, TimestampMixin):
+class Hospital(db.Model, TimestampMixin, GeoPointMixin):
 	__tablename__ = "hospitals"
 
 	id = db.Column(db.Integer, primary_key=True)
@@ -92,8 +99,55 @@ class AnimalType(str, Enum):
 	OTHER = "Other"
 
 
+class Urgency(IntEnum):
+	"""Case urgency; lower values are more urgent so (urgency, created_at) sorts a triage queue."""
+	CRITICAL = 0
+	HIGH = 1
+	MEDIUM = 2
+	LOW = 3
+
+	@property
+	def label(self) -> str:
+		return self.name.title()
+
+	@classmethod
+	def parse(cls, value) -> "Urgency":
+		"""Accept an Urgency, its int value, or a case-insensitive name ("high", "Critical")."""
+		if isinstance(value, cls):
+			return value
+		if isinstance(value, int):
+			return cls(value)
+		text = str(value).strip()
+		if text.isdigit():
+			return cls(int(text))
+		try:
+			return cls[text.upper()]
+		except KeyError:
+			raise ValueError(f"invalid urgency: {value!r}") from None
+
+
+class UrgencyType(TypeDecorator):
+	"""Stores Urgency as a SMALLINT; accepts names or ints on the way in."""
+	impl = SmallInteger
+	cache_ok = True
+
+	def process_bind_param(self, value, dialect):
+		return None if value is None else int(Urgency.parse(value))
+
+	def process_result_value(self, value, dialect):
+		return None if value is None else Urgency(value)
+
+
 class AnimalCase(db.Model, TimestampMixin):
 	__tablename__ = "animal_cases"
+	__table_args__ = (
+		# Triage queue and escalation scans: WHERE status = ? ORDER BY urgency, created_at
+		db.Index("ix_animal_cases_queue", "status", "urgency", "created_at"),
+		# /api/cases/search on MySQL; SQLite gets an FTS5 table instead (see search.py)
+		db.Index(
+			"ft_animal_cases_text", "location", "notes", "reporter_name", mysql_prefix="FULLTEXT"
+		).ddl_if(dialect=("mysql", "mariadb")),
+	)
 
 	id = db.Column(db.Integer, primary_key=True)
 	case_code = db.Column(db.String(20), unique=True, nullable=False)
@@ -103,7 +157,7 @@ class AnimalCase(db.Model, TimestampMixin):
 	latitude = db.Column(db.Float, nullable=True)
 	longitude = db.Column(db.Float, nullable=True)
 	animal_type = db.Column(db.Enum(AnimalType), nullable=False, default=AnimalType.OTHER)
-	urgency = db.Column(db.String(20), nullable=False)  # Low/Medium/Critical
+	urgency = db.Column(UrgencyType(), nullable=False, default=Urgency.LOW)
 	media_url = db.Column(db.String(512), nullable=True)
 	notes = db.Column(db.Text, nullable=True)
 	status = db.Column(db.Enum(CaseStatus), nullable=False, default=CaseStatus.PENDING)
@@ -111,8 +165,11 @@ class AnimalCase(db.Model, TimestampMixin):
 	ngo_id = db.Column(db.Integer, db.ForeignKey("ngos.id"), nullable=True)
 	assigned_volunteer_id = db.Column(db.Integer, db.ForeignKey("volunteers.id"), nullable=True)
 	hospital_id = db.Column(db.Integer, db.ForeignKey("hospitals.id"), nullable=True)
+	# Set when this report was detected as a repeat of an earlier open case nearby
+	parent_case_id = db.Column(db.Integer, db.ForeignKey("animal_cases.id"), nullable=True, index=True)
 
 	ngo = db.relationship("NGO", back_populates="cases")
+	parent_case = db.relationship("AnimalCase", remote_side=[id], backref="duplicate_reports")
 	assigned_volunteer = db.relationship("Volunteer", back_populates="assigned_cases")
 	hospital = db.relationship("Hospital", back_populates="cases")
 
@@ -129,12 +186,13 @@ class Donation(db.Model, TimestampMixin):
 	payment_provider = db.Column(db.String(50), nullable=True)  # Razorpay/Stripe
 	payment_id = db.Column(db.String(255), nullable=True, unique=True)
 	receipt_url = db.Column(db.String(512), nullable=True)
+	receipt_digest = db.Column(db.String(64), nullable=True)  # template + fields receipt_url was rendered from
 	ngo_id = db.Column(db.Integer, db.ForeignKey("ngos.id"), nullable=True)
 
 	ngo = db.relationship("NGO")
 
 
-class PoliceStation(db.Model, TimestampMixin):
+class PoliceStation(db.Model, TimestampMixin, GeoPointMixin):
 	__tablename__ = "police_stations"
 
 	id = db.Column(db.Integer, primary_key=True)
@@ -148,7 +206,7 @@ class PoliceStation(db.Model, TimestampMixin):
 	officer_in_charge = db.Column(db.String(255), nullable=True)
 
 
-class BloodBank(db.Model, TimestampMixin):
+class BloodBank(db.Model, TimestampMixin, GeoPointMixin):
 	__tablename__ = "blood_banks"
 
 	id = db.Column(db.Integer, primary_key=True)
@@ -162,7 +220,7 @@ class BloodBank(db.Model, TimestampMixin):
 	license_number = db.Column(db.String(100), nullable=True)
 
 
-class FireStation(db.Model, TimestampMixin):
+class FireStation(db.Model, TimestampMixin, GeoPointMixin):
 	__tablename__ = "fire_stations"
 
 	id = db.Column(db.Integer, primary_key=True)
@@ -187,4 +245,176 @@ class EmergencyContact(db.Model, TimestampMixin):
 	location = db.Column(db.String(255), nullable=True)
 	is_24x7 = db.Column(db.Boolean, default=True, nullable=False)
 	description = db.Column(db.Text, nullable=True)
-	priority_level = db.Column(db.Integer, default=1, nullable=False)  # 1=High, 2=Medium, 3=Low
\ No newline at end of file
+	priority_level = db.Column(db.Integer, default=1, nullable=False)  # 1=High, 2=Medium, 3=Low
+
+
+class CaseCodeWorker(db.Model):
+	"""Lease on a case-code worker id, so no two live processes share one."""
+	__tablename__ = "case_code_workers"
+
+	worker_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+	owner = db.Column(db.String(64), nullable=False)
+	leased_until = db.Column(db.DateTime, nullable=False)
+
+
+class MediaBlob(db.Model):
+	"""A stored upload, addressed by the SHA-256 of its content; ref_count counts the cases/uploads using it."""
+	__tablename__ = "media_blobs"
+
+	sha256 = db.Column(db.String(64), primary_key=True)
+	size = db.Column(db.BigInteger, nullable=False)
+	content_type = db.Column(db.String(100), nullable=True)
+	ref_count = db.Column(db.Integer, nullable=False, default=1)
+	created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+	# Read from the file in the background by media_metadata.MetadataExtractor; metadata_at is NULL until then
+	width = db.Column(db.Integer, nullable=True)
+	height = db.Column(db.Integer, nullable=True)
+	duration_seconds = db.Column(db.Float, nullable=True)
+	captured_at = db.Column(db.DateTime, nullable=True)  # UTC when the file records its offset, else camera time
+	latitude = db.Column(db.Float, nullable=True)
+	longitude = db.Column(db.Float, nullable=True)
+	metadata_at = db.Column(db.DateTime, nullable=True, index=True)
+
+
+class MediaFile(db.Model):
+	"""Catalog entry for each stored file reference (one per media_blobs reference); /api/data/files pages through it."""
+	__tablename__ = "media_files"
+	__table_args__ = (
+		db.Index("ix_media_files_kind_id", "kind", "id"),
+		db.Index("ix_media_files_source_filename", "source", "filename"),  # old by-name URLs of sharded files
+	)
+
+	id = db.Column(db.Integer, primary_key=True)
+	sha256 = db.Column(db.String(64), nullable=False, index=True)
+	filename = db.Column(db.String(255), nullable=False)  # the client's (sanitised) name, for display
+	size = db.Column(db.BigInteger, nullable=False)
+	content_type = db.Column(db.String(100), nullable=True)
+	kind = db.Column(db.String(10), nullable=True)  # image / video / text
+	source = db.Column(db.String(20), nullable=False)  # upload, case, resumable, direct, legacy
+	case_id = db.Column(db.Integer, db.ForeignKey("animal_cases.id"), nullable=True, index=True)
+	created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+	case = db.relationship("AnimalCase")
+
+
+class ResumableUpload(db.Model):
+	"""An upload sent in pieces (tus-style); the bytes received so far are in <UPLOAD_FOLDER>/.partial/<id>."""
+	__tablename__ = "resumable_uploads"
+
+	id = db.Column(db.String(32), primary_key=True)
+	filename = db.Column(db.String(255), nullable=False)
+	length = db.Column(db.BigInteger, nullable=False)
+	received = db.Column(db.BigInteger, nullable=False, default=0)
+	sha256 = db.Column(db.String(64), nullable=False)  # declared by the client, checked on completion
+	case_id = db.Column(db.Integer, db.ForeignKey("animal_cases.id"), nullable=True)  # attach the file to this case
+	media_sha256 = db.Column(db.String(64), nullable=True)  # set once the file is stored
+	created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+	updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class ScheduledJob(db.Model):
+	"""Lease and schedule of a periodic job that must run once per interval across all workers."""
+	__tablename__ = "scheduled_jobs"
+
+	name = db.Column(db.String(50), primary_key=True)
+	owner = db.Column(db.String(64), nullable=True)  # worker holding the lease while the job runs
+	leased_until = db.Column(db.DateTime, nullable=True)
+	next_run_at = db.Column(db.DateTime, nullable=False)
+	last_run_at = db.Column(db.DateTime, nullable=True)
+
+
+class EscalationWatermark(db.Model):
+	"""(created_at, id) of the last PENDING case escalated at each urgency; sweeps resume after it."""
+	__tablename__ = "escalation_watermarks"
+
+	urgency = db.Column(UrgencyType(), primary_key=True, autoincrement=False)
+	case_created_at = db.Column(db.DateTime, nullable=False)
+	case_id = db.Column(db.Integer, nullable=False)
+
+
+class OutboxStatus(str, Enum):
+	PENDING = "PENDING"
+	SENT = "SENT"
+	FAILED = "FAILED"
+
+
+class NotificationOutbox(db.Model, TimestampMixin):
+	"""Outgoing email, written in the same transaction as the row that caused it."""
+	__tablename__ = "notification_outbox"
+	__table_args__ = (db.Index("ix_notification_outbox_due", "status", "next_attempt_at"),)
+
+	id = db.Column(db.Integer, primary_key=True)
+	kind = db.Column(db.String(50), nullable=False)  # case_confirmation, donation_receipt
+	recipient = db.Column(db.String(255), nullable=False)
+	subject = db.Column(db.String(255), nullable=False)
+	body = db.Column(db.Text, nullable=False)
+	status = db.Column(db.Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+	attempts = db.Column(db.Integer, nullable=False, default=0)
+	next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+	claim_token = db.Column(db.String(32), nullable=True, index=True)
+	last_error = db.Column(db.Text, nullable=True)
+	sent_at = db.Column(db.DateTime, nullable=True)
+
+
+class CaseStatusEvent(db.Model):
+	"""Append-only history of case status changes (from_status is NULL when the case is reported)."""
+	__tablename__ = "case_status_events"
+	__table_args__ = (db.Index("ix_case_status_events_case", "case_id", "id"),)
+
+	id = db.Column(db.Integer, primary_key=True)
+	case_id = db.Column(db.Integer, db.ForeignKey("animal_cases.id"), nullable=False)
+	from_status = db.Column(db.Enum(CaseStatus), nullable=True)
+	to_status = db.Column(db.Enum(CaseStatus), nullable=False)
+	actor = db.Column(db.String(64), nullable=True)  # JWT identity of whoever made the change
+	created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+	case = db.relationship("AnimalCase")
+
+
+class CaseDurationRollup(db.Model):
+	"""Histogram of time from report to a status, per metric and scope ("all", "ngo:<id>", "city:<name>")."""
+	__tablename__ = "case_duration_rollups"
+	__table_args__ = (db.UniqueConstraint("scope", "metric", "bucket", name="uq_case_duration_rollups"),)
+
+	id = db.Column(db.Integer, primary_key=True)
+	metric = db.Column(db.String(20), nullable=False)
+	scope = db.Column(db.String(120), nullable=False)
+	bucket = db.Column(db.SmallInteger, nullable=False)
+	count = db.Column(db.Integer, nullable=False, default=0)
+	total_seconds = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class CaseStatBucket(db.Model):
+	"""Count of reports (or of cases entering a status) per hour or day, by one dimension."""
+	__tablename__ = "case_stat_buckets"
+	__table_args__ = (
+		# Also serves chart reads: WHERE granularity = ? AND dimension = ? AND bucket_start BETWEEN ...
+		db.UniqueConstraint("granularity", "dimension", "bucket_start", "value", name="uq_case_stat_buckets"),
+	)
+
+	id = db.Column(db.Integer, primary_key=True)
+	granularity = db.Column(db.String(10), nullable=False)  # hour, day
+	bucket_start = db.Column(db.DateTime, nullable=False)  # UTC
+	dimension = db.Column(db.String(20), nullable=False)  # all, animal_type, urgency, city, status
+	value = db.Column(db.String(100), nullable=False, default="")
+	count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class IdempotencyKey(db.Model):
+	"""Stored outcome of a request sent with an Idempotency-Key header.
+
+	status_code is NULL while the first request is still being processed.
+	"""
+	__tablename__ = "idempotency_keys"
+	__table_args__ = (db.UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),)
+
+	id = db.Column(db.Integer, primary_key=True)
+	scope = db.Column(db.String(50), nullable=False)  # endpoint, e.g. cases.report
+	key = db.Column(db.String(255), nullable=False)
+	fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the request
+	status_code = db.Column(db.SmallInteger, nullable=True)
+	response_body = db.Column(db.Text, nullable=True)
+	locked_until = db.Column(db.DateTime, nullable=True)
+	created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+	expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -0,0 +1,171 @@
+"""Background delivery of queued notification emails (transactional outbox)."""
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import func, select, update
+
+from .extensions import db
+from .mailer import build_message, get_mail_pool, send_messages
+from .models import NotificationOutbox, OutboxStatus
+
+
+class OutboxDispatcher:
+	"""Claims due outbox rows in batches and delivers them over pooled SMTP connections.
+
+	Rows are claimed with a token so several workers can run dispatchers
+	against the same table without double-sending. Failed deliveries are
+	retried with exponential backoff until OUTBOX_MAX_ATTEMPTS is reached,
+	after which the row is marked FAILED.
+	"""
+
+	def __init__(self, app: Flask | None = None):
+		self.app = None
+		self._thread = None
+		self._stop = threading.Event()
+		self._lock = threading.Lock()
+		self.sent_total = 0
+		self.retried_total = 0
+		self.failed_total = 0
+		self.last_run_at = None
+		if app is not None:
+			self.init_app(app)
+
+	def init_app(self, app: Flask) -> None:
+		self.app = app
+		app.extensions["outbox_dispatcher"] = self
+		if app.config.get("BACKGROUND_WORKERS_ENABLED"):
+			self.start()
+
+	@property
+	def batch_size(self) -> int:
+		return int(self.app.config.get("OUTBOX_BATCH_SIZE", 50))
+
+	@property
+	def max_attempts(self) -> int:
+		return int(self.app.config.get("OUTBOX_MAX_ATTEMPTS", 8))
+
+	def start(self) -> None:
+		if self._thread and self._thread.is_alive():
+			return
+		self._stop.clear()
+		self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+		self._thread.start()
+
+	def stop(self, timeout: float = 5.0) -> None:
+		self._stop.set()
+		if self._thread:
+			self._thread.join(timeout)
+
+	def _run(self) -> None:
+		interval = float(self.app.config.get("OUTBOX_POLL_INTERVAL", 2.0))
+		while not self._stop.is_set():
+			try:
+				with self.app.app_context():
+					handled = self.dispatch_once()
+					get_mail_pool().prune()
+			except Exception:
+				self.app.logger.exception("Outbox dispatch failed")
+				handled = 0
+			if not handled:
+				self._stop.wait(interval)
+
+	def _claim(self, now: datetime) -> list[NotificationOutbox]:
+		due = db.session.execute(
+			select(NotificationOutbox.id)
+			.where(NotificationOutbox.status == OutboxStatus.PENDING, NotificationOutbox.next_attempt_at <= now)
+			.order_by(NotificationOutbox.next_attempt_at)
+			.limit(self.batch_size)
+		).scalars().all()
+		if not due:
+			return []
+
+		token = uuid.uuid4().hex
+		# Push next_attempt_at out while we hold the claim, so a crashed
+		# dispatcher's rows become due again instead of being stuck.
+		lease = timedelta(seconds=int(self.app.config.get("OUTBOX_CLAIM_TIMEOUT", 300)))
+		db.session.execute(
+			update(NotificationOutbox)
+			.where(
+				NotificationOutbox.id.in_(due),
+				NotificationOutbox.status == OutboxStatus.PENDING,
+				NotificationOutbox.next_attempt_at <= now,
+			)
+			.values(claim_token=token, next_attempt_at=now + lease, attempts=NotificationOutbox.attempts + 1)
+			.execution_options(synchronize_session=False)
+		)
+		db.session.commit()
+		return NotificationOutbox.query.filter_by(claim_token=token).order_by(NotificationOutbox.id).all()
+
+	def dispatch_once(self) -> int:
+		"""Deliver one batch of due notifications. Returns the number attempted."""
+		now = datetime.utcnow()
+		batch = self._claim(now)
+		self.last_run_at = now
+		if not batch:
+			return 0
+
+		try:
+			messages = [build_message(item) for item in batch]
+			errors = send_messages(messages)
+		except Exception as exc:
+			errors = [exc] * len(batch)
+		for item, error in zip(batch, errors):
+			if error is None:
+				self._mark_sent(item)
+			else:
+				self._mark_retry(item, error)
+
+		db.session.commit()
+		return len(batch)
+
+	def _mark_sent(self, item: NotificationOutbox) -> None:
+		item.status = OutboxStatus.SENT
+		item.sent_at = datetime.utcnow()
+		item.claim_token = None
+		item.last_error = None
+		with self._lock:
+			self.sent_total += 1
+
+	def _mark_retry(self, item: NotificationOutbox, exc: Exception) -> None:
+		item.claim_token = None
+		item.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+		if item.attempts >= self.max_attempts:
+			item.status = OutboxStatus.FAILED
+			with self._lock:
+				self.failed_total += 1
+			self.app.logger.error("Giving up on notification %s after %s attempts", item.id, item.attempts)
+			return
+		base = float(self.app.config.get("OUTBOX_BACKOFF_SECONDS", 30))
+		delay = min(base * 2 ** (item.attempts - 1), 3600) * random.uniform(1.0, 1.2)
+		item.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+		with self._lock:
+			self.retried_total += 1
+
+	def metrics(self) -> dict:
+		"""Queue depth from the database plus this process's delivery counters."""
+		pending = db.session.query(func.count(NotificationOutbox.id)).filter(
+			NotificationOutbox.status == OutboxStatus.PENDING
+		).scalar()
+		failed = db.session.query(func.count(NotificationOutbox.id)).filter(
+			NotificationOutbox.status == OutboxStatus.FAILED
+		).scalar()
+		oldest = db.session.query(func.min(NotificationOutbox.next_attempt_at)).filter(
+			NotificationOutbox.status == OutboxStatus.PENDING
+		).scalar()
+		lag = max((datetime.utcnow() - oldest).total_seconds(), 0.0) if oldest else 0.0
+		return {
+			"pending": pending,
+			"failed": failed,
+			"oldest_due_lag_seconds": round(lag, 3),
+			"sent_total": self.sent_total,
+			"retried_total": self.retried_total,
+			"failed_total": self.failed_total,
+			"dispatcher_running": bool(self._thread and self._thread.is_alive()),
+			"last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+		}
+
+
+outbox_dispatcher = OutboxDispatcher()
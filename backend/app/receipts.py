@@ -0,0 +1,297 @@
+"""Donation receipts: HTML documents rendered off the request path and stored as media.
+
+Recording a donation commits its row together with the receipt email,
+which links to receipt_link(): a signed, stable URL that redirects to the
+receipt once it exists. After the commit the receipt is rendered from
+RECEIPT_TEMPLATE (Jinja, autoescaped) in a ProcessPoolExecutor
+(RECEIPT_WORKERS processes; 0 renders inline), stored like any other file
+(media.store_file, so it lands in UPLOAD_FOLDER or S3 under its SHA-256)
+and linked in donations.receipt_url. If that render is lost (a crash, a
+storage error), opening the link renders it.
+
+donations.receipt_digest is the hash of the template and the donation's
+fields the receipt was rendered from, so a donation whose receipt is current
+is never rendered again. After the template changes,
+ReceiptRenderer.regenerate() (python render_receipts.py) re-renders the
+stale ones in parallel through the same pool, committing once per batch; a
+receipt that comes out with the same bytes keeps its stored file, and
+replaced ones lose their reference.
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from flask import Flask, current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import delete, tuple_
+from sqlalchemy.orm import joinedload
+
+from .extensions import db
+from .media import blob_hash, hash_file, incoming_dir, media_url, release_blobs, remove_blob_files, store_file
+from .models import Donation, MediaFile
+
+CONTENT_TYPE = "text/html"
+SOURCE = "receipt"
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(__file__), "templates", "receipt.html")
+LINK_SALT = "donation-receipt"
+
+
+def receipt_link(donation_id: int) -> str:
+	"""Stable URL of a donation's receipt for the email, signed so it cannot be made up for other donations."""
+	token = URLSafeSerializer(current_app.config["SECRET_KEY"], salt=LINK_SALT).dumps(donation_id)
+	return f"/api/donations/receipts/{token}"
+
+
+def donation_for_link(token: str) -> int | None:
+	try:
+		return URLSafeSerializer(current_app.config["SECRET_KEY"], salt=LINK_SALT).loads(token)
+	except BadSignature:
+		return None
+
+
+@functools.lru_cache(maxsize=4)
+def _compile(template: str):
+	from jinja2 import Environment
+
+	return Environment(autoescape=True).from_string(template)
+
+
+def render_receipt(template: str, fields: dict, destination: str) -> str:
+	"""Render ``template`` with ``fields`` into ``destination`` (runs in a worker process)."""
+	html = _compile(template).render(**fields)
+	tmp = f"{destination}.{os.getpid()}.tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		f.write(html)
+	os.replace(tmp, destination)
+	return destination
+
+
+def receipt_fields(donation: Donation) -> dict:
+	"""Everything the receipt shows; no render time, so the same donation always renders the same bytes."""
+	return {
+		"receipt_number": f"RQ-{donation.id:08d}",
+		"date": f"{donation.created_at:%Y-%m-%d}" if donation.created_at else "",
+		"donor_name": donation.donor_name,
+		"amount": f"{donation.amount:.2f}",
+		"currency": donation.currency,
+		"category": donation.category,
+		"payment_provider": donation.payment_provider,
+		"payment_id": donation.payment_id,
+		"ngo_name": donation.ngo.name if donation.ngo else None,
+	}
+
+
+def receipt_digest(template: str, fields: dict) -> str:
+	payload = json.dumps({"template": template, "fields": fields}, sort_keys=True, default=str)
+	return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _discard(path: str) -> None:
+	try:
+		os.unlink(path)
+	except FileNotFoundError:
+		pass
+
+
+class ReceiptRenderer:
+	def __init__(self, app: Flask | None = None):
+		self.app = None
+		self._pool: ProcessPoolExecutor | None = None
+		self._lock = threading.Lock()
+		self.rendered_total = 0
+		if app is not None:
+			self.init_app(app)
+
+	def init_app(self, app: Flask) -> None:
+		self.app = app
+		app.extensions["receipt_renderer"] = self
+
+	def template(self) -> str:
+		with open(self.app.config.get("RECEIPT_TEMPLATE") or DEFAULT_TEMPLATE, encoding="utf-8") as f:
+			return f.read()
+
+	def _executor(self) -> ProcessPoolExecutor | None:
+		workers = int(self.app.config.get("RECEIPT_WORKERS", 2))
+		if workers <= 0:
+			return None
+		with self._lock:
+			if self._pool is None:
+				self._pool = ProcessPoolExecutor(max_workers=workers)
+			return self._pool
+
+	def _prepare(self, donation: Donation, template: str) -> tuple[dict, str] | None:
+		"""Fields and digest of the donation's receipt, or None if the stored one is current."""
+		fields = receipt_fields(donation)
+		digest = receipt_digest(template, fields)
+		if donation.receipt_url and donation.receipt_digest == digest:
+			return None
+		return fields, digest
+
+	def _render(self, pool: ProcessPoolExecutor | None, template: str, fields: dict, destination: str) -> Future:
+		if pool is not None:
+			return pool.submit(render_receipt, template, fields, destination)
+		rendered: Future = Future()
+		try:
+			rendered.set_result(render_receipt(template, fields, destination))
+		except Exception as exc:
+			rendered.set_exception(exc)
+		return rendered
+
+	def submit(self, donation_id: int, inline: bool = False) -> Future | None:
+		"""Future for the donation's receipt_url once rendered and stored, or None if its receipt is current."""
+		donation = db.session.get(Donation, donation_id)
+		template = self.template()
+		prepared = self._prepare(donation, template) if donation is not None else None
+		if prepared is None:
+			return None
+		fields, digest = prepared
+		destination = self._destination(donation_id)
+		result: Future = Future()
+
+		def finish(rendered: Future) -> None:
+			try:
+				result.set_result(self._store(donation_id, digest, rendered.result()))
+			except Exception as exc:
+				db.session.rollback()
+				_discard(destination)
+				result.set_exception(exc)
+
+		pool = None if inline else self._executor()
+		if pool is None:
+			finish(self._render(None, template, fields, destination))
+			return result
+
+		def finish_in_context(rendered: Future) -> None:
+			# Runs on the pool's result thread, outside the request that submitted it
+			with self.app.app_context():
+				finish(rendered)
+
+		self._render(pool, template, fields, destination).add_done_callback(finish_in_context)
+		return result
+
+	def _destination(self, donation_id: int) -> str:
+		return os.path.join(incoming_dir(), f"receipt-{donation_id}-{uuid.uuid4().hex}.html")
+
+	def _link(self, donation_id: int, digest: str, path: str, replaced: list[tuple[int, str]]) -> None:
+		"""Point the donation at a rendered receipt in the current transaction.
+
+		The receipt it replaces, if any, is appended to ``replaced`` for _release().
+		"""
+		sha256, size, _ = hash_file(path)
+		donation = db.session.get(Donation, donation_id)
+		if donation is None or donation.receipt_digest == digest:
+			os.unlink(path)  # deleted meanwhile, or a concurrent render got there first
+			return
+
+		previous = blob_hash(donation.receipt_url)
+		donation.receipt_url = media_url(sha256)
+		donation.receipt_digest = digest
+		if previous == sha256:
+			os.unlink(path)  # the template change did not alter this receipt
+			return
+		if previous:
+			replaced.append((donation_id, previous))
+		store_file(path, sha256, size, CONTENT_TYPE, f"receipt-{donation_id}.html", SOURCE, commit=False)
+		self.rendered_total += 1
+
+	def _release(self, replaced: list[tuple[int, str]]) -> list[str]:
+		"""Drop the catalog entries and blob references of replaced receipts; returns blobs to remove after commit."""
+		if not replaced:
+			return []
+		db.session.execute(
+			delete(MediaFile)
+			.where(MediaFile.source == SOURCE, tuple_(MediaFile.filename, MediaFile.sha256).in_(
+				[(f"receipt-{donation_id}.html", sha256) for donation_id, sha256 in replaced]
+			))
+			.execution_options(synchronize_session=False)
+		)
+		return release_blobs(sha256 for _, sha256 in replaced)
+
+	def _store(self, donation_id: int, digest: str, path: str) -> str | None:
+		replaced: list[tuple[int, str]] = []
+		self._link(donation_id, digest, path, replaced)
+		unused = self._release(replaced)
+		db.session.commit()
+		remove_blob_files(unused)
+		return db.session.get(Donation, donation_id).receipt_url
+
+	def after_commit(self, donation_id: int) -> None:
+		"""Render a new donation's receipt: in the pool with background workers on, else inline (tests, scripts)."""
+		if not self.app.config.get("RECEIPTS_ENABLED", True):
+			return
+		background = bool(self.app.config.get("BACKGROUND_WORKERS_ENABLED"))
+		try:
+			future = self.submit(donation_id, inline=not background)
+			if future is not None and background:
+				future.add_done_callback(self._log_failure)
+			elif future is not None:
+				future.result()
+		except Exception:
+			self.app.logger.exception("Receipt for donation %s failed; it is rendered when its link is opened", donation_id)
+
+	def _log_failure(self, future: Future) -> None:
+		if future.exception() is not None:
+			self.app.logger.warning("Receipt render failed: %s", future.exception())
+
+	def regenerate(self, batch_size: int = 200) -> dict[str, int]:
+		"""Render every missing or stale receipt in the pool; returns counts.
+
+		Each batch of donations is read in one query and rendered across
+		RECEIPT_WORKERS processes, then linked in one transaction.
+		"""
+		template = self.template()
+		pool = self._executor()
+		counts = {"rendered": 0, "current": 0, "failed": 0}
+		last_id = 0
+		while True:
+			donations = (
+				Donation.query.options(joinedload(Donation.ngo))
+				.filter(Donation.id > last_id)
+				.order_by(Donation.id)
+				.limit(batch_size)
+				.all()
+			)
+			if not donations:
+				return counts
+			jobs = []
+			for donation in donations:
+				prepared = self._prepare(donation, template)
+				if prepared is None:
+					counts["current"] += 1
+					continue
+				fields, digest = prepared
+				destination = self._destination(donation.id)
+				jobs.append((donation.id, digest, destination, self._render(pool, template, fields, destination)))
+
+			replaced: list[tuple[int, str]] = []
+			for donation_id, digest, destination, rendered in jobs:
+				try:
+					with db.session.begin_nested():
+						self._link(donation_id, digest, rendered.result(), replaced)
+					counts["rendered"] += 1
+				except Exception as exc:
+					_discard(destination)
+					counts["failed"] += 1
+					self.app.logger.warning("Receipt for donation %s failed: %s", donation_id, exc)
+			unused = self._release(replaced)
+			db.session.commit()
+			remove_blob_files(unused)
+			last_id = donations[-1].id
+
+	def shutdown(self) -> None:
+		with self._lock:
+			pool, self._pool = self._pool, None
+		if pool is not None:
+			pool.shutdown(wait=True, cancel_futures=True)
+
+
+def init_receipt_renderer(app: Flask) -> ReceiptRenderer:
+	return ReceiptRenderer(app)
+
+
+def get_receipt_renderer() -> ReceiptRenderer:
+	return current_app.extensions["receipt_renderer"]
@@ -0,0 +1,171 @@
+"""Resumable uploads of case photos and videos (tus 1.0: core, creation and termination).
+
+Field reporters on 2G/3G lose a plain POST of a 50 MB video whenever the
+connection drops. Here the client creates an upload (POST with
+Upload-Length and Upload-Metadata: filename, sha256 and optionally
+case_code, base64-encoded as tus specifies) and PATCHes bytes at
+Upload-Offset into <UPLOAD_FOLDER>/.partial/<id>. Whatever arrived before a
+connection dropped is kept, so after a HEAD the client resumes where it
+stopped instead of starting again.
+
+When the last byte arrives the file is hashed once, checked against the
+declared SHA-256 and its extension, stored like any other upload
+(media.store_file) and attached to the case. Partial files are on local
+disk: with several nodes, send an upload's requests to the same one (or
+share UPLOAD_FOLDER). Uploads idle for RESUMABLE_EXPIRE_HOURS are purged.
+"""
+import base64
+import binascii
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import BinaryIO
+
+from flask import current_app
+from sqlalchemy import update
+from werkzeug.exceptions import ClientDisconnected
+
+from .extensions import db
+from .media import (
+	SHA256_HEX, UploadRejected, check_filename, content_kind, hash_file, media_url, sniff_content_type, store_file,
+	upload_limit,
+)
+from .models import AnimalCase, ResumableUpload
+
+TUS_VERSION = "1.0.0"
+PARTIAL_DIR = ".partial"
+KINDS = {"image", "video"}
+CHUNK_BYTES = 64 * 1024
+
+
+def parse_metadata(header: str | None) -> dict[str, str]:
+	"""Upload-Metadata ("key base64value,key base64value") as a dict."""
+	metadata = {}
+	for pair in (header or "").split(","):
+		key, _, value = pair.strip().partition(" ")
+		if not key:
+			continue
+		try:
+			metadata[key] = base64.b64decode(value, validate=True).decode("utf-8")
+		except (binascii.Error, UnicodeDecodeError):
+			raise UploadRejected(f"Invalid Upload-Metadata value for {key}")
+	return metadata
+
+
+def partial_path(upload_id: str) -> str:
+	return os.path.join(current_app.config["UPLOAD_FOLDER"], PARTIAL_DIR, upload_id)
+
+
+def create_upload(length: int, metadata: dict[str, str]) -> ResumableUpload:
+	"""Start an upload of ``length`` bytes; raises UploadRejected."""
+	filename, _ = check_filename(metadata.get("filename"), KINDS)
+	sha256 = (metadata.get("sha256") or "").lower()
+	if not SHA256_HEX.fullmatch(sha256):
+		raise UploadRejected("Upload-Metadata must include the file's hex sha256")
+	if length <= 0:
+		raise UploadRejected("Upload-Length must be positive")
+	if length > upload_limit():
+		raise UploadRejected(f"File is larger than {upload_limit()} bytes", 413)
+	case = None
+	if metadata.get("case_code"):
+		case = AnimalCase.query.filter_by(case_code=metadata["case_code"].strip().upper()).first()
+		if case is None:
+			raise UploadRejected("Unknown case_code", 404)
+		if case.media_url:
+			raise UploadRejected("Case already has media", 409)
+
+	purge_expired()
+	upload = ResumableUpload(
+		id=uuid.uuid4().hex, filename=filename, length=length, received=0, sha256=sha256,
+		case_id=case.id if case else None,
+	)
+	path = partial_path(upload.id)
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	open(path, "wb").close()
+	db.session.add(upload)
+	db.session.commit()
+	return upload
+
+
+def append(upload: ResumableUpload, offset: int, stream: BinaryIO) -> None:
+	"""Write the request body at ``offset``, keeping what arrived if the client disconnects; finishes the upload at its length."""
+	if offset != upload.received:
+		raise UploadRejected(f"Upload-Offset must be {upload.received}", 409)
+	path = partial_path(upload.id)
+	if not os.path.exists(path):
+		raise UploadRejected("Upload not found", 404)
+	remaining = upload.length - offset
+	written = 0
+	try:
+		with open(path, "r+b") as f:
+			f.seek(offset)
+			f.truncate()  # drop bytes written by an attempt whose offset was never recorded
+			while written < remaining:
+				chunk = stream.read(min(CHUNK_BYTES, remaining - written))
+				if not chunk:
+					break
+				f.write(chunk)
+				written += len(chunk)
+	except ClientDisconnected:
+		pass  # the connection dropped mid-chunk: keep what arrived so the client can resume from it
+	finally:
+		if written:
+			_advance(upload, offset, written)
+	if upload.received == upload.length:
+		finish(upload)
+
+
+def _advance(upload: ResumableUpload, offset: int, written: int) -> None:
+	moved = db.session.execute(
+		update(ResumableUpload)
+		.where(ResumableUpload.id == upload.id, ResumableUpload.received == offset)
+		.values(received=offset + written, updated_at=datetime.utcnow())
+		.execution_options(synchronize_session=False)
+	).rowcount
+	db.session.commit()
+	if moved != 1:
+		raise UploadRejected("Upload was written concurrently; HEAD it and resume", 409)
+	db.session.refresh(upload)
+
+
+def finish(upload: ResumableUpload) -> None:
+	"""Verify the complete file and store it; raises UploadRejected (460 on a checksum mismatch) and discards it."""
+	path = partial_path(upload.id)
+	sha256, _, head = hash_file(path)
+	if sha256 != upload.sha256:
+		discard(upload)
+		raise UploadRejected("Checksum mismatch", 460)
+	_, expected = check_filename(upload.filename, KINDS)
+	content_type = sniff_content_type(head)
+	if content_kind(content_type) != expected:
+		discard(upload)
+		raise UploadRejected("File content does not match its type")
+
+	upload.media_sha256 = upload.sha256
+	case_id = None
+	if upload.case_id is not None:
+		case = db.session.get(AnimalCase, upload.case_id)
+		if case is not None and not case.media_url:
+			case.media_url = media_url(upload.sha256)
+			case_id = case.id
+	# Commits the attachment together with the reference
+	store_file(path, upload.sha256, upload.length, content_type, upload.filename, "resumable", case_id)
+
+
+def discard(upload: ResumableUpload) -> None:
+	try:
+		os.unlink(partial_path(upload.id))
+	except FileNotFoundError:
+		pass
+	db.session.delete(upload)
+	db.session.commit()
+
+
+def purge_expired(now: datetime | None = None, limit: int = 100) -> int:
+	"""Remove uploads idle for RESUMABLE_EXPIRE_HOURS (finished ones only lose their status row)."""
+	now = now or datetime.utcnow()
+	cutoff = now - timedelta(hours=float(current_app.config.get("RESUMABLE_EXPIRE_HOURS", 24)))
+	stale = ResumableUpload.query.filter(ResumableUpload.updated_at < cutoff).limit(limit).all()
+	for upload in stale:
+		discard(upload)
+	return len(stale)
@@ -1,11 +1,16 @@
-from flask import Blueprint, request, Response
+from flask import Blueprint, request, Response, stream_with_context
 from ..extensions import db
+from ..data_integration import DataValidator
+from ..bulk import BulkError, run_bulk, target_chunks
+from ..media_zip import stream_bundle
 from ..models import (
     AnimalCase, NGO, Volunteer, Donation, Hospital, CaseStatus,
     PoliceStation, BloodBank, FireStation, EmergencyContact
 )
+from datetime import datetime
 import csv
 import io
+import json
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -26,7 +31,7 @@ def get_all_cases():
                 "reporter_phone": case.reporter_phone,
                 "location": case.location,
                 "animal_type": case.animal_type.value if case.animal_type else "Other",
-                "urgency": case.urgency,
+                "urgency": case.urgency.label if case.urgency is not None else None,
                 "status": case.status.value if case.status else "PENDING",
                 "notes": case.notes,
                 "media_url": case.media_url,
@@ -116,6 +121,8 @@ def get_all_hospitals():
                 "address": h.address,
                 "phone": h.phone,
                 "location": h.location,
+                "latitude": h.latitude,
+                "longitude": h.longitude,
                 "is_24x7": h.is_24x7,
                 "treatment_types": h.treatment_types,
                 "created_at": h.created_at.isoformat(),
@@ -146,6 +153,53 @@ def approve_volunteer(vid):
     return {"message": "Volunteer approved"}, 200
 
 
+@admin_bp.post("/bulk")
+def bulk_mutation():
+    """Approve, change status, reassign or delete many rows at once.
+
+    Body: {"op": "approve|status|reassign|delete", "entity": "ngo|volunteer|case",
+    "ids": [...] or "filter": {...}, plus "status" / "volunteer_id" / "approved"}.
+    """
+    payload = request.get_json(silent=True) or {}
+    try:
+        return run_bulk(payload), 200
+    except BulkError as e:
+        return {"error": str(e)}, 400
+
+
+@admin_bp.get("/cases/media.zip")
+def export_case_media():
+    """Stream the photos and videos of many cases as one uncompressed ZIP.
+
+    Query: ids=1,2,3 or filter=<JSON object, as for /bulk>, e.g.
+    filter={"status": "RESCUED", "ngo_id": 4}.
+    """
+    ids, filters = request.args.get("ids"), request.args.get("filter")
+    state = {"truncated": False}
+    try:
+        if ids is not None:
+            ids = [i for i in ids.split(",") if i.strip()]
+        if filters is not None:
+            try:
+                filters = json.loads(filters)
+            except ValueError:
+                raise BulkError("filter must be a JSON object") from None
+        chunks = target_chunks("case", ids, filters, state)
+    except BulkError as e:
+        return {"error": str(e)}, 400
+
+    filename = f"case-media-{datetime.utcnow():%Y%m%d-%H%M%S}.zip"
+    return Response(
+        stream_with_context(stream_bundle(chunks, state)),
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",  # let nginx pass pieces on as they are written
+        },
+    )
+
+
 # =========================
 #  CSV UPLOAD (FIXED)
 # =========================
@@ -201,10 +255,10 @@ def upload_csv(service_type):
 @admin_bp.get("/sample-csv/<service_type>")
 def download_sample_csv(service_type):
     headers = {
-        "hospitals": ["name", "address", "phone", "location", "is_24x7", "treatment_types"],
-        "blood-banks": ["name", "address", "phone", "location", "is_24x7", "blood_types_available", "contact_person", "license_number"],
-        "police-stations": ["name", "address", "phone", "location", "station_code", "is_24x7", "jurisdiction", "officer_in_charge"],
-        "fire-stations": ["name", "address", "phone", "location", "station_code", "is_24x7", "equipment_available", "chief_officer"],
+        "hospitals": ["name", "address", "phone", "location", "latitude", "longitude", "is_24x7", "treatment_types"],
+        "blood-banks": ["name", "address", "phone", "location", "latitude", "longitude", "is_24x7", "blood_types_available", "contact_person", "license_number"],
+        "police-stations": ["name", "address", "phone", "location", "latitude", "longitude", "station_code", "is_24x7", "jurisdiction", "officer_in_charge"],
+        "fire-stations": ["name", "address", "phone", "location", "latitude", "longitude", "station_code", "is_24x7", "equipment_available", "chief_officer"],
         "emergency-contacts": ["name", "phone", "email", "service_type", "location", "is_24x7", "description", "priority_level"]
     }
 
@@ -236,6 +290,8 @@ def _import_hospitals(rows):
                 address=row.get("address"),
                 phone=row.get("phone"),
                 location=row.get("location"),
+                latitude=DataValidator.parse_coordinate(row.get("latitude"), 90),
+                longitude=DataValidator.parse_coordinate(row.get("longitude"), 180),
                 is_24x7=row.get("is_24x7", "").lower() in ["true", "1", "yes"],
                 treatment_types=row.get("treatment_types")
             )
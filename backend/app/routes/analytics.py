@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+from flask import Blueprint, request
+
+from ..case_stats import DIMENSIONS, GRANULARITIES, bucket_start, series
+
+analytics_bp = Blueprint("analytics", __name__, url_prefix="/analytics")
+
+DEFAULT_SPAN = {"hour": timedelta(hours=24), "day": timedelta(days=30)}
+MAX_POINTS = 1500  # ~2 months of hours or ~4 years of days
+
+
+def _parse_time(name: str) -> datetime | None:
+	raw = request.args.get(name)
+	if not raw:
+		return None
+	at = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+	# Buckets are naive UTC, so an offset is converted rather than dropped
+	return at.astimezone(timezone.utc).replace(tzinfo=None) if at.tzinfo else at
+
+
+@analytics_bp.get("/cases")
+def case_trends():
+	"""Report counts per hour or day, optionally broken down by animal_type, urgency, city or status.
+
+	Reads pre-aggregated case_stat_buckets rows only, so the cost depends on
+	the range asked for and not on how many cases exist. Times are UTC.
+	"""
+	granularity = request.args.get("granularity", "hour")
+	dimension = request.args.get("dimension", "all")
+	if granularity not in GRANULARITIES:
+		return {"error": "granularity must be one of", "allowed": list(GRANULARITIES)}, 400
+	if dimension not in DIMENSIONS:
+		return {"error": "dimension must be one of", "allowed": list(DIMENSIONS)}, 400
+	try:
+		end = _parse_time("to") or bucket_start(datetime.utcnow(), granularity) + GRANULARITIES[granularity]
+		start = _parse_time("from") or end - DEFAULT_SPAN[granularity]
+	except ValueError:
+		return {"error": "from and to must be ISO 8601 timestamps"}, 400
+	if start >= end:
+		return {"error": "from must be before to"}, 400
+	if (end - start) / GRANULARITIES[granularity] > MAX_POINTS:
+		return {"error": f"range too large for {granularity} buckets (max {MAX_POINTS} points)"}, 400
+
+	values = [v.strip() for v in request.args.get("values", "").split(",") if v.strip()] or None
+	if values and dimension == "city":
+		values = [v.lower() for v in values]
+	return {
+		"granularity": granularity,
+		"dimension": dimension,
+		"from": start.isoformat(),
+		"to": end.isoformat(),
+		"series": series(granularity, dimension, start, end, values),
+	}
@@ -1,16 +1,27 @@
-from flask import Blueprint, request, current_app
-from flask_jwt_extended import jwt_required
-from werkzeug.utils import secure_filename
-import os
+from flask import Blueprint, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from collections import Counter
+from datetime import datetime
+import heapq
 from ..extensions import db
-from ..models import AnimalCase, CaseStatus, AnimalType
+from ..models import AnimalCase, CaseStatus, CaseStatusEvent, AnimalType, MediaFile, Urgency
 from ..utils import generate_case_code
-from ..mailer import send_case_confirmation
+from ..mailer import queue_case_confirmation
+from ..dispatch import OPEN_STATUSES, get_dispatch_engine
+from ..events import publish_case_event
+from ..dedupe import get_duplicate_detector
+from ..case_metrics import duration_summary, record_status_change
+from ..case_stats import add_counts, stat_keys
+from ..idempotency import idempotent
+from ..ingest import run_unit
+from ..media import UploadRejected, discard_upload, save_upload
+from ..search import SearchUnavailable, query_terms, search_cases
 
 cases_bp = Blueprint("cases", __name__, url_prefix="/cases")
 
 
 @cases_bp.post("")
+@idempotent("cases.report")
 def report_case():
 	# Public endpoint for citizens
 	if request.files:
@@ -22,27 +33,24 @@ def report_case():
 	reporter_email = (data.get("reporter_email") or "").strip()
 	location = (data.get("location") or "").strip()
 	animal_type = (data.get("animal_type") or "Other").title()
-	urgency = (data.get("urgency") or "Low").title()
 	notes = data.get("notes")
 
 	if not reporter_phone or not location:
 		return {"error": "reporter_phone and location are required"}, 400
 
+	try:
+		raw_urgency = data.get("urgency")
+		# 0 is Critical, so only a missing or empty value means the default
+		urgency = Urgency.LOW if raw_urgency is None or raw_urgency == "" else Urgency.parse(raw_urgency)
+	except ValueError:
+		return {"error": "invalid urgency", "allowed": [u.label for u in Urgency]}, 400
+
 	try:
 		animal_type_enum = AnimalType[animal_type.upper()] if animal_type else AnimalType.OTHER
 	except KeyError:
 		animal_type_enum = AnimalType.OTHER
 
-	media_url = None
-	if "file" in request.files and request.files["file"].filename:
-		upload_folder = current_app.config["UPLOAD_FOLDER"]
-		os.makedirs(upload_folder, exist_ok=True)
-		file = request.files["file"]
-		filename = secure_filename(file.filename)
-		file.save(os.path.join(upload_folder, filename))
-		media_url = f"/uploads/{filename}"
-
-	case = AnimalCase(
+	fields = dict(
 		case_code=generate_case_code(),
 		reporter_name=data.get("reporter_name"),
 		reporter_phone=reporter_phone,
@@ -52,20 +60,64 @@ def report_case():
 		animal_type=animal_type_enum,
 		urgency=urgency,
 		notes=notes,
-		media_url=media_url,
+		status=CaseStatus.PENDING,
+		created_at=datetime.utcnow(),
 	)
 
-	db.session.add(case)
-	db.session.commit()
+	media_url = None
+	media_file_id = None
+	if "file" in request.files and request.files["file"].filename:
+		try:
+			saved = save_upload(request.files["file"], kinds={"image", "video"}, source="case")
+		except UploadRejected as exc:
+			return {"error": exc.message}, exc.status
+		media_url, media_file_id = saved.url, saved.file_id
+	fields["media_url"] = media_url
+
+	def persist():
+		# Runs in this request's transaction, or batched with others by the group-commit
+		# writer (which may run it a second time on its own if the batch fails)
+		case = AnimalCase(**fields)
+		with db.session.no_autoflush:
+			# Repeat reports of an incident that is already open nearby are linked to it
+			detector = get_duplicate_detector()
+			if detector is not None:
+				case.parent_case_id = detector.find_parent(case)
+
+			db.session.add(case)
+			if media_file_id is not None:
+				db.session.get(MediaFile, media_file_id).case = case  # the upload's catalog entry now belongs to the case
+			# Confirmation email is queued in the same transaction and sent by the outbox dispatcher
+			queue_case_confirmation(reporter_email, case.case_code)
+
+			# Auto-assign the best nearby volunteer (needs coordinates); duplicates ride on the parent's assignment
+			engine = get_dispatch_engine()
+			if engine is not None and case.parent_case_id is None:
+				engine.dispatch(case)
+			record_status_change(case, None, case.status, at=case.created_at)
+
+		def committed():
+			if detector is not None:
+				detector.register(case)
+			publish_case_event("case.created", case)
+			return {
+				"message": "Case reported",
+				"case_id": case.id,
+				"case_code": case.case_code,
+				"media_url": media_url,
+				"assigned_volunteer_id": case.assigned_volunteer_id,
+				"duplicate_of": case.parent_case_id,
+			}
+
+		return committed
 
-	# Email confirmation (if configured and email provided)
 	try:
-		if reporter_email:
-			send_case_confirmation(reporter_email, case.case_code)
+		return run_unit(persist), 201
 	except Exception:
-		pass
-
-	return {"message": "Case reported", "case_id": case.id, "case_code": case.case_code, "media_url": media_url}, 201
+		# save_upload committed its reference on its own; the case failed, so give it back
+		if media_file_id is not None:
+			discard_upload(media_file_id)
+		raise
 
 
 @cases_bp.patch("/<int:case_id>/status")
@@ -77,6 +129,168 @@ def update_status(case_id: int):
 		return {"error": "invalid status"}, 400
 
 	case = AnimalCase.query.get_or_404(case_id)
+	old_status = case.status
+	if old_status is CaseStatus[new_status]:
+		return {"message": "Status updated"}, 200
+	was_open = old_status in OPEN_STATUSES
+	actor = get_jwt_identity()
 	case.status = CaseStatus[new_status]
+	record_status_change(case, old_status, case.status, actor=actor)
+
+	# Linked duplicate reports follow their parent
+	duplicates = (
+		AnimalCase.query.filter(AnimalCase.parent_case_id == case.id, AnimalCase.status != case.status)
+		.with_entities(AnimalCase.id, AnimalCase.status)
+		.all()
+	)
+	if duplicates:
+		AnimalCase.query.filter(AnimalCase.id.in_([d.id for d in duplicates])).update(
+			{AnimalCase.status: case.status}, synchronize_session=False
+		)
+		db.session.add_all(
+			CaseStatusEvent(case_id=d.id, from_status=d.status, to_status=case.status, actor=actor) for d in duplicates
+		)
+		add_counts(Counter({key: len(duplicates) for key in stat_keys(case, case.status, False, datetime.utcnow())}))
 	db.session.commit()
+	publish_case_event("case.status", case)
+
+	if was_open and case.status not in OPEN_STATUSES:
+		engine = get_dispatch_engine()
+		if engine is not None:
+			engine.release(case.assigned_volunteer_id)
+		detector = get_duplicate_detector()
+		if detector is not None:
+			detector.discard(case.id)
 	return {"message": "Status updated"}, 200
+
+
+@cases_bp.get("/<int:case_id>/timeline")
+def case_timeline(case_id: int):
+	case = AnimalCase.query.get_or_404(case_id)
+	events = (
+		CaseStatusEvent.query.filter(CaseStatusEvent.case_id == case.id)
+		.order_by(CaseStatusEvent.id)
+		.all()
+	)
+	return {
+		"case_id": case.id,
+		"case_code": case.case_code,
+		"status": case.status.value,
+		"events": [
+			{
+				"from_status": e.from_status.value if e.from_status else None,
+				"to_status": e.to_status.value,
+				"actor": e.actor,
+				"at": e.created_at.isoformat(),
+				"seconds_since_report": int((e.created_at - case.created_at).total_seconds()),
+			}
+			for e in events
+		],
+	}
+
+
+@cases_bp.get("/sla")
+def sla_summary():
+	"""Time from report to assignment, rescue and resolution (p50/p90), for all cases or one NGO or city."""
+	ngo_id = request.args.get("ngo_id", type=int)
+	city = (request.args.get("city") or "").strip().lower()[:100]
+	if ngo_id is not None:
+		scope = f"ngo:{ngo_id}"
+	elif city:
+		scope = f"city:{city}"
+	else:
+		scope = "all"
+	return {"scope": scope, "metrics": duration_summary(scope)}
+
+
+MAX_SEARCH_PER_PAGE = 100
+
+
+@cases_bp.get("/search")
+def search():
+	"""Ranked full-text search over location, notes and reporter name."""
+	terms = query_terms(request.args.get("q", ""))
+	if not terms:
+		return {"error": "q is required"}, 400
+	page = max(request.args.get("page", default=1, type=int) or 1, 1)
+	per_page = min(max(request.args.get("per_page", default=20, type=int) or 20, 1), MAX_SEARCH_PER_PAGE)
+	status = None
+	if request.args.get("status"):
+		try:
+			status = CaseStatus[request.args["status"].strip().upper()]
+		except KeyError:
+			return {"error": "invalid status"}, 400
+
+	try:
+		# One extra row tells us whether there is a next page without counting every match
+		results = search_cases(terms, status=status, limit=per_page + 1, offset=(page - 1) * per_page)
+	except SearchUnavailable as exc:
+		return {"error": str(exc)}, 501
+	return {
+		"page": page,
+		"per_page": per_page,
+		"has_more": len(results) > per_page,
+		"items": [
+			{
+				"id": c.id,
+				"case_code": c.case_code,
+				"score": round(score, 4),
+				"reporter_name": c.reporter_name,
+				"location": c.location,
+				"notes": c.notes,
+				"animal_type": c.animal_type.value if c.animal_type else "Other",
+				"urgency": c.urgency.label,
+				"status": c.status.value,
+				"created_at": c.created_at.isoformat(),
+			}
+			for c, score in results[:per_page]
+		],
+	}
+
+
+QUEUE_STATUSES = (CaseStatus.PENDING, CaseStatus.IN_PROGRESS)
+MAX_QUEUE_LIMIT = 200
+
+
+@cases_bp.get("/queue")
+def triage_queue():
+	"""Open cases, most urgent first, oldest first within an urgency level."""
+	limit = min(max(request.args.get("limit", default=50, type=int) or 50, 1), MAX_QUEUE_LIMIT)
+	requested = request.args.get("status")
+	try:
+		statuses = [CaseStatus[s.strip().upper()] for s in requested.split(",")] if requested else list(QUEUE_STATUSES)
+	except KeyError:
+		return {"error": "status must be PENDING and/or IN_PROGRESS"}, 400
+	if any(s not in QUEUE_STATUSES for s in statuses):
+		return {"error": "status must be PENDING and/or IN_PROGRESS"}, 400
+
+	# One LIMITed range scan of ix_animal_cases_queue per status, merged in memory,
+	# so the cost does not depend on how many cases have ever been reported.
+	per_status = [
+		AnimalCase.query.filter(AnimalCase.status == status, AnimalCase.parent_case_id.is_(None))
+		.order_by(AnimalCase.urgency, AnimalCase.created_at, AnimalCase.id)
+		.limit(limit)
+		.all()
+		for status in statuses
+	]
+	merged = heapq.merge(*per_status, key=lambda c: (c.urgency, c.created_at, c.id))
+	now = datetime.utcnow()
+	return {
+		"items": [
+			{
+				"id": c.id,
+				"case_code": c.case_code,
+				"urgency": c.urgency.label,
+				"urgency_rank": int(c.urgency),
+				"status": c.status.value,
+				"animal_type": c.animal_type.value if c.animal_type else "Other",
+				"location": c.location,
+				"latitude": c.latitude,
+				"longitude": c.longitude,
+				"assigned_volunteer_id": c.assigned_volunteer_id,
+				"created_at": c.created_at.isoformat(),
+				"age_seconds": int((now - c.created_at).total_seconds()),
+			}
+			for c in list(merged)[:limit]
+		]
+	}
@@ -5,14 +5,16 @@ Handles CSV uploads, data validation, and export functionality
 
 import os
 import json
+from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
 
 from flask_jwt_extended import jwt_required
 from werkzeug.utils import secure_filename
 
 from ..extensions import db
-from ..models import NGO, Volunteer, Hospital, PoliceStation, BloodBank, FireStation, EmergencyContact
+from ..models import NGO, Volunteer, Hospital, PoliceStation, BloodBank, FireStation, EmergencyContact, MediaBlob, MediaFile
 from ..data_integration import DatasetImporter, DataExporter, DataAnalyzer
+from ..media import media_url
 
 # -----------------------
 # Blueprint
@@ -21,6 +23,7 @@ data_bp = Blueprint('data', __name__, url_prefix='/data')
 
 # Allowed file extensions for uploads
 ALLOWED_EXTENSIONS = {'csv', 'json'}
+MAX_FILES_PER_PAGE = 200
 
 
 def allowed_file(filename):
@@ -307,26 +310,73 @@ def clear_data(service_type):
 # -----------------------
 # List Uploaded Files
 # -----------------------
-@data_bp.route('/files', methods=['GET'])
-def list_uploaded_files():
-    try:
-        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-        os.makedirs(upload_folder, exist_ok=True)
+def _blob_metadata(blob):
+    """Dimensions, duration, capture time and GPS read from the file (None until extracted)."""
+    if blob is None or blob.metadata_at is None:
+        return None
+    return {
+        'width': blob.width,
+        'height': blob.height,
+        'duration_seconds': blob.duration_seconds,
+        'captured_at': blob.captured_at.isoformat() if blob.captured_at else None,
+        'latitude': blob.latitude,
+        'longitude': blob.longitude,
+    }
 
-        files = []
-        for filename in os.listdir(upload_folder):
-            if filename.endswith('.csv'):
-                file_path = os.path.join(upload_folder, filename)
-                stat = os.stat(file_path)
 
-                files.append({
-                    'name': filename,
-                    'size': stat.st_size,
-                    'modified': stat.st_mtime,
-                    'path': file_path
-                })
+@data_bp.route('/files', methods=['GET'])
+def list_uploaded_files():
+    """Stored files, newest first, from the media_files catalog (no directory scan).
 
-        return jsonify({'files': files}), 200
+    Filters: kind (image/video/text), content_type, case_id, source, since/until
+    (ISO timestamps). Pages by keyset: pass the returned next_cursor as cursor.
+    """
+    try:
+        limit = min(max(request.args.get('limit', default=50, type=int) or 50, 1), MAX_FILES_PER_PAGE)
+        query = MediaFile.query
+        if request.args.get('kind'):
+            query = query.filter(MediaFile.kind == request.args['kind'])
+        if request.args.get('content_type'):
+            query = query.filter(MediaFile.content_type == request.args['content_type'])
+        if request.args.get('source'):
+            query = query.filter(MediaFile.source == request.args['source'])
+        case_id = request.args.get('case_id', type=int)
+        if case_id is not None:
+            query = query.filter(MediaFile.case_id == case_id)
+        try:
+            since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+            until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+        except ValueError:
+            return jsonify({'error': 'since and until must be ISO timestamps'}), 400
+        if since is not None:
+            query = query.filter(MediaFile.created_at >= since)
+        if until is not None:
+            query = query.filter(MediaFile.created_at < until)
+        cursor = request.args.get('cursor', type=int)
+        if cursor is not None:
+            query = query.filter(MediaFile.id < cursor)
+
+        rows = query.order_by(MediaFile.id.desc()).limit(limit + 1).all()
+        hashes = {f.sha256 for f in rows[:limit]}
+        blobs = {b.sha256: b for b in MediaBlob.query.filter(MediaBlob.sha256.in_(hashes))} if hashes else {}
+        files = [
+            {
+                'id': f.id,
+                'filename': f.filename,
+                'sha256': f.sha256,
+                'size': f.size,
+                'content_type': f.content_type,
+                'kind': f.kind,
+                'source': f.source,
+                'case_id': f.case_id,
+                'uploaded_at': f.created_at.isoformat(),
+                'url': media_url(f.sha256),
+                'metadata': _blob_metadata(blobs.get(f.sha256)),
+            }
+            for f in rows[:limit]
+        ]
+        next_cursor = rows[limit - 1].id if len(rows) > limit else None
+        return jsonify({'files': files, 'next_cursor': next_cursor}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
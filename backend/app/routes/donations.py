@@ -1,13 +1,17 @@
-from flask import Blueprint, request
+from flask import Blueprint, current_app, redirect, request
+from sqlalchemy.exc import IntegrityError
 from ..extensions import db
+from ..mailer import queue_donation_receipt
 from ..models import Donation
-from ..mailer import send_donation_receipt
+from ..receipts import donation_for_link, get_receipt_renderer, receipt_link
+from ..idempotency import idempotent
 
 
 donations_bp = Blueprint("donations", __name__, url_prefix="/donations")
 
 
 @donations_bp.post("")
+@idempotent("donations.create")
 def create_donation():
 	data = request.get_json(silent=True) or {}
 	amount = data.get("amount")
@@ -15,6 +19,12 @@ def create_donation():
 	if amount is None or not category:
 		return {"error": "amount and category required"}, 400
 
+	# A replayed payment redirect carries the same payment_id: return the donation already recorded
+	payment_id = data.get("payment_id") or None
+	existing = _existing_donation(payment_id)
+	if existing is not None:
+		return existing
+
 	donation = Donation(
 		donor_name=data.get("donor_name"),
 		donor_email=data.get("donor_email"),
@@ -22,16 +32,50 @@ def create_donation():
 		currency=(data.get("currency") or "INR").upper(),
 		category=category,
 		payment_provider=data.get("payment_provider"),
-		payment_id=data.get("payment_id"),
+		payment_id=payment_id,
 		ngo_id=data.get("ngo_id"),
 	)
-	db.session.add(donation)
-	db.session.commit()
-
 	try:
-		if donation.donor_email:
-			send_donation_receipt(donation.donor_email, str(donation.amount), donation.currency, donation.id)
-	except Exception:
-		pass
+		db.session.add(donation)
+		db.session.flush()
+		# Queued with the donation, linking to a URL that resolves once the receipt is rendered
+		queue_donation_receipt(donation.donor_email, str(donation.amount), donation.currency, donation.id, receipt_link(donation.id))
+		db.session.commit()
+	except IntegrityError:
+		# Lost a race with a concurrent replay of the same payment
+		db.session.rollback()
+		existing = _existing_donation(payment_id)
+		if existing is None:
+			raise
+		return existing
 
+	# Rendered once the donation is committed (in the receipt pool when background workers run)
+	get_receipt_renderer().after_commit(donation.id)
 	return {"message": "Donation recorded", "id": donation.id}, 201
+
+
+@donations_bp.get("/receipts/<token>")
+def donation_receipt(token):
+	"""The receipt linked from the donor's email: a redirect to the stored file, rendered now if it is missing."""
+	donation_id = donation_for_link(token)
+	donation = db.session.get(Donation, donation_id) if isinstance(donation_id, int) else None
+	if donation is None:
+		return {"error": "Receipt not found"}, 404
+	if donation.receipt_url is None and current_app.config.get("RECEIPTS_ENABLED", True):
+		try:
+			get_receipt_renderer().submit(donation.id, inline=True).result()
+		except Exception:
+			current_app.logger.exception("Receipt for donation %s failed", donation.id)
+		donation = db.session.get(Donation, donation.id)
+	if donation.receipt_url is None:
+		return {"error": "Receipt is not available yet"}, 503, {"Retry-After": "60"}
+	return redirect(donation.receipt_url)
+
+
+def _existing_donation(payment_id):
+	if not payment_id:
+		return None
+	donation = Donation.query.filter_by(payment_id=payment_id).first()
+	if donation is None:
+		return None
+	return {"message": "Donation already recorded", "id": donation.id}, 200
@@ -1,4 +1,4 @@
-from flask import Blueprint
+from flask import Blueprint, current_app
 
 health_bp = Blueprint("health", __name__)
 
@@ -6,3 +6,20 @@ health_bp = Blueprint("health", __name__)
 @health_bp.get("/health")
 def health():
 	return {"status": "ok"}, 200
+
+
+@health_bp.get("/health/outbox")
+def outbox_health():
+	dispatcher = current_app.extensions["outbox_dispatcher"]
+	return dispatcher.metrics(), 200
+
+
+@health_bp.get("/health/escalation")
+def escalation_health():
+	sweeper = current_app.extensions["escalation_sweeper"]
+	return sweeper.metrics(), 200
+
+
+@health_bp.get("/health/media-metadata")
+def media_metadata_health():
+	return current_app.extensions["metadata_extractor"].metrics(), 200
@@ -2,6 +2,7 @@ from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 from ..extensions import db
 from ..models import Hospital
+from ..geo import parse_coordinates
 
 hospitals_bp = Blueprint("hospitals", __name__, url_prefix="/hospitals")
 
@@ -17,6 +18,8 @@ def list_hospitals():
 				"address": h.address,
 				"phone": h.phone,
 				"location": h.location,
+				"latitude": h.latitude,
+				"longitude": h.longitude,
 				"is_24x7": h.is_24x7,
 				"treatment_types": h.treatment_types,
 			}
@@ -32,12 +35,18 @@ def add_hospital():
 	name = (data.get("name") or "").strip()
 	if not name:
 		return {"error": "name required"}, 400
+	try:
+		lat, lon = parse_coordinates(data.get("latitude"), data.get("longitude")) or (None, None)
+	except (TypeError, ValueError):
+		return {"error": "invalid latitude/longitude"}, 400
 
 	h = Hospital(
 		name=name,
 		address=data.get("address"),
 		phone=data.get("phone"),
 		location=data.get("location"),
+		latitude=lat,
+		longitude=lon,
 		is_24x7=bool(data.get("is_24x7", False)),
 		treatment_types=data.get("treatment_types"),
 	)
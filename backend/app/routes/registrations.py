@@ -2,6 +2,7 @@ from flask import Blueprint, request
 from ..extensions import db, limiter
 from ..models import NGO, Volunteer
 from ..utils import hash_password
+from ..geo import parse_coordinates
 
 registrations_bp = Blueprint("registrations", __name__, url_prefix="/register")
 
@@ -21,12 +22,19 @@ def register_ngo():
 	if NGO.query.filter_by(email=email).first():
 		return {"error": "email already registered"}, 409
 
+	try:
+		lat, lon = parse_coordinates(data.get("latitude"), data.get("longitude")) or (None, None)
+	except (TypeError, ValueError):
+		return {"error": "invalid latitude/longitude"}, 400
+
 	ngo = NGO(
 		name=name,
 		email=email,
 		password_hash=hash_password(password),
 		phone=phone,
 		location=data.get("location"),
+		latitude=lat,
+		longitude=lon,
 		operating_zones=data.get("operating_zones"),
 	)
 	db.session.add(ngo)
@@ -48,12 +56,19 @@ def register_volunteer():
 	if Volunteer.query.filter_by(email=email).first():
 		return {"error": "email already registered"}, 409
 
+	try:
+		lat, lon = parse_coordinates(data.get("latitude"), data.get("longitude")) or (None, None)
+	except (TypeError, ValueError):
+		return {"error": "invalid latitude/longitude"}, 400
+
 	vol = Volunteer(
 		name=name,
 		email=email,
 		password_hash=hash_password(password),
 		phone=phone,
 		location=data.get("location"),
+		latitude=lat,
+		longitude=lon,
 		expertise=data.get("expertise"),
 		availability=data.get("availability"),
 	)
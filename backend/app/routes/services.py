@@ -0,0 +1,46 @@
+from flask import Blueprint, request
+from ..geo import SERVICE_MODELS, get_service_locator, parse_coordinates
+
+services_bp = Blueprint("services", __name__, url_prefix="/services")
+
+# Volunteers are indexed for dispatch but never exposed publicly
+PUBLIC_SERVICE_TYPES = tuple(kind for kind in SERVICE_MODELS if kind != "volunteer")
+MAX_RESULTS = 100
+
+
+@services_bp.get("/nearby")
+def nearby_services():
+	try:
+		coords = parse_coordinates(request.args.get("lat"), request.args.get("lon"))
+	except ValueError:
+		coords = None
+	if coords is None:
+		return {"error": "lat and lon are required and must be valid coordinates"}, 400
+	lat, lon = coords
+
+	radius = request.args.get("radius", default=10.0, type=float)
+	limit = request.args.get("limit", default=10, type=int)
+	if radius is None or radius <= 0 or limit is None or limit <= 0:
+		return {"error": "radius and limit must be positive numbers"}, 400
+	limit = min(limit, MAX_RESULTS)
+
+	requested = request.args.get("type")
+	kinds = [k.strip().lower() for k in requested.split(",") if k.strip()] if requested else list(PUBLIC_SERVICE_TYPES)
+	unknown = [k for k in kinds if k not in PUBLIC_SERVICE_TYPES]
+	if unknown:
+		return {"error": f"unknown type: {', '.join(unknown)}", "types": list(PUBLIC_SERVICE_TYPES)}, 400
+
+	only_24x7 = (request.args.get("is_24x7") or "").lower() in {"1", "true", "yes"}
+
+	def visible(summary: dict) -> bool:
+		if summary["type"] == "ngo" and not summary.get("approved"):
+			return False
+		return not only_24x7 or bool(summary.get("is_24x7"))
+
+	results = get_service_locator().nearby(lat, lon, kinds, k=limit, radius_km=radius, predicate=visible)
+	return {
+		"items": [
+			{**summary, "distance_km": round(distance, 3)}
+			for distance, summary in results
+		]
+	}
@@ -0,0 +1,40 @@
+from flask import Blueprint, Response, current_app, request
+
+from ..events import TooManySubscribers, get_event_broadcaster
+
+stream_bp = Blueprint("stream", __name__, url_prefix="/stream")
+
+
+@stream_bp.get("/cases")
+def case_stream():
+	"""Server-Sent Events feed of ``case.created`` and ``case.status`` events.
+
+	Each connection holds a worker thread (or greenlet, under gevent workers)
+	for at most STREAM_MAX_SECONDS; the browser then reconnects and resumes
+	from ``Last-Event-ID``.
+	"""
+	broadcaster = get_event_broadcaster()
+	raw_last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+	try:
+		last_id = int(raw_last_id) if raw_last_id else None
+	except ValueError:
+		return {"error": "Last-Event-ID must be an integer"}, 400
+
+	try:
+		sub = broadcaster.subscribe()
+	except TooManySubscribers:
+		return {"error": "too many live connections, retry later"}, 503, {"Retry-After": "30"}
+
+	cfg = current_app.config
+	frames = broadcaster.stream(
+		sub,
+		last_id,
+		heartbeat=float(cfg.get("STREAM_HEARTBEAT_SECONDS", 15)),
+		max_seconds=float(cfg.get("STREAM_MAX_SECONDS", 300)),
+		retry_ms=int(cfg.get("STREAM_RETRY_MS", 3000)),
+	)
+	return Response(
+		frames,
+		mimetype="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
@@ -1,8 +1,17 @@
+import mimetypes
 import os
-import io
-from flask import Blueprint, current_app, request, send_from_directory
-from werkzeug.utils import secure_filename
+import re
+from flask import Blueprint, abort, current_app, redirect, request, send_file, send_from_directory, url_for
 from werkzeug.datastructures import FileStorage
+from werkzeug.security import safe_join
+from ..extensions import db
+from ..media import (
+    UploadRejected, blob_key, blob_path, finish_direct_upload, media_url, save_upload, start_direct_upload,
+)
+from ..models import MediaBlob, MediaFile, ResumableUpload
+from ..resumable import TUS_VERSION, append, create_upload, discard, parse_metadata
+from ..storage import get_storage
+from ..variants import FORMATS, get_variant_renderer
 
 # Allowed extensions and MIME types
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "mp4", "mov", "avi", "csv"}
@@ -18,13 +27,16 @@ ALLOWED_MIME_TYPES = {
     "application/octet-stream"  # browsers sometimes send this for CSVs
 }
 
+BLOB_HASH = re.compile(r"[0-9a-f]{64}")
+
+
 def allowed_file(filename: str) -> bool:
     """Check if file has an allowed extension."""
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-# Use /api/uploads so it matches your frontend routes
-uploads_bp = Blueprint("uploads", __name__, url_prefix="/api/uploads")
+# Mounted at /api/uploads so it matches your frontend routes
+uploads_bp = Blueprint("uploads", __name__, url_prefix="/uploads")
 
 
 @uploads_bp.post("")
@@ -45,41 +57,218 @@ def upload_file():
     if file.mimetype not in ALLOWED_MIME_TYPES:
         return {"error": f"Invalid MIME type: {file.mimetype}"}, 400
 
-    # ✅ SAFEST WAY: read once, save once, and manually check size
-    upload_folder = current_app.config.get("UPLOAD_FOLDER", os.path.join(os.getcwd(), "uploads"))
-    os.makedirs(upload_folder, exist_ok=True)
+    # Already streamed to disk, hashed and sniffed while the request was parsed
+    # (see media.MediaRequest); oversized files were cut off with 413 there.
+    try:
+        saved = save_upload(file)
+    except UploadRejected as e:
+        return {"error": e.message}, e.status
+
+    return _saved_response(saved), 201
+
+
+def _saved_response(saved):
+    return {
+        "filename": saved.filename,
+        "size": saved.size,
+        "sha256": saved.sha256,
+        "content_type": saved.content_type,
+        "deduplicated": saved.deduplicated,
+        "url": saved.url,
+        "message": "File uploaded successfully!"
+    }
 
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(upload_folder, filename)
 
-    # Save file directly instead of seeking or reading multiple times
+@uploads_bp.post("/direct")
+def start_direct():
+    """Presigned URL(s) for uploading a file straight to S3, declared as {filename, size, sha256}.
+
+    Small files get one PUT; large ones a multipart upload with one presigned
+    URL per part. The client then calls /direct/complete. Content that is
+    already stored gets {"method": "STORED"} and nothing to upload.
+    """
+    data = request.get_json(silent=True) or {}
     try:
-        file.save(file_path)
-    except Exception as e:
-        return {"error": f"Failed to save file: {str(e)}"}, 500
+        upload = start_direct_upload(data.get("filename"), int(data.get("size") or 0), data.get("sha256"))
+    except (TypeError, ValueError):
+        return {"error": "size must be an integer"}, 400
+    except UploadRejected as e:
+        return {"error": e.message}, e.status
+    return upload, 200
+
 
-    # Check size AFTER saving
+@uploads_bp.post("/direct/complete")
+def complete_direct():
+    """Register a direct upload: {filename, sha256}, plus upload_id, upload_key and the parts' etags for multipart."""
+    data = request.get_json(silent=True) or {}
+    etags = data.get("etags") or []
+    if not isinstance(etags, list):
+        return {"error": "etags must be a list"}, 400
     try:
-        size = os.path.getsize(file_path)
-    except OSError:
-        size = 0
+        saved = finish_direct_upload(
+            data.get("filename"), data.get("sha256"), data.get("upload_id"), etags, upload_key=data.get("upload_key"),
+        )
+    except UploadRejected as e:
+        return {"error": e.message}, e.status
+    return _saved_response(saved), 201
 
-    # Enforce max content length if set
-    max_len = int(current_app.config.get("MAX_CONTENT_LENGTH", 16 * 1024 * 1024))
-    if size > max_len:
-        os.remove(file_path)
-        return {"error": "File too large"}, 413
 
-    return {
-        "filename": filename,
-        "size": size,
-        "url": f"/api/uploads/{filename}",
-        "message": "File uploaded successfully!"
-    }, 201
+TUS_HEADERS = {"Tus-Resumable": TUS_VERSION, "Cache-Control": "no-store"}
+
+
+def _tus_error(e: UploadRejected):
+    return {"error": e.message}, e.status, TUS_HEADERS
+
+
+def _upload_state(upload: ResumableUpload, status: int = 204):
+    headers = {**TUS_HEADERS, "Upload-Offset": str(upload.received), "Upload-Length": str(upload.length)}
+    if upload.media_sha256:
+        headers["Upload-Media-Url"] = media_url(upload.media_sha256)
+    return "", status, headers
+
+
+@uploads_bp.post("/resumable")
+def create_resumable():
+    """Start a resumable upload: Upload-Length plus Upload-Metadata (filename, sha256, optional case_code)."""
+    length = request.headers.get("Upload-Length", type=int)
+    if length is None:
+        return _tus_error(UploadRejected("Upload-Length is required"))
+    try:
+        upload = create_upload(length, parse_metadata(request.headers.get("Upload-Metadata")))
+    except UploadRejected as e:
+        return _tus_error(e)
+    body, status, headers = _upload_state(upload, 201)
+    headers["Location"] = url_for("uploads.resumable_status", upload_id=upload.id)
+    return body, status, headers
+
+
+@uploads_bp.route("/resumable/<upload_id>", methods=["HEAD"])
+def resumable_status(upload_id: str):
+    """How many bytes have arrived, so the client knows where to resume."""
+    upload = db.session.get(ResumableUpload, upload_id)
+    if upload is None:
+        return "", 404, TUS_HEADERS
+    return _upload_state(upload, 200)
+
+
+@uploads_bp.patch("/resumable/<upload_id>")
+def patch_resumable(upload_id: str):
+    """Append the body at Upload-Offset; the last chunk stores the file and attaches it to its case."""
+    upload = db.session.get(ResumableUpload, upload_id)
+    if upload is None:
+        return _tus_error(UploadRejected("Upload not found", 404))
+    if request.mimetype != "application/offset+octet-stream":
+        return _tus_error(UploadRejected("Content-Type must be application/offset+octet-stream", 415))
+    offset = request.headers.get("Upload-Offset", type=int)
+    if offset is None:
+        return _tus_error(UploadRejected("Upload-Offset is required"))
+    try:
+        append(upload, offset, request.stream)
+    except UploadRejected as e:
+        return _tus_error(e)
+    return _upload_state(upload)
+
+
+@uploads_bp.delete("/resumable/<upload_id>")
+def delete_resumable(upload_id: str):
+    """Abandon an upload and free its partial file."""
+    upload = db.session.get(ResumableUpload, upload_id)
+    if upload is None:
+        return _tus_error(UploadRejected("Upload not found", 404))
+    discard(upload)
+    return "", 204, TUS_HEADERS
 
 
 @uploads_bp.get("/<path:filename>")
 def serve_file(filename: str):
-    """Serve uploaded files from disk."""
+    """Serve uploaded files from disk: content-addressed blobs by hash, older uploads by name."""
+    if BLOB_HASH.fullmatch(filename):
+        blob = db.session.get(MediaBlob, filename)
+        if blob is None:
+            abort(404)
+        width = request.args.get("w", type=int)
+        if width and (blob.content_type or "").startswith("image/"):
+            return _serve_variant(blob, width)
+        storage = get_storage()
+        if storage.remote:
+            # The bucket serves the bytes (and Range requests) from a short-lived presigned URL
+            return redirect(storage.url(blob_key(filename), blob.content_type))
+        if not os.path.exists(blob_path(filename)):
+            abort(404)
+        response = _send(blob_path(filename), blob.content_type or "application/octet-stream", etag=filename)
+        if blob.content_type == "text/html":
+            # Generated documents (donation receipts): no scripts, nothing loaded from elsewhere
+            response.headers["Content-Security-Policy"] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+        return response
     upload_folder = current_app.config.get("UPLOAD_FOLDER", os.path.join(os.getcwd(), "uploads"))
+    path = safe_join(upload_folder, filename)
+    if path is None or not os.path.isfile(path):
+        # Moved into the content-addressed store by shard_uploads.py
+        moved = MediaFile.query.filter_by(source="legacy", filename=filename).first()
+        if moved is not None:
+            return redirect(media_url(moved.sha256), 301)
+        abort(404)
+    if _offload_mode():
+        return _send(path, mimetypes.guess_type(filename)[0] or "application/octet-stream")
     return send_from_directory(upload_folder, filename, as_attachment=False)
+
+
+def _serve_variant(blob: MediaBlob, width: int):
+    """Resized copy of an image (?w=320), WebP when asked for (?format=webp) or accepted by the browser."""
+    requested = request.args.get("format")
+    webp_ok = current_app.config.get("IMAGE_WEBP", True)
+    fmt = "webp" if webp_ok and (requested == "webp" or (not requested and request.accept_mimetypes["image/webp"])) else "jpeg"
+    try:
+        path = get_variant_renderer().get(blob_path(blob.sha256), blob.sha256, width, fmt)
+    except Exception:
+        current_app.logger.exception("Could not render variant of %s", blob.sha256)
+        abort(415)
+    response = _send(path, FORMATS[fmt][1], etag=os.path.basename(path))
+    if not requested:
+        response.vary.add("Accept")
+    return response
+
+
+def _offload_mode() -> str:
+    return (current_app.config.get("MEDIA_SENDFILE") or "").strip().lower()
+
+
+def _send(path: str, mimetype: str, etag: str | None = None):
+    """Send a stored file with Range support and conditional GETs.
+
+    Content-addressed files (``etag`` given: a hash, or a hash plus variant
+    width) never change, so they get that strong ETag and a year-long
+    ``immutable`` Cache-Control; legacy files are revalidated every time.
+    With MEDIA_SENDFILE set, the body is left to the reverse proxy (nginx
+    X-Accel-Redirect or Apache/lighttpd X-Sendfile), which also serves the
+    byte ranges, so the worker only answers with headers.
+    """
+    max_age = current_app.config.get("MEDIA_CACHE_MAX_AGE", 31536000) if etag else None
+    mode = _offload_mode()
+    if mode not in ("x-accel", "x-sendfile"):
+        response = send_file(path, mimetype=mimetype, etag=etag or True, max_age=max_age, conditional=True)
+    else:
+        response = current_app.response_class(mimetype=mimetype)
+        if mode == "x-accel":
+            upload_folder = current_app.config["UPLOAD_FOLDER"]
+            relative = os.path.relpath(path, upload_folder).replace(os.sep, "/")
+            prefix = current_app.config.get("MEDIA_ACCEL_PREFIX", "/_uploads/")
+            response.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + relative
+        else:
+            response.headers["X-Sendfile"] = path
+        if etag is None:
+            stat = os.stat(path)
+            response.set_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+            response.last_modified = stat.st_mtime
+            response.cache_control.no_cache = True
+        else:
+            response.set_etag(etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+        response = response.make_conditional(request)  # 304 here; the proxy answers Range itself
+        if response.status_code == 304:
+            response.headers.pop("X-Accel-Redirect", None)
+            response.headers.pop("X-Sendfile", None)
+    if etag:
+        response.cache_control.immutable = True
+    return response
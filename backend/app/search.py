@@ -0,0 +1,98 @@
+"""Full-text search over case location, notes and reporter name.
+
+MySQL uses the FULLTEXT index ft_animal_cases_text declared on AnimalCase,
+which InnoDB keeps current on every write. SQLite (local/dev and tests) has
+no FULLTEXT indexes, so an FTS5 table over animal_cases is kept in sync by
+triggers; being triggers, they also cover bulk UPDATEs that bypass the ORM.
+Both rank matches in the database and return one page, so a query never
+scans the cases table with LIKE '%...%'.
+"""
+import re
+
+from sqlalchemy import DDL, event, text
+
+from .extensions import db
+from .models import AnimalCase, CaseStatus
+
+SEARCH_COLUMNS = ("location", "notes", "reporter_name")
+MAX_TERMS = 8
+
+_FTS_DDL = (
+	"CREATE VIRTUAL TABLE IF NOT EXISTS animal_cases_fts USING fts5("
+	"location, notes, reporter_name, content='animal_cases', content_rowid='id', "
+	"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+	"CREATE TRIGGER IF NOT EXISTS animal_cases_fts_ai AFTER INSERT ON animal_cases BEGIN "
+	"INSERT INTO animal_cases_fts(rowid, location, notes, reporter_name) "
+	"VALUES (new.id, new.location, new.notes, new.reporter_name); END",
+	"CREATE TRIGGER IF NOT EXISTS animal_cases_fts_ad AFTER DELETE ON animal_cases BEGIN "
+	"INSERT INTO animal_cases_fts(animal_cases_fts, rowid, location, notes, reporter_name) "
+	"VALUES ('delete', old.id, old.location, old.notes, old.reporter_name); END",
+	# Only edits to the indexed columns touch the index; status changes do not
+	"CREATE TRIGGER IF NOT EXISTS animal_cases_fts_au AFTER UPDATE OF location, notes, reporter_name "
+	"ON animal_cases BEGIN "
+	"INSERT INTO animal_cases_fts(animal_cases_fts, rowid, location, notes, reporter_name) "
+	"VALUES ('delete', old.id, old.location, old.notes, old.reporter_name); "
+	"INSERT INTO animal_cases_fts(rowid, location, notes, reporter_name) "
+	"VALUES (new.id, new.location, new.notes, new.reporter_name); END",
+)
+
+for _statement in _FTS_DDL:
+	event.listen(AnimalCase.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+	AnimalCase.__table__, "after_drop", DDL("DROP TABLE IF EXISTS animal_cases_fts").execute_if(dialect="sqlite")
+)
+
+
+class SearchUnavailable(Exception):
+	pass
+
+
+def query_terms(q: str) -> list[str]:
+	"""Word tokens of the user's query; operators and quotes are dropped so input cannot alter the match syntax."""
+	return re.findall(r"\w+", (q or "").lower())[:MAX_TERMS]
+
+
+def _fts5_query(terms: list[str]) -> str:
+	# Every term must match; the last one as a prefix so partially typed words still hit
+	return " ".join(f'"{t}"' for t in terms[:-1]) + f' "{terms[-1]}"*'
+
+
+def _boolean_mode_query(terms: list[str]) -> str:
+	return " ".join(f"+{t}" for t in terms[:-1]) + f" +{terms[-1]}*"
+
+
+def search_cases(
+	terms: list[str], status: CaseStatus | None = None, limit: int = 20, offset: int = 0
+) -> list[tuple[AnimalCase, float]]:
+	"""Cases matching all ``terms``, best match first, as (case, score) pairs; higher scores rank higher."""
+	dialect = db.engine.dialect.name
+	params = {"limit": limit, "offset": offset}
+	status_clause = ""
+	if status is not None:
+		status_clause = "AND animal_cases.status = :status"
+		params["status"] = status.name
+
+	if dialect == "sqlite":
+		params["q"] = _fts5_query(terms)
+		sql = (
+			"SELECT animal_cases.id AS id, -bm25(animal_cases_fts) AS score "
+			"FROM animal_cases_fts JOIN animal_cases ON animal_cases.id = animal_cases_fts.rowid "
+			f"WHERE animal_cases_fts MATCH :q {status_clause} "
+			"ORDER BY bm25(animal_cases_fts), animal_cases.id DESC LIMIT :limit OFFSET :offset"
+		)
+	elif dialect in ("mysql", "mariadb"):
+		params["q"] = _boolean_mode_query(terms)
+		match = f"MATCH ({', '.join(SEARCH_COLUMNS)}) AGAINST (:q IN BOOLEAN MODE)"
+		sql = (
+			f"SELECT id, {match} AS score FROM animal_cases "
+			f"WHERE {match} {status_clause} "
+			"ORDER BY score DESC, id DESC LIMIT :limit OFFSET :offset"
+		)
+	else:
+		raise SearchUnavailable(f"full-text search is not supported on {dialect}")
+
+	ranked = db.session.execute(text(sql), params).all()
+	if not ranked:
+		return []
+	cases = {c.id: c for c in AnimalCase.query.filter(AnimalCase.id.in_([r.id for r in ranked]))}
+	return [(cases[r.id], float(r.score)) for r in ranked if r.id in cases]
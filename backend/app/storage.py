@@ -0,0 +1,261 @@
+"""Where uploaded media is kept: the local UPLOAD_FOLDER or an S3 bucket.
+
+Keys are relative, "/"-separated paths such as "ab/cd/<sha256>" (see
+media.blob_key). With STORAGE_BACKEND=s3 the files live in AWS_S3_BUCKET
+under S3_PREFIX, so every worker and node sees the same media:
+
+- files that came in through Flask are sent with boto3's managed transfer,
+  which switches to a parallel multipart upload (S3_MULTIPART_CHUNK_BYTES
+  parts) above S3_MULTIPART_THRESHOLD;
+- clients can upload straight to the bucket with presigned URLs, a single
+  PUT whose SHA-256 S3 checks, or presigned parts of a multipart upload for
+  large videos, staged under incoming/ until its hash has been checked
+  (see routes/uploads.py, /api/uploads/direct);
+- downloads are redirected to presigned GET URLs.
+
+Image variants need the original on local disk, so S3Storage keeps a copy of
+what it uploads or fetches under UPLOAD_FOLDER/.cache.
+"""
+import base64
+import math
+import os
+import tempfile
+from typing import BinaryIO
+
+from flask import Flask, current_app
+
+CACHE_DIR = ".cache"
+
+
+class StorageError(Exception):
+	pass
+
+
+class LocalStorage:
+	remote = False
+
+	def __init__(self, root: str):
+		self.root = root
+
+	def path(self, key: str) -> str:
+		return os.path.join(self.root, *key.split("/"))
+
+	def exists(self, key: str) -> bool:
+		return os.path.exists(self.path(key))
+
+	def put_file(self, key: str, source: str, content_type: str | None = None) -> None:
+		"""Move the finished local file ``source`` to ``key`` (a rename on the same filesystem)."""
+		destination = self.path(key)
+		os.makedirs(os.path.dirname(destination), exist_ok=True)
+		os.replace(source, destination)
+
+	def local_path(self, key: str) -> str:
+		return self.path(key)
+
+	def open(self, key: str) -> BinaryIO:
+		return open(self.path(key), "rb")
+
+	def delete(self, key: str) -> None:
+		try:
+			os.unlink(self.path(key))
+		except FileNotFoundError:
+			pass
+
+
+class S3Storage:
+	remote = True
+
+	def __init__(
+		self,
+		client,
+		bucket: str,
+		cache_root: str,
+		prefix: str = "",
+		multipart_threshold: int = 16 * 1024 * 1024,
+		multipart_chunk: int = 8 * 1024 * 1024,
+		expires: int = 900,
+	):
+		self.client = client
+		self.bucket = bucket
+		self.cache = LocalStorage(os.path.join(cache_root, CACHE_DIR))
+		self.prefix = prefix
+		self.multipart_threshold = multipart_threshold
+		self.multipart_chunk = multipart_chunk
+		self.expires = expires
+
+	def object_key(self, key: str) -> str:
+		return self.prefix + key
+
+	def head(self, key: str) -> dict | None:
+		from botocore.exceptions import ClientError
+
+		try:
+			return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+		except ClientError as exc:
+			if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+				return None
+			raise
+
+	def exists(self, key: str) -> bool:
+		return self.head(key) is not None
+
+	def put_file(self, key: str, source: str, content_type: str | None = None) -> None:
+		"""Upload ``source`` (multipart above the threshold), then keep it as the local cached copy."""
+		from boto3.s3.transfer import TransferConfig
+
+		config = TransferConfig(multipart_threshold=self.multipart_threshold, multipart_chunksize=self.multipart_chunk)
+		extra = {"ContentType": content_type} if content_type else {}
+		try:
+			self.client.upload_file(source, self.bucket, self.object_key(key), ExtraArgs=extra, Config=config)
+		except Exception:
+			os.unlink(source)
+			raise
+		self.cache.put_file(key, source)
+
+	def local_path(self, key: str) -> str:
+		"""Path of a local copy of ``key``, downloading it on first use."""
+		path = self.cache.path(key)
+		if not os.path.exists(path):
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+			fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix="dl-")
+			os.close(fd)
+			try:
+				self.client.download_file(self.bucket, self.object_key(key), tmp)
+				os.replace(tmp, path)
+			finally:
+				if os.path.exists(tmp):
+					os.unlink(tmp)
+		return path
+
+	def open(self, key: str) -> BinaryIO:
+		"""A streaming read of the object (raises FileNotFoundError if it is missing); nothing is cached."""
+		from botocore.exceptions import ClientError
+
+		try:
+			return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"]
+		except ClientError as exc:
+			if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+				raise FileNotFoundError(key) from exc
+			raise
+
+	def read_head(self, key: str, n: int) -> bytes:
+		"""First ``n`` bytes of an object (a ranged GET, for sniffing direct uploads)."""
+		body = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key), Range=f"bytes=0-{n - 1}")["Body"]
+		return body.read()
+
+	def copy(self, source: str, key: str, content_type: str | None = None) -> None:
+		"""Server-side copy of ``source`` to ``key``; multipart above the threshold, so it works past 5 GB."""
+		from boto3.s3.transfer import TransferConfig
+
+		config = TransferConfig(multipart_threshold=self.multipart_threshold, multipart_chunksize=self.multipart_chunk)
+		extra = {"ContentType": content_type, "MetadataDirective": "REPLACE"} if content_type else {}
+		self.client.copy(
+			{"Bucket": self.bucket, "Key": self.object_key(source)}, self.bucket, self.object_key(key),
+			ExtraArgs=extra, Config=config,
+		)
+
+	def delete(self, key: str) -> None:
+		self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+		self.cache.delete(key)
+
+	def url(self, key: str, content_type: str | None = None) -> str:
+		"""Presigned GET URL, for redirecting downloads to the bucket."""
+		params = {"Bucket": self.bucket, "Key": self.object_key(key)}
+		if content_type:
+			params["ResponseContentType"] = content_type
+		return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.expires)
+
+	def presign_put(self, key: str, size: int, content_type: str, sha256: str) -> dict:
+		"""A presigned single PUT; S3 rejects the body unless its length and SHA-256 match."""
+		checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+		params = {
+			"Bucket": self.bucket,
+			"Key": self.object_key(key),
+			"ContentType": content_type,
+			"ContentLength": size,
+			"ChecksumSHA256": checksum,
+		}
+		return {
+			"method": "PUT",
+			"url": self.client.generate_presigned_url("put_object", Params=params, ExpiresIn=self.expires),
+			"headers": {"Content-Type": content_type, "x-amz-checksum-sha256": checksum},
+		}
+
+	def start_multipart(self, key: str, size: int, content_type: str) -> dict:
+		"""Create a multipart upload and presign a PUT for each S3_MULTIPART_CHUNK_BYTES part.
+
+		S3 only checksums each part, so ``key`` should be a staging key that is
+		hashed and copied into place once complete (media.finish_direct_upload).
+		"""
+		upload_id = self.client.create_multipart_upload(
+			Bucket=self.bucket, Key=self.object_key(key), ContentType=content_type
+		)["UploadId"]
+		parts = [
+			{
+				"part_number": number,
+				"url": self.client.generate_presigned_url(
+					"upload_part",
+					Params={"Bucket": self.bucket, "Key": self.object_key(key), "UploadId": upload_id, "PartNumber": number},
+					ExpiresIn=self.expires,
+				),
+			}
+			for number in range(1, math.ceil(size / self.multipart_chunk) + 1)
+		]
+		return {"method": "MULTIPART", "upload_id": upload_id, "part_size": self.multipart_chunk, "parts": parts}
+
+	def complete_multipart(self, key: str, upload_id: str, etags: list[str]) -> None:
+		"""Join the uploaded parts; ``etags`` are the ETag headers of the part PUTs, in order."""
+		from botocore.exceptions import ClientError
+
+		try:
+			self.client.complete_multipart_upload(
+				Bucket=self.bucket,
+				Key=self.object_key(key),
+				UploadId=upload_id,
+				MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in enumerate(etags, 1)]},
+			)
+		except ClientError as exc:
+			raise StorageError(exc.response.get("Error", {}).get("Message") or "Multipart upload failed") from exc
+
+	def abort_multipart(self, key: str, upload_id: str) -> None:
+		self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.object_key(key), UploadId=upload_id)
+
+
+def init_storage(app: Flask) -> LocalStorage | S3Storage:
+	cfg = app.config
+	backend = (cfg.get("STORAGE_BACKEND") or "local").lower()
+	if backend == "local":
+		storage = LocalStorage(cfg["UPLOAD_FOLDER"])
+	elif backend == "s3":
+		if not cfg.get("AWS_S3_BUCKET"):
+			raise RuntimeError("STORAGE_BACKEND=s3 needs AWS_S3_BUCKET")
+		import boto3
+
+		client = boto3.client(
+			"s3",
+			region_name=cfg.get("AWS_REGION"),
+			aws_access_key_id=cfg.get("AWS_ACCESS_KEY_ID"),
+			aws_secret_access_key=cfg.get("AWS_SECRET_ACCESS_KEY"),
+			endpoint_url=cfg.get("AWS_S3_ENDPOINT_URL") or None,
+		)
+		storage = S3Storage(
+			client,
+			cfg["AWS_S3_BUCKET"],
+			cfg["UPLOAD_FOLDER"],
+			prefix=cfg.get("S3_PREFIX", ""),
+			multipart_threshold=int(cfg.get("S3_MULTIPART_THRESHOLD", 16 * 1024 * 1024)),
+			multipart_chunk=int(cfg.get("S3_MULTIPART_CHUNK_BYTES", 8 * 1024 * 1024)),
+			expires=int(cfg.get("S3_PRESIGN_EXPIRES", 900)),
+		)
+	else:
+		raise RuntimeError(f"Unknown STORAGE_BACKEND {backend!r} (use local or s3)")
+	app.extensions["storage"] = storage
+	return storage
+
+
+def get_storage() -> LocalStorage | S3Storage:
+	"""The app's storage; a LocalStorage follows UPLOAD_FOLDER if it was changed after startup."""
+	storage = current_app.extensions["storage"]
+	if not storage.remote and storage.root != current_app.config["UPLOAD_FOLDER"]:
+		storage = current_app.extensions["storage"] = LocalStorage(current_app.config["UPLOAD_FOLDER"])
+	return storage
@@ -1,6 +1,14 @@
-import random
-import string
-from datetime import datetime
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import has_app_context
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
@@ -12,7 +20,158 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
 	return check_password_hash(password_hash, plain_password)
 
 
+# Crockford base32: no I, L, O or U, so codes survive being read out over the phone.
+_CODE_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+CASE_CODE_EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+WORKER_ID_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_ID_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+CASE_CODE_LENGTH = 13  # 41-bit ms timestamp + worker + sequence = 63 bits
+
+
+def encode_base32(value: int, length: int = CASE_CODE_LENGTH) -> str:
+	chars = []
+	for _ in range(length):
+		value, rem = divmod(value, 32)
+		chars.append(_CODE_ALPHABET[rem])
+	return "".join(reversed(chars))
+
+
+WORKER_LEASE_TTL = timedelta(minutes=10)
+
+
+def derived_worker_id() -> int:
+	"""Best-effort worker id from hostname and pid, used when no lease is possible."""
+	host = int.from_bytes(hashlib.sha1(socket.gethostname().encode()).digest()[:2], "big")
+	return (host + os.getpid()) & MAX_WORKER_ID
+
+
+def lease_worker_id(owner: str, current: int | None = None) -> int:
+	"""Claim or renew a worker id in case_code_workers.
+
+	One round trip per lease period instead of one per code. Ids whose lease
+	has expired (crashed or stopped processes) are reused.
+	"""
+	from .extensions import db
+	from .models import CaseCodeWorker
+
+	table = CaseCodeWorker.__table__
+	now = datetime.utcnow()
+	until = now + WORKER_LEASE_TTL
+
+	if current is not None:
+		with db.engine.begin() as conn:
+			renewed = conn.execute(
+				table.update()
+				.where(table.c.worker_id == current, table.c.owner == owner)
+				.values(leased_until=until)
+			)
+			if renewed.rowcount == 1:
+				return current
+
+	for _ in range(MAX_WORKER_ID + 1):
+		with db.engine.begin() as conn:
+			expired = conn.execute(
+				select(table.c.worker_id)
+				.where(table.c.leased_until < now)
+				.order_by(table.c.worker_id)
+				.limit(1)
+			).scalar()
+			if expired is not None:
+				claimed = conn.execute(
+					table.update()
+					.where(table.c.worker_id == expired, table.c.leased_until < now)
+					.values(owner=owner, leased_until=until)
+				)
+				if claimed.rowcount == 1:
+					return expired
+				continue
+			next_id = conn.execute(select(func.coalesce(func.max(table.c.worker_id), -1) + 1)).scalar()
+		if next_id > MAX_WORKER_ID:
+			break
+		try:
+			with db.engine.begin() as conn:
+				conn.execute(table.insert().values(worker_id=next_id, owner=owner, leased_until=until))
+			return next_id
+		except IntegrityError:
+			continue
+	raise RuntimeError("No free case code worker id; all 1024 are leased")
+
+
+class CaseCodeGenerator:
+	"""Snowflake-style id generator: millisecond timestamp, worker id, sequence.
+
+	Codes are unique per worker id without touching the database and sort by
+	creation time. If the clock steps backwards or more than 4096 codes are
+	requested within one millisecond, the generator borrows the next
+	millisecond instead of reusing an id.
+
+	The worker id is, in order of preference: the one passed in, the
+	CASE_CODE_WORKER_ID environment variable, a lease from case_code_workers
+	(inside an app context), or a value derived from hostname and pid.
+	"""
+
+	def __init__(self, worker_id: int | None = None):
+		if worker_id is not None and not 0 <= worker_id <= MAX_WORKER_ID:
+			raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+		self._fixed_worker_id = worker_id
+		self.reset()
+
+	def reset(self) -> None:
+		"""Drop leased state and sequence (called in forked children)."""
+		self._lock = threading.Lock()
+		self._owner = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+		self._leased_id = None
+		self._renew_at = 0.0
+		self._last_ms = -1
+		self._sequence = 0
+
+	def _worker_id(self) -> int:
+		if self._fixed_worker_id is not None:
+			return self._fixed_worker_id
+		configured = os.getenv("CASE_CODE_WORKER_ID")
+		if configured:
+			worker_id = int(configured)
+			if not 0 <= worker_id <= MAX_WORKER_ID:
+				raise ValueError(f"CASE_CODE_WORKER_ID must be between 0 and {MAX_WORKER_ID}")
+			return worker_id
+		if not has_app_context():
+			return self._leased_id if self._leased_id is not None else derived_worker_id()
+		if self._leased_id is None or time.monotonic() >= self._renew_at:
+			try:
+				self._leased_id = lease_worker_id(self._owner, self._leased_id)
+				self._renew_at = time.monotonic() + WORKER_LEASE_TTL.total_seconds() / 2
+			except Exception:
+				logging.exception("Case code worker lease failed; using derived worker id")
+				return derived_worker_id()
+		return self._leased_id
+
+	def next_id(self) -> int:
+		with self._lock:
+			worker_id = self._worker_id()
+			now = int(time.time() * 1000) - CASE_CODE_EPOCH_MS
+			if now > self._last_ms:
+				self._last_ms = now
+				self._sequence = 0
+			else:
+				self._sequence += 1
+				if self._sequence > MAX_SEQUENCE:
+					self._last_ms += 1
+					self._sequence = 0
+			return (self._last_ms << (WORKER_ID_BITS + SEQUENCE_BITS)) | (worker_id << SEQUENCE_BITS) | self._sequence
+
+	def next_code(self, prefix: str = "A") -> str:
+		return f"{prefix}{encode_base32(self.next_id())}"
+
+
+_case_codes = CaseCodeGenerator()
+
+if hasattr(os, "register_at_fork"):
+	# Workers forked from a preloaded master must not inherit the parent's lease.
+	os.register_at_fork(after_in_child=_case_codes.reset)
+
+
 def generate_case_code(prefix: str = "A") -> str:
-	stamp = datetime.utcnow().strftime("%y%m%d%H%M%S")
-	rand = "".join(random.choices(string.digits, k=3))
-	return f"{prefix}{stamp}{rand}"
+	return _case_codes.next_code(prefix)
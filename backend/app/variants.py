@@ -0,0 +1,158 @@
+"""Resized, EXIF-stripped variants of uploaded images.
+
+Dashboards ask for /api/uploads/<sha256>?w=320 instead of the multi-megabyte
+original. Requested widths snap to IMAGE_VARIANT_WIDTHS so the cache stays
+small, and each variant is rendered once into
+<UPLOAD_FOLDER>/variants/ab/cd/<sha256>-w<width>.<ext> and served from disk
+afterwards. Decoding and resizing is CPU-bound, so it runs in a
+ProcessPoolExecutor (IMAGE_WORKERS processes; 0 renders inline) and never
+holds the GIL of a request thread; concurrent requests for the same variant
+wait on one render. New uploads get their variants rendered in the
+background when BACKGROUND_WORKERS_ENABLED is set.
+"""
+import glob
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from flask import Flask, current_app
+
+FORMATS = {"jpeg": ("jpg", "image/jpeg"), "webp": ("webp", "image/webp")}
+
+
+def render_variant(source: str, destination: str, width: int, fmt: str, quality: int) -> str:
+	"""Resize ``source`` to at most ``width`` pixels wide and save it without metadata (runs in a worker process)."""
+	from PIL import Image, ImageOps
+
+	with Image.open(source) as image:
+		image.seek(0)  # first frame of animated GIFs
+		image = ImageOps.exif_transpose(image)  # bake in the orientation before dropping EXIF
+		if image.width > width:
+			image.thumbnail((width, round(image.height * width / image.width)), Image.LANCZOS)
+		if fmt == "jpeg" and image.mode != "RGB":
+			background = Image.new("RGB", image.size, "white")
+			rgba = image.convert("RGBA")
+			background.paste(rgba, mask=rgba.getchannel("A"))
+			image = background
+		elif image.mode not in ("RGB", "RGBA"):
+			image = image.convert("RGBA")
+		tmp = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+		# No exif=/icc_profile= arguments: the variant carries no GPS or camera metadata
+		image.save(tmp, format=fmt.upper(), quality=quality, optimize=fmt == "jpeg")
+	os.replace(tmp, destination)
+	return destination
+
+
+class VariantRenderer:
+	def __init__(self, app: Flask | None = None):
+		self.app = None
+		self._pool: ProcessPoolExecutor | None = None
+		self._pending: dict[str, Future] = {}
+		self._lock = threading.Lock()
+		self.rendered_total = 0
+		if app is not None:
+			self.init_app(app)
+
+	def init_app(self, app: Flask) -> None:
+		self.app = app
+		app.extensions["variant_renderer"] = self
+
+	@property
+	def widths(self) -> list[int]:
+		raw = self.app.config.get("IMAGE_VARIANT_WIDTHS", "160,320,640,1280")
+		return sorted(int(w) for w in str(raw).split(",") if w.strip())
+
+	def snap_width(self, requested: int) -> int:
+		"""Smallest configured width that is at least ``requested`` (or the largest one)."""
+		widths = self.widths
+		return next((w for w in widths if w >= requested), widths[-1])
+
+	def variant_path(self, sha256: str, width: int, fmt: str) -> str:
+		folder = os.path.join(self.app.config["UPLOAD_FOLDER"], "variants", sha256[:2], sha256[2:4])
+		return os.path.join(folder, f"{sha256}-w{width}.{FORMATS[fmt][0]}")
+
+	def _executor(self) -> ProcessPoolExecutor | None:
+		workers = int(self.app.config.get("IMAGE_WORKERS", 2))
+		if workers <= 0:
+			return None
+		with self._lock:
+			if self._pool is None:
+				self._pool = ProcessPoolExecutor(max_workers=workers)
+			return self._pool
+
+	def submit(self, source: str, sha256: str, width: int, fmt: str) -> Future:
+		"""Future for the variant's path; renders it unless it is cached or already being rendered."""
+		destination = self.variant_path(sha256, width, fmt)
+		with self._lock:
+			pending = self._pending.get(destination)
+			if pending is not None:
+				return pending
+		if os.path.exists(destination):
+			done: Future = Future()
+			done.set_result(destination)
+			return done
+
+		os.makedirs(os.path.dirname(destination), exist_ok=True)
+		quality = int(self.app.config.get("IMAGE_VARIANT_QUALITY", 80))
+		pool = self._executor()
+		if pool is None:
+			future = Future()
+			try:
+				future.set_result(render_variant(source, destination, width, fmt, quality))
+			except Exception as exc:
+				future.set_exception(exc)
+		else:
+			with self._lock:
+				future = self._pending.get(destination)
+				if future is not None:
+					return future
+				future = pool.submit(render_variant, source, destination, width, fmt, quality)
+				self._pending[destination] = future
+			future.add_done_callback(lambda _: self._forget(destination))
+		self.rendered_total += 1
+		return future
+
+	def _forget(self, destination: str) -> None:
+		with self._lock:
+			self._pending.pop(destination, None)
+
+	def get(self, source: str, sha256: str, requested_width: int, fmt: str = "jpeg") -> str:
+		"""Path of the variant closest to ``requested_width``, rendering it if needed."""
+		timeout = float(self.app.config.get("IMAGE_RENDER_TIMEOUT", 30))
+		return self.submit(source, sha256, self.snap_width(requested_width), fmt).result(timeout)
+
+	def prerender(self, source: str, sha256: str) -> None:
+		"""Queue every configured variant of a new upload without waiting for them."""
+		if self._executor() is None:
+			return  # inline rendering would hold up the upload; render on first request instead
+		formats = ["jpeg", "webp"] if self.app.config.get("IMAGE_WEBP", True) else ["jpeg"]
+		for width in self.widths:
+			for fmt in formats:
+				future = self.submit(source, sha256, width, fmt)
+				future.add_done_callback(self._log_failure)
+
+	def _log_failure(self, future: Future) -> None:
+		if future.exception() is not None:
+			self.app.logger.warning("Image variant render failed: %s", future.exception())
+
+	def discard(self, sha256: str) -> None:
+		folder = os.path.join(self.app.config["UPLOAD_FOLDER"], "variants", sha256[:2], sha256[2:4])
+		for path in glob.glob(os.path.join(folder, f"{sha256}-w*")):
+			try:
+				os.unlink(path)
+			except FileNotFoundError:
+				pass
+
+	def shutdown(self) -> None:
+		with self._lock:
+			pool, self._pool = self._pool, None
+		if pool is not None:
+			pool.shutdown(wait=True, cancel_futures=True)
+
+
+def init_variant_renderer(app: Flask) -> VariantRenderer:
+	return VariantRenderer(app)
+
+
+def get_variant_renderer() -> VariantRenderer:
+	return current_app.extensions["variant_renderer"]
@@ -38,15 +38,121 @@ class Config:
 	MAIL_PASSWORD: str | None = os.getenv("MAIL_PASSWORD")
 	MAIL_DEFAULT_SENDER: tuple[str, str] | str | None = os.getenv("MAIL_DEFAULT_SENDER")
 
+	# Pooled SMTP connections (reused across a batch and between batches)
+	MAIL_POOL_SIZE: int = int(os.getenv("MAIL_POOL_SIZE", "4"))
+	MAIL_POOL_IDLE_TIMEOUT: float = float(os.getenv("MAIL_POOL_IDLE_TIMEOUT", "60"))
+	MAIL_POOL_MAX_MESSAGES: int = int(os.getenv("MAIL_POOL_MAX_MESSAGES", "500"))
+	MAIL_SEND_RETRIES: int = int(os.getenv("MAIL_SEND_RETRIES", "2"))
+
+	# Background workers (outbox dispatcher, escalation sweeper). Disable for one-off scripts and tests.
+	BACKGROUND_WORKERS_ENABLED: bool = os.getenv("BACKGROUND_WORKERS_ENABLED", "true").lower() == "true"
+
+	# Notification outbox
+	OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+	OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+	OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+	OUTBOX_BACKOFF_SECONDS: float = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+	OUTBOX_CLAIM_TIMEOUT: int = int(os.getenv("OUTBOX_CLAIM_TIMEOUT", "300"))
+
+	# Escalation of cases still PENDING past their urgency's deadline (minutes), emailed to ESCALATION_EMAILS
+	# and the case's NGO. One sweep per ESCALATION_INTERVAL_SECONDS across all workers.
+	ESCALATION_ENABLED: bool = os.getenv("ESCALATION_ENABLED", "true").lower() == "true"
+	ESCALATION_INTERVAL_SECONDS: float = float(os.getenv("ESCALATION_INTERVAL_SECONDS", "60"))
+	ESCALATION_DEADLINES_MINUTES: str = os.getenv("ESCALATION_DEADLINES_MINUTES", "Critical=15,High=60,Medium=240,Low=1440")
+	ESCALATION_EMAILS: str = os.getenv("ESCALATION_EMAILS", "")
+	ESCALATION_LOOKBACK_HOURS: float = float(os.getenv("ESCALATION_LOOKBACK_HOURS", "72"))
+	ESCALATION_BATCH_SIZE: int = int(os.getenv("ESCALATION_BATCH_SIZE", "200"))
+	ESCALATION_LEASE_SECONDS: int = int(os.getenv("ESCALATION_LEASE_SECONDS", "300"))
+
 	# Uploads
 	UPLOAD_FOLDER: str = os.getenv("UPLOAD_FOLDER", os.path.abspath("uploads"))
 	MAX_CONTENT_LENGTH: int = int(os.getenv("MAX_CONTENT_LENGTH", 16 * 1024 * 1024))  # 16MB
+	# Per-file limit, enforced while the upload streams in (defaults to MAX_CONTENT_LENGTH)
+	UPLOAD_MAX_FILE_BYTES: int = int(os.getenv("UPLOAD_MAX_FILE_BYTES", "0"))
+	# Resumable (tus) uploads idle this long are deleted with their partial files
+	RESUMABLE_EXPIRE_HOURS: float = float(os.getenv("RESUMABLE_EXPIRE_HOURS", "24"))
+
+	# Image variants (/api/uploads/<sha256>?w=320): snapped widths, render processes (0 = inline), WebP output
+	IMAGE_VARIANT_WIDTHS: str = os.getenv("IMAGE_VARIANT_WIDTHS", "160,320,640,1280")
+	IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", "2"))
+	IMAGE_VARIANT_QUALITY: int = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+	IMAGE_WEBP: bool = os.getenv("IMAGE_WEBP", "true").lower() == "true"
+	IMAGE_RENDER_TIMEOUT: float = float(os.getenv("IMAGE_RENDER_TIMEOUT", "30"))
+
+	# Donation receipts: HTML rendered after commit by RECEIPT_WORKERS processes (0 = inline) from
+	# RECEIPT_TEMPLATE (default: the bundled templates/receipt.html); emails link to PUBLIC_BASE_URL + a signed receipt URL
+	RECEIPTS_ENABLED: bool = os.getenv("RECEIPTS_ENABLED", "true").lower() == "true"
+	RECEIPT_WORKERS: int = int(os.getenv("RECEIPT_WORKERS", "2"))
+	RECEIPT_TEMPLATE: str = os.getenv("RECEIPT_TEMPLATE", "")
+	PUBLIC_BASE_URL: str = os.getenv("PUBLIC_BASE_URL", "")
+
+	# Background EXIF/MP4 metadata extraction (fills missing case coordinates from photo GPS)
+	MEDIA_METADATA_ENABLED: bool = os.getenv("MEDIA_METADATA_ENABLED", "true").lower() == "true"
+	MEDIA_METADATA_INTERVAL_SECONDS: float = float(os.getenv("MEDIA_METADATA_INTERVAL_SECONDS", "10"))
+	MEDIA_METADATA_BATCH_SIZE: int = int(os.getenv("MEDIA_METADATA_BATCH_SIZE", "50"))
+	MEDIA_METADATA_LEASE_SECONDS: int = int(os.getenv("MEDIA_METADATA_LEASE_SECONDS", "120"))
+
+	# Serving uploads: browser cache lifetime of content-addressed files, and optional
+	# hand-off of the bytes to the reverse proxy ("x-accel" for nginx, "x-sendfile")
+	MEDIA_CACHE_MAX_AGE: int = int(os.getenv("MEDIA_CACHE_MAX_AGE", "31536000"))
+	MEDIA_SENDFILE: str = os.getenv("MEDIA_SENDFILE", "")
+	MEDIA_ACCEL_PREFIX: str = os.getenv("MEDIA_ACCEL_PREFIX", "/_uploads/")
 
 	# Storage (optional S3)
 	AWS_S3_BUCKET: str | None = os.getenv("AWS_S3_BUCKET")
 	AWS_ACCESS_KEY_ID: str | None = os.getenv("AWS_ACCESS_KEY_ID")
 	AWS_SECRET_ACCESS_KEY: str | None = os.getenv("AWS_SECRET_ACCESS_KEY")
 	AWS_REGION: str | None = os.getenv("AWS_REGION")
+	# "local" keeps media in UPLOAD_FOLDER; "s3" in AWS_S3_BUCKET (multipart above the threshold,
+	# presigned downloads and direct client uploads). The endpoint URL is for MinIO and similar.
+	STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+	AWS_S3_ENDPOINT_URL: str | None = os.getenv("AWS_S3_ENDPOINT_URL")
+	S3_PREFIX: str = os.getenv("S3_PREFIX", "media/")
+	S3_MULTIPART_THRESHOLD: int = int(os.getenv("S3_MULTIPART_THRESHOLD", str(16 * 1024 * 1024)))
+	S3_MULTIPART_CHUNK_BYTES: int = int(os.getenv("S3_MULTIPART_CHUNK_BYTES", str(8 * 1024 * 1024)))
+	S3_PRESIGN_EXPIRES: int = int(os.getenv("S3_PRESIGN_EXPIRES", "900"))
+
+	# Nearby-services spatial index (grid cell size in degrees, rebuild interval in seconds)
+	SPATIAL_INDEX_CELL_DEG: float = float(os.getenv("SPATIAL_INDEX_CELL_DEG", "0.02"))
+	SPATIAL_INDEX_TTL: float = float(os.getenv("SPATIAL_INDEX_TTL", "300"))
+
+	# Automatic volunteer dispatch for new cases
+	DISPATCH_ENABLED: bool = os.getenv("DISPATCH_ENABLED", "true").lower() == "true"
+	DISPATCH_RADIUS_KM: float = float(os.getenv("DISPATCH_RADIUS_KM", "15"))
+	DISPATCH_MAX_OPEN_CASES: int = int(os.getenv("DISPATCH_MAX_OPEN_CASES", "3"))
+
+	# Duplicate report detection: link reports within DEDUPE_RADIUS_M metres and DEDUPE_WINDOW_MINUTES of an open case
+	DEDUPE_ENABLED: bool = os.getenv("DEDUPE_ENABLED", "true").lower() == "true"
+	DEDUPE_RADIUS_M: float = float(os.getenv("DEDUPE_RADIUS_M", "150"))
+	DEDUPE_WINDOW_MINUTES: float = float(os.getenv("DEDUPE_WINDOW_MINUTES", "30"))
+	DEDUPE_REFRESH_SECONDS: float = float(os.getenv("DEDUPE_REFRESH_SECONDS", "60"))
+
+	# Admin bulk operations (/api/admin/bulk): rows per UPDATE/DELETE statement and per request
+	BULK_CHUNK_SIZE: int = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+	BULK_MAX_ROWS: int = int(os.getenv("BULK_MAX_ROWS", "10000"))
+
+	# Idempotency-Key handling for POST /api/cases and /api/donations
+	IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+	IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+	IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+	# Group commit for case reports: batch concurrent reports into one transaction per INGEST_MAX_WAIT_MS
+	INGEST_GROUP_COMMIT: bool = os.getenv("INGEST_GROUP_COMMIT", "false").lower() == "true"
+	INGEST_MAX_BATCH: int = int(os.getenv("INGEST_MAX_BATCH", "200"))
+	INGEST_MAX_WAIT_MS: float = float(os.getenv("INGEST_MAX_WAIT_MS", "5"))
+	INGEST_COMMIT_TIMEOUT: float = float(os.getenv("INGEST_COMMIT_TIMEOUT", "10"))
+
+	# Live case feed (SSE). Set EVENTS_REDIS_URL to share events across workers.
+	EVENTS_REDIS_URL: str | None = os.getenv("EVENTS_REDIS_URL")
+	STREAM_LOG_SIZE: int = int(os.getenv("STREAM_LOG_SIZE", "1000"))
+	STREAM_MAX_CONNECTIONS: int = int(os.getenv("STREAM_MAX_CONNECTIONS", "500"))
+	# Threads of the waitress server in wsgi.py (or gunicorn --threads). Without
+	# gevent each open stream holds one, so streams are capped at SERVER_THREADS - 1.
+	SERVER_THREADS: int = int(os.getenv("SERVER_THREADS", "8"))
+	STREAM_QUEUE_SIZE: int = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+	STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+	STREAM_MAX_SECONDS: float = float(os.getenv("STREAM_MAX_SECONDS", "300"))
+	STREAM_RETRY_MS: int = int(os.getenv("STREAM_RETRY_MS", "3000"))
 
 	# Rate limiting storage (optional Redis URL). Flask-Limiter will use in-memory if not provided.
 	RATELIMIT_STORAGE_URI: str | None = os.getenv("RATELIMIT_STORAGE_URI")
@@ -21,4 +21,4 @@ application = create_app()
 from waitress import serve
 
 if __name__ == "__main__":
-    serve(application, host="0.0.0.0", port=5000)
+    serve(application, host="0.0.0.0", port=5000, threads=application.config["SERVER_THREADS"])
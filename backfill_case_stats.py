@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+"""
+Rebuild the hourly/daily case counts behind /api/analytics/cases from the
+case history. Run once after the add_case_stat_buckets migration, while
+case reports are paused (the rebuilt counts replace the live ones).
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from backend.app import create_app
+from backend.app.case_stats import backfill
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        rows = backfill()
+        print(f"Rebuilt {rows} case_stat_buckets rows")
+
+
+if __name__ == '__main__':
+    main()
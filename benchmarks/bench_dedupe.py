@@ -0,0 +1,70 @@
+"""
+Measure duplicate-report detection throughput during incident bursts.
+
+Replays reports clustered around a set of incidents (many people reporting
+the same animal) through the in-memory dedupe index (no database):
+
+    python benchmarks/bench_dedupe.py --reports 100000 --rate 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from backend.app.dedupe import DuplicateIndex  # noqa: E402
+
+# Roughly Bengaluru
+LAT_RANGE = (12.80, 13.20)
+LON_RANGE = (77.40, 77.80)
+ANIMALS = ["Dog", "Cat", "Bird", "Other"]
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--reports", type=int, default=100_000)
+	parser.add_argument("--incidents", type=int, default=20_000)
+	parser.add_argument("--rate", type=float, default=1000.0, help="simulated reports per second")
+	parser.add_argument("--radius-m", type=float, default=150.0)
+	parser.add_argument("--window-minutes", type=float, default=30.0)
+	parser.add_argument("--seed", type=int, default=42)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+	incidents = [
+		(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE), rng.choice(ANIMALS))
+		for _ in range(args.incidents)
+	]
+	index = DuplicateIndex(args.radius_m, args.window_minutes * 60)
+	clock = 1_700_000_000.0
+	duplicates = 0
+	latencies = []
+	start = time.perf_counter()
+	for case_id in range(args.reports):
+		lat, lon, animal = rng.choice(incidents)
+		# Reporters stand within a few tens of metres of the animal
+		lat += rng.gauss(0, 0.0002)
+		lon += rng.gauss(0, 0.0002)
+		clock += 1.0 / args.rate
+		t0 = time.perf_counter()
+		if index.find(lat, lon, clock, animal) is None:
+			index.add(case_id, lat, lon, clock, animal)
+		else:
+			duplicates += 1
+		if case_id % 1000 == 0:
+			index.prune(clock)
+		latencies.append(time.perf_counter() - t0)
+	elapsed = time.perf_counter() - start
+
+	latencies.sort()
+	us = [x * 1e6 for x in latencies]
+	print(f"reports={args.reports} incidents={args.incidents} duplicates={duplicates} indexed={len(index)}")
+	print(f"throughput: {args.reports / elapsed:,.0f} reports/s (target {args.rate:,.0f}/s)")
+	print(f"latency us: p50={statistics.median(us):.1f} p99={us[int(len(us) * 0.99)]:.1f} max={us[-1]:.1f}")
+
+
+if __name__ == "__main__":
+	main()
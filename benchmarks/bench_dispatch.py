@@ -0,0 +1,76 @@
+"""
+Measure dispatch decision latency and throughput at city scale.
+
+Builds an in-memory volunteer index (no database) and ranks candidates
+for random case locations:
+
+    python benchmarks/bench_dispatch.py --volunteers 10000 --cases 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from backend.app.dispatch import DispatchEngine  # noqa: E402
+from backend.app.geo import GridIndex  # noqa: E402
+
+# Roughly Bengaluru
+LAT_RANGE = (12.80, 13.20)
+LON_RANGE = (77.40, 77.80)
+SKILLS = ["pickup", "first aid", "foster", "transport, dog", "vet, cat", "rescue, bird"]
+URGENCIES = ["Low", "Medium", "High", "Critical"]
+ANIMALS = ["Dog", "Cat", "Bird", "Other"]
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--volunteers", type=int, default=10_000)
+	parser.add_argument("--cases", type=int, default=20_000)
+	parser.add_argument("--cell-deg", type=float, default=0.02)
+	parser.add_argument("--seed", type=int, default=42)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+	index = GridIndex(args.cell_deg)
+	for vid in range(args.volunteers):
+		index.upsert(vid, rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE), {
+			"id": vid, "approved": rng.random() > 0.1, "expertise": rng.choice(SKILLS), "ngo_id": None,
+		})
+
+	engine = DispatchEngine()
+	loads: dict[int, int] = {}
+	latencies = []
+	assigned = 0
+	start = time.perf_counter()
+	for _ in range(args.cases):
+		t0 = time.perf_counter()
+		ranked = engine.rank(
+			index, rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE),
+			rng.choice(URGENCIES), rng.choice(ANIMALS), loads, k=1,
+		)
+		if ranked:
+			vid = ranked[0].volunteer_id
+			loads[vid] = loads.get(vid, 0) + 1
+			assigned += 1
+		# Volunteers finish work too, so the load stays realistic
+		if loads and rng.random() < 0.8:
+			done = rng.choice(list(loads))
+			loads[done] -= 1
+			if not loads[done]:
+				del loads[done]
+		latencies.append(time.perf_counter() - t0)
+	elapsed = time.perf_counter() - start
+
+	latencies.sort()
+	ms = [x * 1000 for x in latencies]
+	print(f"volunteers={args.volunteers} cases={args.cases} assigned={assigned}")
+	print(f"throughput: {args.cases / elapsed:,.0f} decisions/s")
+	print(f"latency ms: p50={statistics.median(ms):.3f} p99={ms[int(len(ms) * 0.99)]:.3f} max={ms[-1]:.3f}")
+
+
+if __name__ == "__main__":
+	main()
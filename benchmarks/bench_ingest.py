@@ -0,0 +1,76 @@
+"""
+Compare sustained case-report throughput with and without group commit.
+
+Fires reports at POST /api/cases from concurrent client threads (in-process,
+no HTTP server), first committing per request and then through the
+group-commit writer. Uses DATABASE_URL if set (point it at a scratch MySQL
+database to measure real fsync cost), otherwise a temporary SQLite file:
+
+    python benchmarks/bench_ingest.py --reports 5000 --threads 32
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+_tmp = tempfile.mkdtemp(prefix="resqtrack-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("RATELIMIT_ENABLED", "false")
+os.environ.setdefault("RATELIMIT_STORAGE_URI", "memory://")
+os.environ.setdefault("BACKGROUND_WORKERS_ENABLED", "false")
+os.environ.setdefault("UPLOAD_FOLDER", _tmp)
+
+from backend.app import create_app  # noqa: E402
+from backend.app.extensions import db  # noqa: E402
+
+
+def run(app, reports, threads):
+	def report(n):
+		res = app.test_client().post("/api/cases", json={
+			"reporter_phone": "9999999999",
+			"location": f"Street {n}, Bengaluru",
+			"reporter_email": f"bench{n}@example.com",
+			"urgency": "Medium",
+		})
+		if res.status_code != 201:
+			raise RuntimeError(res.get_data(as_text=True))
+
+	start = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=threads) as pool:
+		list(pool.map(report, range(reports)))
+	return time.perf_counter() - start
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--reports", type=int, default=5000)
+	parser.add_argument("--threads", type=int, default=32)
+	parser.add_argument("--max-wait-ms", type=float, default=5.0)
+	args = parser.parse_args()
+
+	app = create_app()
+	app.config.update(RATELIMIT_ENABLED=False, INGEST_MAX_WAIT_MS=args.max_wait_ms)
+	with app.app_context():
+		db.drop_all()
+		db.create_all()
+
+	for group_commit in (False, True):
+		app.config["INGEST_GROUP_COMMIT"] = group_commit
+		writer = app.extensions["group_commit_writer"]
+		writer.max_wait = args.max_wait_ms / 1000.0
+		batches_before = writer.batches_total
+		elapsed = run(app, args.reports, args.threads)
+		label = "group commit" if group_commit else "per-request commit"
+		line = f"{label:>20}: {args.reports / elapsed:,.0f} reports/s ({elapsed:.2f}s)"
+		if group_commit:
+			batches = writer.batches_total - batches_before
+			line += f", {batches} commits, {args.reports / max(batches, 1):.1f} reports/commit"
+		print(line)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,82 @@
+"""
+Compare one-connection-per-message sending with pooled batch sending.
+
+Runs against a local aiosmtpd sink, so it measures connection/handshake
+overhead rather than a real provider's latency:
+
+    python benchmarks/bench_mailer.py --messages 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+from aiosmtpd.controller import Controller
+from flask import Flask
+from flask_mail import Message
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from backend.app.extensions import mail  # noqa: E402
+from backend.app.mailer import get_mail_pool, send_messages  # noqa: E402
+
+
+class Sink:
+	def __init__(self):
+		self.count = 0
+
+	async def handle_DATA(self, server, session, envelope):
+		self.count += 1
+		return "250 OK"
+
+
+def build_app(port):
+	app = Flask(__name__)
+	app.config.update(
+		MAIL_SERVER="127.0.0.1",
+		MAIL_PORT=port,
+		MAIL_USE_TLS=False,
+		MAIL_USE_SSL=False,
+		MAIL_DEFAULT_SENDER="bench@resqtrack.local",
+	)
+	mail.init_app(app)
+	return app
+
+
+def messages(n):
+	return [Message(subject="ResQTrack: Donation Receipt", recipients=[f"donor{i}@example.com"], body="Thank you.") for i in range(n)]
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--messages", type=int, default=1000)
+	parser.add_argument("--batch", type=int, default=100)
+	args = parser.parse_args()
+
+	sink = Sink()
+	controller = Controller(sink, hostname="127.0.0.1", port=8025)
+	controller.start()
+	app = build_app(controller.port)
+	try:
+		with app.app_context():
+			start = time.perf_counter()
+			for msg in messages(args.messages):
+				mail.send(msg)
+			single = time.perf_counter() - start
+
+			batch = messages(args.messages)
+			start = time.perf_counter()
+			for i in range(0, len(batch), args.batch):
+				send_messages(batch[i:i + args.batch])
+			pooled = time.perf_counter() - start
+			get_mail_pool().close_all()
+	finally:
+		controller.stop()
+
+	print(f"messages delivered to sink: {sink.count}")
+	print(f"connection per message: {args.messages / single:8.0f} msg/s")
+	print(f"pooled batches of {args.batch}: {args.messages / pooled:8.0f} msg/s ({single / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+	main()
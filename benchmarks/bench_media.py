@@ -0,0 +1,91 @@
+"""
+Measure media serving: full downloads, seeking with Range requests,
+revalidation with If-None-Match, and the same downloads with the bytes
+offloaded to the reverse proxy (MEDIA_SENDFILE=x-accel).
+
+Runs in-process (no HTTP server) against a generated video:
+
+    python benchmarks/bench_media.py --size-mb 64 --requests 200 --threads 8
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+_tmp = tempfile.mkdtemp(prefix="resqtrack-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("RATELIMIT_ENABLED", "false")
+os.environ.setdefault("RATELIMIT_STORAGE_URI", "memory://")
+os.environ.setdefault("BACKGROUND_WORKERS_ENABLED", "false")
+
+from backend.app import create_app  # noqa: E402
+from backend.app.extensions import db  # noqa: E402
+
+
+def timed(app, requests, threads, make_request):
+	def one(n):
+		res = make_request(app.test_client(), n)
+		body = res.get_data()
+		res.close()
+		return res.status_code, len(body)
+
+	start = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=threads) as pool:
+		results = list(pool.map(one, range(requests)))
+	elapsed = time.perf_counter() - start
+	return elapsed, results
+
+
+def report(label, requests, elapsed, results):
+	statuses = sorted({status for status, _ in results})
+	sent = sum(size for _, size in results)
+	print(
+		f"{label:>28}: {requests / elapsed:8,.0f} req/s  {sent / elapsed / 1e6:9,.1f} MB/s through Python  "
+		f"status {statuses}"
+	)
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--size-mb", type=int, default=64)
+	parser.add_argument("--requests", type=int, default=200)
+	parser.add_argument("--threads", type=int, default=8)
+	parser.add_argument("--range-kb", type=int, default=1024)
+	args = parser.parse_args()
+
+	app = create_app()
+	app.config.update(UPLOAD_FOLDER=_tmp, UPLOAD_MAX_FILE_BYTES=(args.size_mb + 1) * 1024 * 1024, RATELIMIT_ENABLED=False)
+	with app.app_context():
+		db.drop_all()
+		db.create_all()
+
+	size = args.size_mb * 1024 * 1024
+	video = b"\x00\x00\x00\x18ftypisom" + os.urandom(size - 12)
+	res = app.test_client().post(
+		"/api/uploads", data={"file": (io.BytesIO(video), "clip.mp4")}, content_type="multipart/form-data"
+	)
+	url = res.get_json()["url"]
+	etag = app.test_client().get(url, headers={"Range": "bytes=0-0"}).headers.get("ETag")
+
+	span = args.range_kb * 1024
+	full = args.requests // 10 or 1
+	report("full download", full, *timed(app, full, args.threads, lambda c, n: c.get(url)))
+	report(f"{args.range_kb} KiB Range seeks", args.requests, *timed(
+		app, args.requests, args.threads,
+		lambda c, n: c.get(url, headers={"Range": f"bytes={(o := random.randrange(size - span))}-{o + span - 1}"}),
+	))
+	report("If-None-Match revalidation", args.requests, *timed(
+		app, args.requests, args.threads, lambda c, n: c.get(url, headers={"If-None-Match": etag or '"none"'}),
+	))
+	app.config.update(MEDIA_SENDFILE="x-accel", MEDIA_ACCEL_PREFIX="/_media/")
+	report("full download, x-accel", args.requests, *timed(app, args.requests, args.threads, lambda c, n: c.get(url)))
+
+
+if __name__ == "__main__":
+	main()
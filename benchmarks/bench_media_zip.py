@@ -0,0 +1,89 @@
+"""
+Measure case media bundles (/api/admin/cases/media.zip): throughput and peak
+Python memory while the ZIP is streamed, for bundles of growing size, next
+to building the same archive in memory first.
+
+Runs in-process (no HTTP server) against generated case videos:
+
+    python benchmarks/bench_media_zip.py --cases 16 --size-mb 16
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+_tmp = tempfile.mkdtemp(prefix="resqtrack-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("RATELIMIT_ENABLED", "false")
+os.environ.setdefault("RATELIMIT_STORAGE_URI", "memory://")
+os.environ.setdefault("BACKGROUND_WORKERS_ENABLED", "false")
+
+from backend.app import create_app  # noqa: E402
+from backend.app.extensions import db  # noqa: E402
+from backend.app.media import blob_hash, blob_path  # noqa: E402
+from backend.app.models import AnimalCase  # noqa: E402
+
+
+def streamed(app, ids):
+	res = app.test_client().get("/api/admin/cases/media.zip", query_string={"ids": ",".join(map(str, ids))}, buffered=False)
+	sent = sum(len(piece) for piece in res.response)
+	res.close()
+	return sent
+
+
+def in_memory(app, ids):
+	with app.app_context():
+		urls = [db.session.get(AnimalCase, i).media_url for i in ids]
+		buffer = io.BytesIO()
+		with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as bundle:
+			for n, url in enumerate(urls):
+				bundle.write(blob_path(blob_hash(url)), f"case-{n}/clip.mp4")
+		return len(buffer.getvalue())
+
+
+def measure(label, fn, app, ids):
+	tracemalloc.start()
+	start = time.perf_counter()
+	sent = fn(app, ids)
+	elapsed = time.perf_counter() - start
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	print(f"{label:>34}: {sent / elapsed / 1e6:8,.1f} MB/s  {sent / 1e6:8,.1f} MB sent  peak {peak / 1e6:8,.1f} MB")
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--cases", type=int, default=16)
+	parser.add_argument("--size-mb", type=int, default=16)
+	args = parser.parse_args()
+
+	app = create_app()
+	app.config.update(UPLOAD_FOLDER=_tmp, UPLOAD_MAX_FILE_BYTES=(args.size_mb + 1) * 1024 * 1024, RATELIMIT_ENABLED=False)
+	with app.app_context():
+		db.drop_all()
+		db.create_all()
+
+	size = args.size_mb * 1024 * 1024
+	ids = []
+	for n in range(args.cases):
+		video = b"\x00\x00\x00\x18ftypisom" + os.urandom(size - 12)
+		res = app.test_client().post(
+			"/api/cases",
+			data={"file": (io.BytesIO(video), "clip.mp4"), "reporter_phone": "9", "location": f"Road {n}"},
+			content_type="multipart/form-data",
+		)
+		ids.append(res.get_json()["case_id"])
+
+	for count in sorted({max(1, args.cases // 4), args.cases}):
+		measure(f"streamed, {count} cases", streamed, app, ids[:count])
+		measure(f"built in memory, {count} cases", in_memory, app, ids[:count])
+
+
+if __name__ == "__main__":
+	main()
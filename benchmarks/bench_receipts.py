@@ -0,0 +1,85 @@
+"""
+Measure donation receipts: latency of recording a donation with the receipt
+rendered inline versus handed to the worker pool, and how fast a template
+change is re-rendered across all donations with 0 (inline), 2 and 4 worker
+processes.
+
+Runs in-process (no HTTP server):
+
+    python benchmarks/bench_receipts.py --donations 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+_tmp = tempfile.mkdtemp(prefix="resqtrack-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("RATELIMIT_ENABLED", "false")
+os.environ.setdefault("RATELIMIT_STORAGE_URI", "memory://")
+os.environ.setdefault("BACKGROUND_WORKERS_ENABLED", "false")
+
+from backend.app import create_app  # noqa: E402
+from backend.app.extensions import db  # noqa: E402
+from backend.app.receipts import DEFAULT_TEMPLATE  # noqa: E402
+
+
+def donate(app, n, background):
+	app.config["BACKGROUND_WORKERS_ENABLED"] = background
+	client = app.test_client()
+	latencies = []
+	for i in range(n):
+		start = time.perf_counter()
+		client.post("/api/donations", json={
+			"amount": 100 + i, "category": "Food", "donor_name": f"Donor {i}", "donor_email": f"d{i}@example.com",
+		})
+		latencies.append(time.perf_counter() - start)
+	latencies.sort()
+	mode = "worker pool" if background else "inline"
+	print(
+		f"{'donation, receipt ' + mode:>30}: p50 {statistics.median(latencies) * 1000:6.2f} ms  "
+		f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.2f} ms"
+	)
+
+
+def regenerate(app, workers, marker):
+	path = os.path.join(_tmp, f"receipt-{marker}.html")
+	with open(DEFAULT_TEMPLATE, encoding="utf-8") as src, open(path, "w", encoding="utf-8") as dst:
+		dst.write(src.read().replace("Thank you", f"{marker}. Thank you"))
+	app.config.update(RECEIPT_TEMPLATE=path, RECEIPT_WORKERS=workers)
+	renderer = app.extensions["receipt_renderer"]
+	with app.app_context():
+		start = time.perf_counter()
+		counts = renderer.regenerate()
+		elapsed = time.perf_counter() - start
+	renderer.shutdown()
+	print(f"{f'regenerate, {workers} workers':>30}: {counts['rendered'] / elapsed:8,.0f} receipts/s  {counts}")
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--donations", type=int, default=2000)
+	args = parser.parse_args()
+
+	app = create_app()
+	app.config.update(UPLOAD_FOLDER=_tmp, RATELIMIT_ENABLED=False, RECEIPT_WORKERS=2)
+	with app.app_context():
+		db.drop_all()
+		db.create_all()
+
+	donate(app, 200, background=False)
+	donate(app, 200, background=True)
+	app.extensions["receipt_renderer"].shutdown()
+	app.config["BACKGROUND_WORKERS_ENABLED"] = False
+	donate(app, max(0, args.donations - 400), background=False)
+
+	for n, workers in enumerate((0, 2, 4)):
+		regenerate(app, workers, f"v{n}")
+
+
+if __name__ == "__main__":
+	main()
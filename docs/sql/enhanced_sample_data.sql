@@ -41,16 +41,16 @@ VALUES
 -- Insert Animal Cases (Reports)
 INSERT INTO animal_cases (case_code, reporter_name, reporter_phone, location, latitude, longitude, animal_type, urgency, notes, status, ngo_id, assigned_volunteer_id, hospital_id, created_at, updated_at)
 VALUES
-('A250101120000123', 'Amit Kumar', '9000000000', 'Sector 15, Near Park', 28.6139, 77.2090, 'Dog', 'Medium', 'Injured dog found near the park. Seems to have a leg injury.', 'PENDING', 1, 1, 1, NOW(), NOW()),
-('A250101120000124', 'Priya Singh', '8000000000', 'Sector 20, Street Corner', 28.6140, 77.2091, 'Cat', 'Critical', 'Cat stuck in drain pipe. Needs immediate rescue.', 'IN_PROGRESS', 2, 3, 2, NOW(), NOW()),
-('A250101120000125', 'Raj Patel', '7000000000', 'Sector 25, Construction Site', 28.6141, 77.2092, 'Bird', 'Low', 'Bird with broken wing found at construction site.', 'RESCUED', 1, 2, 3, NOW(), NOW()),
-('A250101120000126', 'Sneha Gupta', '6000000000', 'Forest Area, Near Highway', 28.6142, 77.2093, 'Other', 'Medium', 'Deer found injured near highway. Wildlife rescue needed.', 'PENDING', 4, 6, 4, NOW(), NOW()),
-('A250101120000127', 'Anonymous', '5000000000', 'Sector 10, Residential Area', 28.6143, 77.2094, 'Dog', 'Critical', 'Dog hit by vehicle. Bleeding heavily. Emergency required.', 'IN_PROGRESS', 1, 4, 1, NOW(), NOW()),
-('A250101120000128', 'Vikram Singh', '4000000000', 'Sector 8, Near School', 28.6144, 77.2095, 'Cat', 'Medium', 'Stray cat with skin infection. Needs medical attention.', 'PENDING', 5, 7, 5, NOW(), NOW()),
-('A250101120000129', 'Anita Patel', '3000000000', 'Sector 30, Market Area', 28.6145, 77.2096, 'Dog', 'Low', 'Puppy found abandoned. Looking for foster care.', 'RESCUED', 2, 4, 2, NOW(), NOW()),
-('A250101120000130', 'Rohit Kumar', '2000000000', 'Sector 35, Industrial Area', 28.6146, 77.2097, 'Bird', 'Critical', 'Eagle with injured wing. Wildlife rescue required.', 'IN_PROGRESS', 4, 6, 6, NOW(), NOW()),
-('A250101120000131', 'Meera Sharma', '1000000000', 'Sector 9, Residential Complex', 28.6147, 77.2098, 'Cat', 'Medium', 'Cat with eye infection. Needs veterinary care.', 'PENDING', 3, 5, 3, NOW(), NOW()),
-('A250101120000132', 'Anonymous', '9000000001', 'Sector 12, Park Area', 28.6148, 77.2099, 'Dog', 'Low', 'Healthy stray dog. Needs vaccination and neutering.', 'PENDING', 1, 8, 1, NOW(), NOW());
+('A250101120000123', 'Amit Kumar', '9000000000', 'Sector 15, Near Park', 28.6139, 77.2090, 'Dog', 2, 'Injured dog found near the park. Seems to have a leg injury.', 'PENDING', 1, 1, 1, NOW(), NOW()),
+('A250101120000124', 'Priya Singh', '8000000000', 'Sector 20, Street Corner', 28.6140, 77.2091, 'Cat', 0, 'Cat stuck in drain pipe. Needs immediate rescue.', 'IN_PROGRESS', 2, 3, 2, NOW(), NOW()),
+('A250101120000125', 'Raj Patel', '7000000000', 'Sector 25, Construction Site', 28.6141, 77.2092, 'Bird', 3, 'Bird with broken wing found at construction site.', 'RESCUED', 1, 2, 3, NOW(), NOW()),
+('A250101120000126', 'Sneha Gupta', '6000000000', 'Forest Area, Near Highway', 28.6142, 77.2093, 'Other', 2, 'Deer found injured near highway. Wildlife rescue needed.', 'PENDING', 4, 6, 4, NOW(), NOW()),
+('A250101120000127', 'Anonymous', '5000000000', 'Sector 10, Residential Area', 28.6143, 77.2094, 'Dog', 0, 'Dog hit by vehicle. Bleeding heavily. Emergency required.', 'IN_PROGRESS', 1, 4, 1, NOW(), NOW()),
+('A250101120000128', 'Vikram Singh', '4000000000', 'Sector 8, Near School', 28.6144, 77.2095, 'Cat', 2, 'Stray cat with skin infection. Needs medical attention.', 'PENDING', 5, 7, 5, NOW(), NOW()),
+('A250101120000129', 'Anita Patel', '3000000000', 'Sector 30, Market Area', 28.6145, 77.2096, 'Dog', 3, 'Puppy found abandoned. Looking for foster care.', 'RESCUED', 2, 4, 2, NOW(), NOW()),
+('A250101120000130', 'Rohit Kumar', '2000000000', 'Sector 35, Industrial Area', 28.6146, 77.2097, 'Bird', 0, 'Eagle with injured wing. Wildlife rescue required.', 'IN_PROGRESS', 4, 6, 6, NOW(), NOW()),
+('A250101120000131', 'Meera Sharma', '1000000000', 'Sector 9, Residential Complex', 28.6147, 77.2098, 'Cat', 2, 'Cat with eye infection. Needs veterinary care.', 'PENDING', 3, 5, 3, NOW(), NOW()),
+('A250101120000132', 'Anonymous', '9000000001', 'Sector 12, Park Area', 28.6148, 77.2099, 'Dog', 3, 'Healthy stray dog. Needs vaccination and neutering.', 'PENDING', 1, 8, 1, NOW(), NOW());
 
 -- Insert Donations
 INSERT INTO donations (donor_name, donor_email, amount, currency, category, payment_provider, payment_id, ngo_id, created_at, updated_at)
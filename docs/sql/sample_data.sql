@@ -12,7 +12,7 @@ VALUES
 
 INSERT INTO animal_cases (case_code, reporter_name, reporter_phone, location, animal_type, urgency, status, created_at, updated_at)
 VALUES
-('A250101120000123', 'Amit', '9000000000', 'Sector 15', 'Dog', 'Medium', 'PENDING', NOW(), NOW());
+('A250101120000123', 'Amit', '9000000000', 'Sector 15', 'Dog', 2, 'PENDING', NOW(), NOW());
 
 INSERT INTO donations (donor_name, donor_email, amount, currency, category, created_at, updated_at)
 VALUES
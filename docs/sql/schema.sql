@@ -57,18 +57,22 @@ CREATE TABLE animal_cases (
 	latitude DOUBLE,
 	longitude DOUBLE,
 	animal_type ENUM('Dog','Cat','Bird','Other') NOT NULL DEFAULT 'Other',
-	urgency VARCHAR(20) NOT NULL,
+	urgency SMALLINT NOT NULL DEFAULT 3, -- 0=Critical 1=High 2=Medium 3=Low
 	media_url VARCHAR(512),
 	notes TEXT,
 	status ENUM('PENDING','IN_PROGRESS','RESCUED','CLOSED') NOT NULL DEFAULT 'PENDING',
 	ngo_id INT,
 	assigned_volunteer_id INT,
 	hospital_id INT,
+	parent_case_id INT,
 	created_at DATETIME NOT NULL,
 	updated_at DATETIME NOT NULL,
 	CONSTRAINT fk_case_ngo FOREIGN KEY (ngo_id) REFERENCES ngos(id),
 	CONSTRAINT fk_case_vol FOREIGN KEY (assigned_volunteer_id) REFERENCES volunteers(id),
-	CONSTRAINT fk_case_hosp FOREIGN KEY (hospital_id) REFERENCES hospitals(id)
+	CONSTRAINT fk_case_hosp FOREIGN KEY (hospital_id) REFERENCES hospitals(id),
+	CONSTRAINT fk_case_parent FOREIGN KEY (parent_case_id) REFERENCES animal_cases(id),
+	INDEX ix_animal_cases_parent_case_id (parent_case_id),
+	INDEX ix_animal_cases_queue (status, urgency, created_at)
 ) ENGINE=InnoDB;
 
 CREATE TABLE donations (
@@ -0,0 +1,29 @@
+"""add case_code_workers lease table
+
+Revision ID: add_case_code_workers
+Revises: add_password_hash
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_case_code_workers'
+down_revision = 'add_password_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('case_code_workers',
+    sa.Column('worker_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('owner', sa.String(length=64), nullable=False),
+    sa.Column('leased_until', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('worker_id')
+    )
+
+
+def downgrade():
+    op.drop_table('case_code_workers')
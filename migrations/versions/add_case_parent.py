@@ -0,0 +1,30 @@
+"""link duplicate case reports to their parent case
+
+Revision ID: add_case_parent
+Revises: normalize_case_urgency
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_case_parent'
+down_revision = 'normalize_case_urgency'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('animal_cases') as batch_op:
+        batch_op.add_column(sa.Column('parent_case_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_case_parent', 'animal_cases', ['parent_case_id'], ['id'])
+        batch_op.create_index('ix_animal_cases_parent_case_id', ['parent_case_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('animal_cases') as batch_op:
+        batch_op.drop_index('ix_animal_cases_parent_case_id')
+        batch_op.drop_constraint('fk_case_parent', type_='foreignkey')
+        batch_op.drop_column('parent_case_id')
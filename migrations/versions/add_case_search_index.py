@@ -0,0 +1,58 @@
+"""full-text search index over case location, notes and reporter name
+
+Revision ID: add_case_search_index
+Revises: add_idempotency_keys
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_case_search_index'
+down_revision = 'add_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+# SQLite has no FULLTEXT indexes: an FTS5 table over animal_cases kept in sync by triggers
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS animal_cases_fts USING fts5("
+    "location, notes, reporter_name, content='animal_cases', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS animal_cases_fts_ai AFTER INSERT ON animal_cases BEGIN "
+    "INSERT INTO animal_cases_fts(rowid, location, notes, reporter_name) "
+    "VALUES (new.id, new.location, new.notes, new.reporter_name); END",
+    "CREATE TRIGGER IF NOT EXISTS animal_cases_fts_ad AFTER DELETE ON animal_cases BEGIN "
+    "INSERT INTO animal_cases_fts(animal_cases_fts, rowid, location, notes, reporter_name) "
+    "VALUES ('delete', old.id, old.location, old.notes, old.reporter_name); END",
+    "CREATE TRIGGER IF NOT EXISTS animal_cases_fts_au AFTER UPDATE OF location, notes, reporter_name "
+    "ON animal_cases BEGIN "
+    "INSERT INTO animal_cases_fts(animal_cases_fts, rowid, location, notes, reporter_name) "
+    "VALUES ('delete', old.id, old.location, old.notes, old.reporter_name); "
+    "INSERT INTO animal_cases_fts(rowid, location, notes, reporter_name) "
+    "VALUES (new.id, new.location, new.notes, new.reporter_name); END",
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name in ('mysql', 'mariadb'):
+        op.create_index(
+            'ft_animal_cases_text', 'animal_cases', ['location', 'notes', 'reporter_name'],
+            mysql_prefix='FULLTEXT',
+        )
+    elif bind.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        # Index the cases that already exist
+        op.execute("INSERT INTO animal_cases_fts(animal_cases_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name in ('mysql', 'mariadb'):
+        op.drop_index('ft_animal_cases_text', table_name='animal_cases')
+    elif bind.dialect.name == 'sqlite':
+        for trigger in ('animal_cases_fts_ai', 'animal_cases_fts_ad', 'animal_cases_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS animal_cases_fts")
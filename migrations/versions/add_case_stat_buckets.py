@@ -0,0 +1,35 @@
+"""hourly and daily case count rollups
+
+Revision ID: add_case_stat_buckets
+Revises: add_case_search_index
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_case_stat_buckets'
+down_revision = 'add_case_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Starts empty; run backfill_case_stats.py to count the existing history
+    op.create_table(
+        'case_stat_buckets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('value', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('granularity', 'dimension', 'bucket_start', 'value', name='uq_case_stat_buckets'),
+    )
+
+
+def downgrade():
+    op.drop_table('case_stat_buckets')
@@ -0,0 +1,57 @@
+"""case status history and rescue-time rollups
+
+Revision ID: add_case_status_events
+Revises: add_case_parent
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_case_status_events'
+down_revision = 'add_case_parent'
+branch_labels = None
+depends_on = None
+
+case_status = sa.Enum('PENDING', 'IN_PROGRESS', 'RESCUED', 'CLOSED', name='casestatus')
+
+
+def upgrade():
+    op.create_table(
+        'case_status_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('case_id', sa.Integer(), nullable=False),
+        sa.Column('from_status', case_status, nullable=True),
+        sa.Column('to_status', case_status, nullable=False),
+        sa.Column('actor', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['case_id'], ['animal_cases.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_case_status_events_case', 'case_status_events', ['case_id', 'id'])
+    op.create_table(
+        'case_duration_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('metric', sa.String(length=20), nullable=False),
+        sa.Column('scope', sa.String(length=120), nullable=False),
+        sa.Column('bucket', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total_seconds', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scope', 'metric', 'bucket', name='uq_case_duration_rollups'),
+    )
+
+    # Existing cases get their report event; earlier transitions were never recorded,
+    # so the rollups start empty rather than from guessed timestamps.
+    op.execute(
+        "INSERT INTO case_status_events (case_id, from_status, to_status, created_at) "
+        "SELECT id, NULL, 'PENDING', created_at FROM animal_cases"
+    )
+
+
+def downgrade():
+    op.drop_table('case_duration_rollups')
+    op.drop_index('ix_case_status_events_case', table_name='case_status_events')
+    op.drop_table('case_status_events')
@@ -0,0 +1,27 @@
+"""donation receipt digest
+
+Revision ID: add_donation_receipts
+Revises: add_media_metadata
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_donation_receipts'
+down_revision = 'add_media_metadata'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing donations have no digest: run render_receipts.py once to give them receipts
+    with op.batch_alter_table('donations') as batch_op:
+        batch_op.add_column(sa.Column('receipt_digest', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('donations') as batch_op:
+        batch_op.drop_column('receipt_digest')
@@ -0,0 +1,40 @@
+"""scheduled job leases and escalation watermarks
+
+Revision ID: add_escalation_sweeper
+Revises: add_case_stat_buckets
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_escalation_sweeper'
+down_revision = 'add_case_stat_buckets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scheduled_jobs',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('owner', sa.String(length=64), nullable=True),
+        sa.Column('leased_until', sa.DateTime(), nullable=True),
+        sa.Column('next_run_at', sa.DateTime(), nullable=False),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_table(
+        'escalation_watermarks',
+        sa.Column('urgency', sa.SmallInteger(), autoincrement=False, nullable=False),
+        sa.Column('case_created_at', sa.DateTime(), nullable=False),
+        sa.Column('case_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('urgency'),
+    )
+
+
+def downgrade():
+    op.drop_table('escalation_watermarks')
+    op.drop_table('scheduled_jobs')
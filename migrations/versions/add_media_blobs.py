@@ -0,0 +1,33 @@
+"""content-addressed media store
+
+Revision ID: add_media_blobs
+Revises: add_escalation_sweeper
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_media_blobs'
+down_revision = 'add_escalation_sweeper'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Files uploaded before this keep their filename URLs and are still served by name
+    op.create_table(
+        'media_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+
+
+def downgrade():
+    op.drop_table('media_blobs')
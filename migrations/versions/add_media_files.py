@@ -0,0 +1,48 @@
+"""media file catalog
+
+Revision ID: add_media_files
+Revises: add_resumable_uploads
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_media_files'
+down_revision = 'add_resumable_uploads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Run shard_uploads.py afterwards to move and catalog files saved by name in UPLOAD_FOLDER
+    op.create_table(
+        'media_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('kind', sa.String(length=10), nullable=True),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('case_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['case_id'], ['animal_cases.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_media_files_sha256', 'media_files', ['sha256'])
+    op.create_index('ix_media_files_case_id', 'media_files', ['case_id'])
+    op.create_index('ix_media_files_created_at', 'media_files', ['created_at'])
+    op.create_index('ix_media_files_kind_id', 'media_files', ['kind', 'id'])
+    op.create_index('ix_media_files_source_filename', 'media_files', ['source', 'filename'])
+
+
+def downgrade():
+    op.drop_index('ix_media_files_source_filename', table_name='media_files')
+    op.drop_index('ix_media_files_kind_id', table_name='media_files')
+    op.drop_index('ix_media_files_created_at', table_name='media_files')
+    op.drop_index('ix_media_files_case_id', table_name='media_files')
+    op.drop_index('ix_media_files_sha256', table_name='media_files')
+    op.drop_table('media_files')
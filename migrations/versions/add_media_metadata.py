@@ -0,0 +1,41 @@
+"""media metadata (dimensions, duration, capture time, GPS)
+
+Revision ID: add_media_metadata
+Revises: add_media_files
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_media_metadata'
+down_revision = 'add_media_files'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing blobs have metadata_at NULL, so the background extractor works through them too
+    with op.batch_alter_table('media_blobs') as batch_op:
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('duration_seconds', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('captured_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('metadata_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_media_blobs_metadata_at', ['metadata_at'])
+
+
+def downgrade():
+    with op.batch_alter_table('media_blobs') as batch_op:
+        batch_op.drop_index('ix_media_blobs_metadata_at')
+        batch_op.drop_column('metadata_at')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
+        batch_op.drop_column('captured_at')
+        batch_op.drop_column('duration_seconds')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
@@ -0,0 +1,39 @@
+"""resumable (tus-style) uploads
+
+Revision ID: add_resumable_uploads
+Revises: add_media_blobs
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_resumable_uploads'
+down_revision = 'add_media_blobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'resumable_uploads',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('length', sa.BigInteger(), nullable=False),
+        sa.Column('received', sa.BigInteger(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('case_id', sa.Integer(), nullable=True),
+        sa.Column('media_sha256', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['case_id'], ['animal_cases.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_resumable_uploads_updated_at', 'resumable_uploads', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_resumable_uploads_updated_at', table_name='resumable_uploads')
+    op.drop_table('resumable_uploads')
@@ -0,0 +1,30 @@
+"""add latitude/longitude to services, NGOs and volunteers
+
+Revision ID: add_service_coordinates
+Revises: add_notification_outbox
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_service_coordinates'
+down_revision = 'add_notification_outbox'
+branch_labels = None
+depends_on = None
+
+TABLES = ('hospitals', 'police_stations', 'fire_stations', 'blood_banks', 'ngos', 'volunteers')
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column('latitude', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_column(table, 'longitude')
+        op.drop_column(table, 'latitude')
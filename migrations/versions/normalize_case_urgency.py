@@ -0,0 +1,52 @@
+"""store case urgency as an ordered smallint and index the triage queue
+
+Revision ID: normalize_case_urgency
+Revises: add_service_coordinates
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'normalize_case_urgency'
+down_revision = 'add_service_coordinates'
+branch_labels = None
+depends_on = None
+
+# 0=Critical, 1=High, 2=Medium, 3=Low; anything unrecognised becomes Low
+LEVELS = (('critical', 0), ('high', 1), ('medium', 2), ('low', 3))
+
+
+def upgrade():
+    op.add_column('animal_cases', sa.Column('urgency_level', sa.SmallInteger(), nullable=True))
+    whens = ' '.join(f"WHEN '{name}' THEN {rank}" for name, rank in LEVELS)
+    op.execute(
+        f"UPDATE animal_cases SET urgency_level = CASE LOWER(TRIM(urgency)) {whens} ELSE 3 END"
+    )
+    with op.batch_alter_table('animal_cases') as batch_op:
+        batch_op.drop_column('urgency')
+        batch_op.alter_column(
+            'urgency_level',
+            new_column_name='urgency',
+            existing_type=sa.SmallInteger(),
+            nullable=False,
+            server_default='3',
+        )
+    op.create_index('ix_animal_cases_queue', 'animal_cases', ['status', 'urgency', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_animal_cases_queue', table_name='animal_cases')
+    op.add_column('animal_cases', sa.Column('urgency_label', sa.String(length=20), nullable=True))
+    whens = ' '.join(f"WHEN {rank} THEN '{name.title()}'" for name, rank in LEVELS)
+    op.execute(f"UPDATE animal_cases SET urgency_label = CASE urgency {whens} ELSE 'Low' END")
+    with op.batch_alter_table('animal_cases') as batch_op:
+        batch_op.drop_column('urgency')
+        batch_op.alter_column(
+            'urgency_label',
+            new_column_name='urgency',
+            existing_type=sa.String(length=20),
+            nullable=False,
+        )
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""
+Render donation receipts that are missing or were rendered from an older
+template or older donation details, RECEIPT_WORKERS at a time, and store
+them like other media. Run after changing RECEIPT_TEMPLATE (or after the
+add_donation_receipts migration, for existing donations); receipts that
+are current are skipped, so it is safe to run again. Donors are emailed
+when the donation is recorded, never from here.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from backend.app import create_app
+from backend.app.receipts import get_receipt_renderer
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        renderer = get_receipt_renderer()
+        try:
+            counts = renderer.regenerate()
+        finally:
+            renderer.shutdown()
+        print(f"Rendered {counts['rendered']} receipts ({counts['current']} current, {counts['failed']} failed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+"""
+Move files saved by name directly in UPLOAD_FOLDER (uploads from before
+content addressing) into the sharded ab/cd/<sha256> layout, point their
+cases at the new URLs and catalog them in media_files. Run once after the
+add_media_files migration; it is safe to run again.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from backend.app import create_app
+from backend.app.media import shard_legacy_files
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        moved = shard_legacy_files()
+        print(f"Moved {moved} files into the content-addressed store")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,9 @@
 import os
 import pytest
+
+# Keep the outbox dispatcher and other background threads out of the test run
+os.environ.setdefault("BACKGROUND_WORKERS_ENABLED", "false")
+
 from backend.app import create_app
 from backend.app.extensions import db
 
@@ -11,6 +15,8 @@ def app(tmp_path, monkeypatch):
 	monkeypatch.setenv("ALLOWED_ORIGINS", "*")
 	monkeypatch.setenv("UPLOAD_FOLDER", str(tmp_path / "uploads"))
 	app = create_app()
+	# create_app points UPLOAD_FOLDER at ./uploads; keep files stored by tests out of the checkout
+	app.config["UPLOAD_FOLDER"] = str(tmp_path / "uploads")
 	with app.app_context():
 		db.create_all()
 		yield app
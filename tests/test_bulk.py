@@ -0,0 +1,112 @@
+from backend.app.case_metrics import duration_summary
+from backend.app.extensions import db
+from backend.app.models import NGO, AnimalCase, CaseStatus, CaseStatusEvent, NotificationOutbox, Volunteer
+
+
+def _volunteers(n, approved=False, ngo_id=None):
+	vols = [
+		Volunteer(name=f"V{i}", email=f"bulk{i}@example.com", phone="1", approved=approved, ngo_id=ngo_id)
+		for i in range(n)
+	]
+	db.session.add_all(vols)
+	db.session.commit()
+	return [v.id for v in vols]
+
+
+def _cases(n, status=CaseStatus.PENDING, **extra):
+	cases = [
+		AnimalCase(case_code=f"B{status.name[:2]}{i}", reporter_phone="9", location="Road, Pune", status=status, **extra)
+		for i in range(n)
+	]
+	db.session.add_all(cases)
+	db.session.commit()
+	return [c.id for c in cases]
+
+
+def _bulk(client, **payload):
+	return client.post("/api/admin/bulk", json=payload)
+
+
+def test_approve_by_ids_reports_per_id_outcomes(client, app):
+	app.config["BULK_CHUNK_SIZE"] = 7
+	ids = _volunteers(20)
+	db.session.get(Volunteer, ids[0]).approved = True
+	db.session.commit()
+
+	res = _bulk(client, op="approve", entity="volunteer", ids=ids + [99999])
+	body = res.get_json()
+	assert res.status_code == 200
+	assert body["summary"] == {"unchanged": 1, "updated": 19, "not_found": 1}
+	outcomes = {r["id"]: r["outcome"] for r in body["results"]}
+	assert outcomes[ids[0]] == "unchanged" and outcomes[99999] == "not_found"
+	assert Volunteer.query.filter_by(approved=True).count() == 20
+
+
+def test_approve_by_filter_uses_keyset_chunks_and_truncates(client, app):
+	app.config.update(BULK_CHUNK_SIZE=4, BULK_MAX_ROWS=10)
+	ngo = NGO(name="N", email="n@example.com", phone="1")
+	db.session.add(ngo)
+	db.session.commit()
+	_volunteers(12, ngo_id=ngo.id)
+
+	body = _bulk(client, op="approve", entity="volunteer", filter={"ngo_id": ngo.id, "approved": False}).get_json()
+	assert body["summary"] == {"updated": 10} and body["truncated"] is True
+	body = _bulk(client, op="approve", entity="volunteer", filter={"ngo_id": ngo.id, "approved": False}).get_json()
+	assert body["summary"] == {"updated": 2} and body["truncated"] is False
+
+
+def test_bulk_status_writes_history_and_cascades_to_duplicates(client):
+	ids = _cases(5)
+	done = _cases(1, status=CaseStatus.RESCUED)[0]
+	dup = AnimalCase(case_code="DUP", reporter_phone="9", location="Road, Pune", parent_case_id=ids[0])
+	db.session.add(dup)
+	db.session.commit()
+
+	body = _bulk(client, op="status", ids=ids + [done], status="rescued").get_json()
+	assert body["summary"] == {"unchanged": 1, "updated": 5}
+	assert AnimalCase.query.filter_by(status=CaseStatus.RESCUED).count() == 7
+	assert CaseStatusEvent.query.filter_by(to_status=CaseStatus.RESCUED).count() == 6
+	assert duration_summary("city:pune")["rescue"]["count"] == 5
+
+
+def test_bulk_reassign_and_delete_conflicts(client):
+	vid = _volunteers(1, approved=True)[0]
+	open_ids = _cases(3)
+	closed = _cases(1, status=CaseStatus.CLOSED)[0]
+
+	body = _bulk(client, op="reassign", ids=open_ids + [closed], volunteer_id=vid).get_json()
+	assert body["summary"] == {"conflict": 1, "updated": 3}
+	assert AnimalCase.query.filter_by(assigned_volunteer_id=vid).count() == 3
+	assert NotificationOutbox.query.filter_by(kind="case_assignment").count() == 1
+
+	body = _bulk(client, op="delete", entity="volunteer", ids=[vid]).get_json()
+	assert body["results"] == [{"id": vid, "outcome": "conflict", "reason": "volunteer has assigned cases"}]
+
+	body = _bulk(client, op="delete", entity="case", ids=open_ids).get_json()
+	assert body["summary"] == {"deleted": 3}
+	assert _bulk(client, op="delete", entity="volunteer", ids=[vid]).get_json()["summary"] == {"deleted": 1}
+
+
+def test_bulk_rejects_bad_requests(client):
+	assert _bulk(client, op="explode", ids=[1]).status_code == 400
+	assert _bulk(client, op="approve", entity="case", ids=[1]).status_code == 400
+	assert _bulk(client, op="status", ids=[1], status="nope").status_code == 400
+	assert _bulk(client, op="approve", entity="ngo", ids=[1], filter={"approved": False}).status_code == 400
+	assert _bulk(client, op="approve", entity="ngo", filter={}).status_code == 400
+	assert _bulk(client, op="approve", entity="ngo", filter={"email": "x"}).status_code == 400
+	assert _bulk(client, op="reassign", ids=[1], volunteer_id=404).status_code == 400
+	assert _bulk(client, op="approve", entity="volunteer", filter={"ngo_id": "x"}).status_code == 400
+	assert _bulk(client, op="approve", entity="volunteer", filter={"approved": "no"}).status_code == 400
+	assert _bulk(client, op="approve", entity="volunteer", ids=[1], approved="maybe").status_code == 400
+	assert _bulk(client, op="delete", entity="case", ids="12").status_code == 400
+	assert _bulk(client, op="status", status="CLOSED", ids=[True, 3.9]).status_code == 400
+
+
+def test_string_booleans_are_parsed_not_truth_tested(client):
+	approved = _volunteers(2, approved=True)
+
+	body = _bulk(client, op="approve", entity="volunteer", filter={"approved": "false"}, approved="false").get_json()
+	assert body["summary"] == {}
+	body = _bulk(client, op="approve", entity="volunteer", filter={"approved": "true"}, approved="false").get_json()
+	assert body["summary"] == {"updated": 2}
+	assert Volunteer.query.filter(Volunteer.id.in_(approved), Volunteer.approved.is_(False)).count() == 2
@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.app.utils import (
+	CASE_CODE_LENGTH,
+	MAX_SEQUENCE,
+	CaseCodeGenerator,
+	generate_case_code,
+	lease_worker_id,
+)
+
+
+def _codes_for_worker(worker_id, count):
+	gen = CaseCodeGenerator(worker_id=worker_id)
+	return [gen.next_code() for _ in range(count)]
+
+
+def test_case_code_is_short_and_typeable():
+	code = generate_case_code()
+	assert code.startswith("A")
+	assert len(code) == CASE_CODE_LENGTH + 1
+	assert not set(code[1:]) & set("ILOU")
+
+
+def test_codes_sort_by_creation_time():
+	gen = CaseCodeGenerator(worker_id=1)
+	codes = [gen.next_code() for _ in range(1000)]
+	assert codes == sorted(codes)
+
+
+def test_threaded_stress_has_no_collisions():
+	gen = CaseCodeGenerator(worker_id=7)
+	results = []
+	lock = threading.Lock()
+
+	def worker():
+		local = [gen.next_code() for _ in range(20_000)]
+		with lock:
+			results.extend(local)
+
+	threads = [threading.Thread(target=worker) for _ in range(8)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+
+	assert len(results) == 160_000
+	assert len(set(results)) == len(results)
+
+
+def test_sequence_overflow_borrows_next_millisecond():
+	gen = CaseCodeGenerator(worker_id=3)
+	ids = [gen.next_id() for _ in range(MAX_SEQUENCE * 3)]
+	assert len(set(ids)) == len(ids)
+
+
+def test_processes_with_distinct_workers_never_collide():
+	with ProcessPoolExecutor(max_workers=4) as pool:
+		batches = list(pool.map(_codes_for_worker, range(4), [25_000] * 4))
+	codes = [c for batch in batches for c in batch]
+	assert len(set(codes)) == len(codes)
+
+
+def test_worker_ids_are_leased_uniquely(app):
+	first = lease_worker_id("node-a:1")
+	second = lease_worker_id("node-b:1")
+	assert first != second
+	assert lease_worker_id("node-a:1", first) == first
@@ -0,0 +1,107 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from backend.app.case_metrics import bucket_bounds, bucket_for, case_city, duration_summary, percentile, record_status_change
+from backend.app.extensions import db, jwt
+from backend.app.models import NGO, AnimalCase, CaseDurationRollup, CaseStatus, CaseStatusEvent
+
+
+@pytest.fixture
+def auth(app):
+	jwt.init_app(app)  # create_app leaves JWT off; the status endpoint still requires a token
+	with app.test_request_context():
+		return {"Authorization": f"Bearer {create_access_token(identity='7')}"}
+
+
+def _case(code, location="MG Road, Bengaluru", ngo_id=None, reported_minutes_ago=0):
+	case = AnimalCase(
+		case_code=code, reporter_phone="9", location=location, ngo_id=ngo_id,
+		created_at=datetime.utcnow() - timedelta(minutes=reported_minutes_ago),
+	)
+	db.session.add(case)
+	db.session.flush()
+	record_status_change(case, None, CaseStatus.PENDING, at=case.created_at)
+	return case
+
+
+def test_buckets_and_percentile_track_exact_values():
+	assert bucket_for(0) == 0 and bucket_for(59) == 0 and bucket_for(60) == 1
+	for seconds in (61, 600, 3600, 86400):
+		lo, hi = bucket_bounds(bucket_for(seconds))
+		assert lo <= seconds < hi
+
+	rng = random.Random(1)
+	values = sorted(rng.uniform(60, 7200) for _ in range(5000))
+	histogram: dict[int, int] = {}
+	for v in values:
+		histogram[bucket_for(v)] = histogram.get(bucket_for(v), 0) + 1
+	for q in (0.5, 0.9):
+		exact = values[int(q * len(values))]
+		assert percentile(list(histogram.items()), q) == pytest.approx(exact, rel=0.13)
+	assert percentile([], 0.5) is None
+
+
+def test_case_city():
+	assert case_city("Sector 15, Near Park, Bengaluru ") == "bengaluru"
+	assert case_city("MG Road") is None
+	assert case_city(None) is None
+
+
+def test_status_change_writes_history_and_rollups(client, auth):
+	ngo = NGO(name="Paws", email="p@example.com", phone="1")
+	db.session.add(ngo)
+	db.session.flush()
+	case = _case("T1", ngo_id=ngo.id, reported_minutes_ago=30)
+	db.session.commit()
+
+	for status in ("IN_PROGRESS", "RESCUED", "IN_PROGRESS", "CLOSED"):
+		res = client.patch(f"/api/cases/{case.id}/status", json={"status": status}, headers=auth)
+		assert res.status_code == 200
+
+	timeline = client.get(f"/api/cases/{case.id}/timeline").get_json()
+	assert [(e["from_status"], e["to_status"]) for e in timeline["events"]] == [
+		(None, "PENDING"), ("PENDING", "IN_PROGRESS"), ("IN_PROGRESS", "RESCUED"),
+		("RESCUED", "IN_PROGRESS"), ("IN_PROGRESS", "CLOSED"),
+	]
+	assert timeline["events"][1]["actor"] == "7"
+	assert timeline["events"][1]["seconds_since_report"] >= 30 * 60
+
+	# Re-entering IN_PROGRESS is history, not a second assignment
+	for scope in ("all", f"ngo:{ngo.id}", "city:bengaluru"):
+		summary = duration_summary(scope)
+		assert summary["assignment"]["count"] == 1
+		assert summary["rescue"]["count"] == 1
+		assert summary["assignment"]["p50_seconds"] == pytest.approx(1800, rel=0.13)
+
+	sla = client.get(f"/api/cases/sla?ngo_id={ngo.id}").get_json()
+	assert sla["scope"] == f"ngo:{ngo.id}" and sla["metrics"]["resolution"]["count"] == 1
+	assert client.get("/api/cases/sla?city=Bengaluru").get_json()["scope"] == "city:bengaluru"
+
+
+def test_percentiles_across_cases(client, auth):
+	for n, minutes in enumerate([5, 10, 20, 40, 80, 160, 320, 640, 1280, 2560]):
+		case = _case(f"P{n}", reported_minutes_ago=minutes)
+		case.status = CaseStatus.RESCUED
+		record_status_change(case, CaseStatus.PENDING, CaseStatus.RESCUED)
+	db.session.commit()
+
+	rescue = client.get("/api/cases/sla").get_json()["metrics"]["rescue"]
+	assert rescue["count"] == 10
+	assert 60 * 60 < rescue["p50_seconds"] < 160 * 60
+	assert 1280 * 60 * 0.8 < rescue["p90_seconds"] < 2560 * 60
+	assert db.session.query(CaseDurationRollup).filter_by(scope="all", metric="rescue").count() <= 10
+
+
+def test_reported_case_and_duplicates_get_history(client, auth):
+	first = client.post("/api/cases", json={"reporter_phone": "9", "location": "A, Pune", "latitude": 18.52, "longitude": 73.85}).get_json()
+	repeat = client.post("/api/cases", json={"reporter_phone": "9", "location": "A, Pune", "latitude": 18.52, "longitude": 73.85}).get_json()
+	assert repeat["duplicate_of"] == first["case_id"]
+
+	client.patch(f"/api/cases/{first['case_id']}/status", json={"status": "RESCUED"}, headers=auth)
+	events = CaseStatusEvent.query.filter_by(case_id=repeat["case_id"]).order_by(CaseStatusEvent.id).all()
+	assert [e.to_status for e in events] == [CaseStatus.PENDING, CaseStatus.RESCUED]
+	# Only the root case counts towards rescue times
+	assert duration_summary("city:pune")["rescue"]["count"] == 1
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+from flask_jwt_extended import create_access_token
+
+from backend.app.case_stats import backfill, bucket_start
+from backend.app.extensions import db, jwt
+from backend.app.models import CaseStatBucket
+
+
+def _report(client, **fields):
+	payload = {"reporter_phone": "9", "location": "MG Road, Bengaluru", **fields}
+	res = client.post("/api/cases", json=payload)
+	assert res.status_code == 201
+	return res.get_json()["case_id"]
+
+
+def _trend(client, **params):
+	res = client.get("/api/analytics/cases", query_string=params)
+	assert res.status_code == 200, res.get_json()
+	return res.get_json()["series"]
+
+
+def _total(points):
+	return sum(p["count"] for p in points)
+
+
+def test_reports_and_status_changes_are_counted(client, app):
+	jwt.init_app(app)
+	with app.test_request_context():
+		token = create_access_token(identity="admin")
+
+	first = _report(client, animal_type="Dog", urgency="Critical")
+	_report(client, animal_type="Cat", location="Indiranagar, Bengaluru")
+	_report(client, animal_type="Dog", location="Park Street, Kolkata")
+	client.patch(f"/api/cases/{first}/status", json={"status": "RESCUED"}, headers={"Authorization": f"Bearer {token}"})
+
+	assert _total(_trend(client)[""]) == 3
+	assert _total(_trend(client, granularity="day")[""]) == 3
+	by_type = _trend(client, dimension="animal_type")
+	assert {k: _total(v) for k, v in by_type.items()} == {"Cat": 1, "Dog": 2}
+	by_city = _trend(client, dimension="city", values="Bengaluru,Pune")
+	assert {k: _total(v) for k, v in by_city.items()} == {"bengaluru": 2, "pune": 0}
+	by_status = _trend(client, dimension="status")
+	assert {k: _total(v) for k, v in by_status.items()} == {"PENDING": 3, "RESCUED": 1}
+	assert _total(_trend(client, dimension="urgency")["Critical"]) == 1
+
+
+def test_range_is_zero_filled_and_validated(client):
+	now = bucket_start(datetime.utcnow(), "hour")
+	_report(client)
+	points = _trend(client, **{"from": (now - timedelta(hours=5)).isoformat(), "to": (now + timedelta(hours=2)).isoformat()})[""]
+	assert len(points) == 7 and points[0]["t"] == (now - timedelta(hours=5)).isoformat()
+	assert [p["count"] for p in points[:5]] == [0] * 5 and _total(points) == 1
+	assert client.get("/api/analytics/cases?granularity=week").status_code == 400
+	assert client.get("/api/analytics/cases?from=2020-01-01&to=2024-01-01").status_code == 400
+	assert client.get("/api/analytics/cases?from=yesterday").status_code == 400
+
+
+def test_range_with_an_offset_is_converted_to_utc(client):
+	now = bucket_start(datetime.utcnow(), "hour")
+	_report(client)
+	ist = timezone(timedelta(hours=5, minutes=30))
+	start = (now - timedelta(hours=1)).replace(tzinfo=timezone.utc).astimezone(ist)
+	end = (now + timedelta(hours=2)).replace(tzinfo=timezone.utc).astimezone(ist)
+	res = client.get("/api/analytics/cases", query_string={"from": start.isoformat(), "to": end.isoformat()})
+	body = res.get_json()
+	assert body["from"] == (now - timedelta(hours=1)).isoformat() and body["to"] == (now + timedelta(hours=2)).isoformat()
+	assert _total(body["series"][""]) == 1
+
+
+def test_backfill_rebuilds_counts_from_history(client):
+	for _ in range(3):
+		_report(client)
+	live = {(b.granularity, b.dimension, b.value, b.bucket_start): b.count for b in CaseStatBucket.query}
+	CaseStatBucket.query.delete()
+	db.session.commit()
+
+	backfill(batch_size=2)
+	rebuilt = {(b.granularity, b.dimension, b.value, b.bucket_start): b.count for b in CaseStatBucket.query}
+	assert rebuilt == live
@@ -0,0 +1,85 @@
+import hashlib
+import io
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.media import shard_legacy_files
+from backend.app.models import AnimalCase, CaseStatus, MediaBlob, MediaFile
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2000
+MP4 = b"\x00\x00\x00\x18ftypisom" + b"\x00" * 2000
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+	app.config["UPLOAD_FOLDER"] = str(tmp_path)
+	return tmp_path
+
+
+def _post(client, path, content, name, **fields):
+	data = {"file": (io.BytesIO(content), name), **fields}
+	return client.post(path, data=data, content_type="multipart/form-data")
+
+
+def test_uploads_are_cataloged(client, uploads):
+	_post(client, "/api/uploads", PNG, "dog.png")
+	res = _post(client, "/api/cases", MP4, "rescue.mp4", reporter_phone="9", location="MG Road")
+	case_id = res.get_json()["case_id"]
+
+	files = client.get("/api/data/files").get_json()["files"]
+	assert [(f["filename"], f["kind"], f["source"], f["case_id"]) for f in files] == [
+		("rescue.mp4", "video", "case", case_id),
+		("dog.png", "image", "upload", None),
+	]
+	assert files[1]["url"] == f"/api/uploads/{hashlib.sha256(PNG).hexdigest()}" and files[1]["size"] == len(PNG)
+
+
+def test_files_are_paged_and_filtered(client, uploads):
+	for i in range(5):
+		_post(client, "/api/uploads", PNG + bytes([i]), f"photo{i}.png")
+	_post(client, "/api/uploads", MP4, "clip.mp4")
+
+	names, cursor = [], None
+	while True:
+		body = client.get("/api/data/files", query_string={"kind": "image", "limit": 2, "cursor": cursor}).get_json()
+		names += [f["filename"] for f in body["files"]]
+		cursor = body["next_cursor"]
+		if cursor is None:
+			break
+	assert names == [f"photo{i}.png" for i in reversed(range(5))]
+	assert [f["filename"] for f in client.get("/api/data/files?content_type=video/mp4").get_json()["files"]] == ["clip.mp4"]
+	assert client.get("/api/data/files?since=2999-01-01T00:00:00").get_json()["files"] == []
+	assert client.get("/api/data/files?since=yesterday").status_code == 400
+
+
+def test_deleting_a_case_drops_its_catalog_entries(client, uploads):
+	case_id = _post(client, "/api/cases", MP4, "rescue.mp4", reporter_phone="9", location="MG Road").get_json()["case_id"]
+	res = client.post("/api/admin/bulk", json={"op": "delete", "entity": "case", "ids": [case_id]})
+	assert res.status_code == 200
+	assert MediaFile.query.count() == 0 and MediaBlob.query.count() == 0
+
+
+def test_legacy_files_are_sharded_and_redirected(client, uploads):
+	(uploads / "photo.png").write_bytes(PNG)
+	(uploads / "fake.png").write_bytes(b"not an image")
+	(uploads / "ngos_export.csv").write_bytes(b"name\nA\n")
+	case = AnimalCase(
+		case_code="LEGACY0000001", reporter_phone="9", location="MG Road", media_url="/uploads/photo.png",
+		status=CaseStatus.PENDING,
+	)
+	db.session.add(case)
+	db.session.commit()
+
+	assert shard_legacy_files() == 1
+	sha = hashlib.sha256(PNG).hexdigest()
+	assert not (uploads / "photo.png").exists() and (uploads / sha[:2] / sha[2:4] / sha).read_bytes() == PNG
+	assert (uploads / "fake.png").exists() and (uploads / "ngos_export.csv").exists()
+	assert db.session.get(AnimalCase, case.id).media_url == f"/api/uploads/{sha}"
+	entry = MediaFile.query.one()
+	assert (entry.source, entry.case_id, entry.filename) == ("legacy", case.id, "photo.png")
+
+	res = client.get("/api/uploads/photo.png")
+	assert res.status_code == 301 and res.headers["Location"].endswith(f"/api/uploads/{sha}")
+	assert client.get("/api/uploads/missing.png").status_code == 404
+	assert shard_legacy_files() == 0
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.app.escalation import JOB_NAME, EscalationSweeper, LeaseLost
+from backend.app.extensions import db
+from backend.app.models import NGO, AnimalCase, CaseStatus, NotificationOutbox, ScheduledJob, Urgency
+
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+
+
+@pytest.fixture
+def sweeper(app):
+	app.config.update(
+		ESCALATION_DEADLINES_MINUTES="Critical=15,Low=1440",
+		ESCALATION_EMAILS="ops@example.com",
+		ESCALATION_INTERVAL_SECONDS=60,
+		ESCALATION_BATCH_SIZE=2,
+	)
+	return app.extensions["escalation_sweeper"]
+
+
+def _case(code, urgency, minutes_old, status=CaseStatus.PENDING, ngo=None):
+	case = AnimalCase(
+		case_code=code, reporter_phone="9", location="MG Road", urgency=urgency, status=status,
+		ngo=ngo, created_at=NOW - timedelta(minutes=minutes_old),
+	)
+	db.session.add(case)
+	return case
+
+
+def _escalated():
+	return sorted(
+		(n.recipient, n.subject.split()[3])
+		for n in NotificationOutbox.query.filter_by(kind="case_escalation")
+	)
+
+
+def test_overdue_pending_cases_are_escalated_once(app, sweeper):
+	ngo = NGO(name="Paws", email="paws@example.com", phone="1")
+	_case("C1", Urgency.CRITICAL, 20, ngo=ngo)
+	_case("C2", Urgency.CRITICAL, 30)
+	_case("C3", Urgency.CRITICAL, 40)
+	_case("C4", Urgency.CRITICAL, 10)  # not yet due
+	_case("C5", Urgency.CRITICAL, 50, status=CaseStatus.IN_PROGRESS)
+	_case("L1", Urgency.LOW, 60)  # within a day
+	_case("M1", Urgency.MEDIUM, 600)  # no deadline configured
+	db.session.commit()
+
+	assert sweeper.run_if_due(NOW) == 3
+	assert _escalated() == [
+		("ops@example.com", "C1"), ("ops@example.com", "C2"), ("ops@example.com", "C3"), ("paws@example.com", "C1"),
+	]
+
+	# Same interval: no second sweep. Next interval: only newly overdue cases.
+	assert sweeper.run_if_due(NOW + timedelta(seconds=30)) is None
+	assert sweeper.run_if_due(NOW + timedelta(minutes=6)) == 1
+	assert len(_escalated()) == 5 and ("ops@example.com", "C4") in _escalated()
+
+
+def test_only_one_worker_sweeps_per_interval(app, sweeper):
+	_case("C1", Urgency.CRITICAL, 20)
+	db.session.commit()
+	other = EscalationSweeper()
+	other.app = app
+
+	assert sweeper.run_if_due(NOW) == 1
+	assert other.run_if_due(NOW + timedelta(seconds=1)) is None
+	assert other.run_if_due(NOW + timedelta(seconds=61)) == 0
+	assert len(_escalated()) == 1
+
+
+def test_expired_lease_is_taken_over(app, sweeper):
+	_case("C1", Urgency.CRITICAL, 20)
+	db.session.add(ScheduledJob(name=JOB_NAME, owner="dead-worker", leased_until=NOW - timedelta(seconds=1), next_run_at=NOW))
+	db.session.commit()
+
+	assert sweeper.run_if_due(NOW) == 1
+	job = db.session.get(ScheduledJob, JOB_NAME)
+	assert job.owner is None and job.next_run_at == NOW + timedelta(seconds=60)
+
+
+def test_sweeper_that_lost_its_lease_writes_nothing(app, sweeper):
+	_case("C1", Urgency.CRITICAL, 20)
+	db.session.commit()
+	assert sweeper._claim(NOW)
+	# The lease expired and another worker took over before the first batch committed
+	ScheduledJob.query.filter_by(name=JOB_NAME).update({"owner": "other-worker"})
+	db.session.commit()
+
+	with pytest.raises(LeaseLost):
+		sweeper.sweep(NOW)
+	db.session.rollback()
+	assert _escalated() == []
+
+
+def test_cases_older_than_lookback_are_not_escalated(app, sweeper):
+	app.config["ESCALATION_LOOKBACK_HOURS"] = 1
+	_case("C1", Urgency.CRITICAL, 120)
+	db.session.commit()
+	assert sweeper.run_if_due(NOW) == 0
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from backend.app.extensions import db
+from backend.app.models import AnimalCase, Donation, IdempotencyKey, NotificationOutbox
+
+CASE = {"reporter_phone": "9999999999", "location": "MG Road", "reporter_email": "r@example.com"}
+DONATION = {"amount": 500, "category": "Medical Aid", "donor_email": "d@example.com", "payment_id": "pay_1"}
+
+
+def _post(client, path, payload, key=None):
+	headers = {"Idempotency-Key": key} if key else {}
+	return client.post(path, json=payload, headers=headers)
+
+
+def test_retried_report_replays_original_response(client):
+	first = _post(client, "/api/cases", CASE, key="k-1")
+	assert first.status_code == 201
+	retry = _post(client, "/api/cases", CASE, key="k-1")
+	assert retry.status_code == 201
+	assert retry.get_json() == first.get_json()
+	assert retry.headers["Idempotent-Replayed"] == "true"
+	assert AnimalCase.query.count() == 1
+	assert NotificationOutbox.query.filter_by(kind="case_confirmation").count() == 1
+
+
+def test_replay_survives_a_cold_cache(client, app):
+	first = _post(client, "/api/cases", CASE, key="k-2").get_json()
+	app.extensions["idempotency_cache"]._entries.clear()  # as if the retry hit another worker
+	retry = _post(client, "/api/cases", CASE, key="k-2")
+	assert retry.get_json() == first and retry.headers["Idempotent-Replayed"] == "true"
+	assert AnimalCase.query.count() == 1
+
+
+def test_key_reuse_with_different_body_is_rejected(client, app):
+	_post(client, "/api/cases", CASE, key="k-3")
+	assert _post(client, "/api/cases", {**CASE, "location": "Elsewhere"}, key="k-3").status_code == 422
+	app.extensions["idempotency_cache"]._entries.clear()
+	assert _post(client, "/api/cases", {**CASE, "location": "Elsewhere"}, key="k-3").status_code == 422
+
+
+def test_failed_requests_are_not_remembered(client):
+	assert _post(client, "/api/cases", {"location": "MG Road"}, key="k-4").status_code == 400
+	assert IdempotencyKey.query.count() == 0
+	assert _post(client, "/api/cases", {**CASE}, key="k-4").status_code == 201
+
+
+def test_in_flight_and_abandoned_claims(client):
+	now = datetime.utcnow()
+	row = IdempotencyKey(
+		scope="cases.report", key="k-5", fingerprint="x", locked_until=now + timedelta(seconds=60),
+		expires_at=now + timedelta(days=1),
+	)
+	db.session.add(row)
+	db.session.commit()
+	res = _post(client, "/api/cases", CASE, key="k-5")
+	assert res.status_code == 409 and res.headers["Retry-After"]
+
+	row.locked_until = now - timedelta(seconds=1)  # its worker died
+	db.session.commit()
+	assert _post(client, "/api/cases", CASE, key="k-5").status_code == 201
+
+
+def test_requests_without_key_are_untouched(client):
+	assert _post(client, "/api/cases", CASE).status_code == 201
+	assert _post(client, "/api/cases", CASE).status_code == 201
+	assert IdempotencyKey.query.count() == 0
+
+
+def test_replayed_payment_returns_existing_donation(client):
+	first = _post(client, "/api/donations", DONATION)
+	assert first.status_code == 201
+	replay = _post(client, "/api/donations", DONATION)
+	assert replay.status_code == 200
+	assert replay.get_json()["id"] == first.get_json()["id"]
+	assert Donation.query.count() == 1
+	assert NotificationOutbox.query.filter_by(kind="donation_receipt").count() == 1
+
+	keyed = _post(client, "/api/donations", {**DONATION, "payment_id": "pay_2"}, key="d-1")
+	again = _post(client, "/api/donations", {**DONATION, "payment_id": "pay_2"}, key="d-1")
+	assert again.get_json() == keyed.get_json() and again.status_code == 201
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.ingest import GroupCommitWriter
+from backend.app.models import AnimalCase, CaseStatusEvent, NotificationOutbox
+
+
+@pytest.fixture
+def group_commit(app):
+	app.config.update(INGEST_GROUP_COMMIT=True, INGEST_MAX_WAIT_MS=50)
+	writer = GroupCommitWriter(app, max_batch=50, max_wait_ms=50)
+	writer.init_app(app)
+	yield writer
+	writer.stop()
+
+
+def _report(app, n):
+	payload = {"reporter_phone": "9", "location": f"Street {n}", "reporter_email": f"r{n}@example.com"}
+	return app.test_client().post("/api/cases", json=payload)
+
+
+def test_concurrent_reports_share_commits_and_are_readable(app, group_commit):
+	with ThreadPoolExecutor(max_workers=20) as pool:
+		responses = list(pool.map(lambda n: _report(app, n), range(40)))
+
+	assert all(r.status_code == 201 for r in responses)
+	ids = {r.get_json()["case_id"] for r in responses}
+	assert len(ids) == 40
+	# Read-your-writes: every case is committed by the time its request returns
+	db.session.expire_all()
+	assert AnimalCase.query.filter(AnimalCase.id.in_(ids)).count() == 40
+	assert CaseStatusEvent.query.count() == 40
+	assert NotificationOutbox.query.filter_by(kind="case_confirmation").count() == 40
+	assert group_commit.units_total == 40
+	assert group_commit.batches_total < 40
+
+
+def test_failing_unit_does_not_fail_its_batch(app, group_commit):
+	gate = threading.Event()
+
+	def good(n):
+		def unit():
+			gate.wait(1)
+			case = AnimalCase(case_code=f"G{n}", reporter_phone="9", location="X")
+			db.session.add(case)
+			return lambda: case.id
+		return unit
+
+	def bad():
+		db.session.add(AnimalCase(case_code="G0", reporter_phone="9", location="X"))  # duplicate code
+		return lambda: None
+
+	futures = [group_commit.submit(good(n)) for n in range(3)] + [group_commit.submit(bad)]
+	gate.set()
+	assert all(isinstance(f.result(5), int) for f in futures[:3])
+	with pytest.raises(Exception):
+		futures[3].result(5)
+	assert group_commit.fallbacks_total == 1
@@ -0,0 +1,82 @@
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from flask_mail import Message
+
+from backend.app.extensions import mail
+from backend.app.mailer import get_mail_pool, send_messages
+
+
+class _CountingSink:
+	def __init__(self):
+		self.messages = []
+		self.sessions = 0
+
+	async def handle_EHLO(self, server, session, envelope, hostname, responses):
+		self.sessions += 1
+		session.host_name = hostname
+		return responses
+
+	async def handle_DATA(self, server, session, envelope):
+		self.messages.append(envelope)
+		return "250 OK"
+
+
+def _free_port():
+	with socket.socket() as s:
+		s.bind(("127.0.0.1", 0))
+		return s.getsockname()[1]
+
+
+@pytest.fixture()
+def sink(app):
+	handler = _CountingSink()
+	controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+	controller.start()
+	app.config.update(
+		MAIL_SERVER="127.0.0.1",
+		MAIL_PORT=controller.port,
+		MAIL_USE_TLS=False,
+		MAIL_USE_SSL=False,
+		MAIL_USERNAME=None,
+		MAIL_PASSWORD=None,
+		MAIL_DEFAULT_SENDER="no-reply@resqtrack.local",
+	)
+	mail.init_app(app)
+	app.extensions.pop("smtp_pool", None)
+	yield handler
+	get_mail_pool().close_all()
+	controller.stop()
+
+
+def _messages(n):
+	return [Message(subject=f"receipt {i}", recipients=[f"donor{i}@example.com"], body="thanks") for i in range(n)]
+
+
+def test_batches_reuse_one_connection(sink):
+	assert send_messages(_messages(20)) == [None] * 20
+	assert send_messages(_messages(5)) == [None] * 5
+
+	assert len(sink.messages) == 25
+	assert sink.sessions == 1
+	assert get_mail_pool().opened_total == 1
+
+
+def test_idle_connections_are_recycled(app, sink):
+	pool = get_mail_pool()
+	pool.idle_timeout = 0
+	send_messages(_messages(1))
+	send_messages(_messages(1))
+	assert pool.opened_total == 2
+
+
+def test_dropped_connection_is_retried(sink):
+	pool = get_mail_pool()
+	send_messages(_messages(1))
+	# Simulate the server closing an idle connection under us
+	pool._idle[0].conn.host.close()
+
+	assert send_messages(_messages(3)) == [None] * 3
+	assert len(sink.messages) == 4
+	assert pool.opened_total == 2
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.media import INCOMING_DIR, release_blobs, remove_blob_files, sniff_content_type
+from backend.app.models import MediaBlob, MediaFile
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2000
+MP4 = b"\x00\x00\x00\x18ftypisom" + b"\x00" * 2000
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+	app.config["UPLOAD_FOLDER"] = str(tmp_path)
+	return tmp_path
+
+
+def _post(client, path, content, name, **fields):
+	data = {"file": (io.BytesIO(content), name), **fields}
+	return client.post(path, data=data, content_type="multipart/form-data")
+
+
+def _leftovers(uploads):
+	incoming = uploads / INCOMING_DIR
+	return os.listdir(incoming) if incoming.exists() else []
+
+
+def test_upload_is_hashed_and_sniffed_in_one_pass(client, uploads):
+	res = _post(client, "/api/uploads", PNG, "photo.png")
+	assert res.status_code == 201
+	body = res.get_json()
+	sha = hashlib.sha256(PNG).hexdigest()
+	assert body["sha256"] == sha and body["url"] == f"/api/uploads/{sha}"
+	assert body["content_type"] == "image/png" and body["size"] == len(PNG)
+	assert (uploads / sha[:2] / sha[2:4] / sha).read_bytes() == PNG
+	assert _leftovers(uploads) == []
+
+
+def test_oversized_upload_is_cut_off(app, client, uploads):
+	app.config["UPLOAD_MAX_FILE_BYTES"] = 1024
+	res = _post(client, "/api/uploads", PNG, "photo.png")
+	assert res.status_code == 413
+	assert MediaBlob.query.count() == 0
+	assert _leftovers(uploads) == []
+
+
+def test_content_must_match_extension(client, uploads):
+	assert _post(client, "/api/uploads", MP4, "photo.png").status_code == 400
+	assert _post(client, "/api/uploads", MP4, "clip.mp4").get_json()["content_type"] == "video/mp4"
+	assert _leftovers(uploads) == []
+
+
+def test_report_case_accepts_only_images_and_videos(client, uploads):
+	res = _post(client, "/api/cases", PNG, "dog.png", reporter_phone="9", location="MG Road")
+	assert res.status_code == 201
+	assert res.get_json()["media_url"] == f"/api/uploads/{hashlib.sha256(PNG).hexdigest()}"
+	res = _post(client, "/api/cases", b"a,b\n1,2\n", "list.csv", reporter_phone="9", location="MG Road")
+	assert res.status_code == 400
+
+
+def test_duplicate_content_is_stored_once(client, uploads):
+	first = _post(client, "/api/uploads", PNG, "IMG_0001.png").get_json()
+	second = _post(client, "/api/uploads", PNG, "other.png").get_json()
+	other = _post(client, "/api/uploads", PNG + b"x", "IMG_0001.png").get_json()
+	assert first["url"] == second["url"] != other["url"]
+	assert not first["deduplicated"] and second["deduplicated"]
+	assert db.session.get(MediaBlob, first["sha256"]).ref_count == 2
+	stored = [f for _, _, files in os.walk(uploads) for f in files]
+	assert sorted(stored) == sorted([first["sha256"], other["sha256"]])
+
+	res = client.get(first["url"])
+	assert res.status_code == 200 and res.data == PNG and res.mimetype == "image/png"
+	assert client.get("/api/uploads/" + "0" * 64).status_code == 404
+
+
+def test_deleting_cases_releases_their_media(client, uploads):
+	sha = hashlib.sha256(PNG).hexdigest()
+	ids = [
+		_post(client, "/api/cases", PNG, "dog.png", reporter_phone="9", location=f"Road {n}").get_json()["case_id"]
+		for n in range(2)
+	]
+	path = uploads / sha[:2] / sha[2:4] / sha
+
+	client.post("/api/admin/bulk", json={"op": "delete", "entity": "case", "ids": ids[:1]})
+	assert db.session.get(MediaBlob, sha).ref_count == 1 and path.exists()
+	client.post("/api/admin/bulk", json={"op": "delete", "entity": "case", "ids": ids[1:]})
+	assert db.session.get(MediaBlob, sha) is None and not path.exists()
+
+
+def test_upload_between_a_release_and_its_file_removal_keeps_the_file(client, uploads):
+	sha = hashlib.sha256(PNG).hexdigest()
+	path = uploads / sha[:2] / sha[2:4] / sha
+	_post(client, "/api/uploads", PNG, "dog.png")
+	unused = release_blobs([sha])
+	db.session.commit()
+	assert unused == [sha] and db.session.get(MediaBlob, sha).ref_count == 0
+
+	# The same content arrives before the released file is removed: the row is revived, so the file stays
+	res = _post(client, "/api/uploads", PNG, "again.png")
+	assert res.status_code == 201 and not res.get_json()["deduplicated"]
+	remove_blob_files(unused)
+	assert db.session.get(MediaBlob, sha).ref_count == 1 and path.read_bytes() == PNG
+
+	# Removed first, then uploaded again: stored afresh
+	remove_blob_files(release_blobs([sha]))
+	assert db.session.get(MediaBlob, sha) is None and not path.exists()
+	assert _post(client, "/api/uploads", PNG, "third.png").status_code == 201
+	assert db.session.get(MediaBlob, sha).ref_count == 1 and path.read_bytes() == PNG
+
+
+def test_failed_report_releases_its_upload(client, uploads, monkeypatch):
+	def fail(*args):
+		raise RuntimeError("outbox unavailable")
+
+	monkeypatch.setattr("backend.app.routes.cases.queue_case_confirmation", fail)
+	res = _post(client, "/api/cases", PNG, "dog.png", reporter_phone="9", location="MG Road")
+	assert res.status_code == 500
+	sha = hashlib.sha256(PNG).hexdigest()
+	assert MediaFile.query.count() == 0 and db.session.get(MediaBlob, sha) is None
+	assert not (uploads / sha[:2] / sha[2:4] / sha).exists()
+
+
+def test_sniff_content_type():
+	assert sniff_content_type(b"\xff\xd8\xff\xe0") == "image/jpeg"
+	assert sniff_content_type(b"GIF89a") == "image/gif"
+	assert sniff_content_type(b"\x00\x00\x00\x14ftypqt  ") == "video/quicktime"
+	assert sniff_content_type(b"RIFF\x00\x00\x00\x00AVI LIST") == "video/x-msvideo"
+	assert sniff_content_type(b"name,phone\n") == "text/plain"
+	assert sniff_content_type(b"MZ\x90\x00") is None
+
+
+def test_blobs_support_ranges_etags_and_immutable_caching(client, uploads):
+	video = MP4 + bytes(range(256)) * 8
+	sha = hashlib.sha256(video).hexdigest()
+	_post(client, "/api/uploads", video, "clip.mp4")
+
+	res = client.get(f"/api/uploads/{sha}", headers={"Range": "bytes=100-199"})
+	assert res.status_code == 206
+	assert res.headers["Content-Range"] == f"bytes 100-199/{len(video)}"
+	assert res.data == video[100:200]
+	assert res.headers["ETag"] == f'"{sha}"'
+	assert res.cache_control.immutable and res.cache_control.public
+	assert res.cache_control.max_age == 31536000
+
+	assert client.get(f"/api/uploads/{sha}", headers={"If-None-Match": f'"{sha}"'}).status_code == 304
+	assert client.get(f"/api/uploads/{sha}", headers={"Range": f"bytes={len(video)}-"}).status_code == 416
+
+
+def test_legacy_files_are_revalidated(client, uploads):
+	(uploads / "old.png").write_bytes(PNG)
+	res = client.get("/api/uploads/old.png")
+	assert res.status_code == 200 and res.data == PNG
+	assert res.cache_control.no_cache and not res.cache_control.immutable
+	assert client.get("/api/uploads/old.png", headers={"If-None-Match": res.headers["ETag"]}).status_code == 304
+
+
+def test_sendfile_offload_leaves_the_body_to_the_proxy(app, client, uploads):
+	sha = hashlib.sha256(PNG).hexdigest()
+	_post(client, "/api/uploads", PNG, "photo.png")
+	(uploads / "old.png").write_bytes(PNG)
+
+	app.config.update(MEDIA_SENDFILE="x-accel", MEDIA_ACCEL_PREFIX="/_media/")
+	res = client.get(f"/api/uploads/{sha}")
+	assert res.status_code == 200 and res.data == b""
+	assert res.headers["X-Accel-Redirect"] == f"/_media/{sha[:2]}/{sha[2:4]}/{sha}"
+	assert res.headers["Content-Type"] == "image/png" and res.cache_control.immutable
+	assert client.get("/api/uploads/old.png").headers["X-Accel-Redirect"] == "/_media/old.png"
+	assert client.get("/api/uploads/../etc/passwd").status_code == 404
+	res = client.get(f"/api/uploads/{sha}", headers={"If-None-Match": f'"{sha}"'})
+	assert res.status_code == 304 and "X-Accel-Redirect" not in res.headers
+
+	app.config["MEDIA_SENDFILE"] = "x-sendfile"
+	res = client.get(f"/api/uploads/{sha}")
+	assert res.headers["X-Sendfile"] == str(uploads / sha[:2] / sha[2:4] / sha) and res.data == b""
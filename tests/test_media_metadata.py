@@ -0,0 +1,116 @@
+import io
+import struct
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+
+from backend.app.extensions import db
+from backend.app.media_metadata import JOB_NAME, extract_image, extract_mp4
+from backend.app.models import AnimalCase, MediaBlob, ScheduledJob
+
+NOW = datetime(2026, 10, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def extractor(app, tmp_path):
+	app.config.update(UPLOAD_FOLDER=str(tmp_path), MEDIA_METADATA_BATCH_SIZE=2)
+	return app.extensions["metadata_extractor"]
+
+
+def _photo(gps=True) -> bytes:
+	exif = Image.Exif()
+	exif[0x0112] = 6  # rotated 90 degrees
+	exif[0x8769] = {0x9003: "2026:10:01 08:30:00", 0x9011: "+05:30"}
+	if gps:
+		exif[0x8825] = {1: "N", 2: (12.0, 58.0, 18.0), 3: "E", 4: (77.0, 35.0, 24.0)}
+	buf = io.BytesIO()
+	Image.new("RGB", (400, 300), "orange").save(buf, format="JPEG", exif=exif)
+	return buf.getvalue()
+
+
+def _box(kind: bytes, body: bytes) -> bytes:
+	return struct.pack(">I4s", len(body) + 8, kind) + body
+
+
+def _video() -> bytes:
+	mvhd = _box(b"mvhd", b"\x00" * 4 + struct.pack(">IIII", 3_800_000_000, 0, 1000, 12_500) + b"\x00" * 80)
+	tkhd = _box(b"tkhd", b"\x00" * 76 + struct.pack(">II", 1920 << 16, 1080 << 16))
+	xyz = _box(b"\xa9xyz", struct.pack(">HH", 18, 0) + b"+18.5204+073.8567/")
+	moov = _box(b"moov", mvhd + _box(b"trak", tkhd) + _box(b"udta", xyz))
+	return _box(b"ftyp", b"isom\x00\x00\x02\x00isom") + moov + _box(b"mdat", b"\x00" * 1000)
+
+
+def _report(client, content, name, **fields):
+	data = {"file": (io.BytesIO(content), name), "reporter_phone": "9", "location": "MG Road", **fields}
+	res = client.post("/api/cases", data=data, content_type="multipart/form-data")
+	assert res.status_code == 201
+	return res.get_json()["case_id"]
+
+
+def test_extract_image_reads_gps_time_and_displayed_size(tmp_path):
+	path = tmp_path / "photo.jpg"
+	path.write_bytes(_photo())
+	found = extract_image(str(path))
+	assert (found["width"], found["height"]) == (300, 400)
+	assert found["captured_at"] == datetime(2026, 10, 1, 3, 0, 0)  # +05:30 converted to UTC
+	assert found["latitude"] == pytest.approx(12.971667) and found["longitude"] == pytest.approx(77.59)
+
+
+def test_extract_mp4_reads_moov_headers(tmp_path):
+	path = tmp_path / "clip.mp4"
+	path.write_bytes(_video())
+	found = extract_mp4(str(path))
+	assert found["duration_seconds"] == 12.5
+	assert (found["width"], found["height"]) == (1920, 1080)
+	assert found["captured_at"] == datetime(1904, 1, 1) + timedelta(seconds=3_800_000_000)
+	assert (found["latitude"], found["longitude"]) == (18.5204, 73.8567)
+
+
+def test_cases_without_coordinates_are_located_from_their_media(app, client, extractor):
+	from_photo = _report(client, _photo(), "dog.jpg")
+	from_video = _report(client, _video(), "dog.mp4")
+	with_coords = _report(client, _photo() + b"\x00", "cat.jpg", latitude="28.6", longitude="77.2")
+	no_gps = _report(client, _photo(gps=False), "cow.jpg")
+	assert db.session.get(AnimalCase, from_photo).latitude is None  # reporting does not wait for extraction
+
+	assert extractor.run_if_due(NOW) == 4  # two batches of two
+	db.session.expire_all()
+	photo_case = db.session.get(AnimalCase, from_photo)
+	assert (round(photo_case.latitude, 4), round(photo_case.longitude, 4)) == (12.9717, 77.59)
+	assert (db.session.get(AnimalCase, from_video).latitude, db.session.get(AnimalCase, from_video).longitude) == (18.5204, 73.8567)
+	assert (db.session.get(AnimalCase, with_coords).latitude, db.session.get(AnimalCase, with_coords).longitude) == (28.6, 77.2)
+	assert db.session.get(AnimalCase, no_gps).latitude is None
+	assert MediaBlob.query.filter(MediaBlob.metadata_at.is_(None)).count() == 0
+	assert extractor.metrics()["located_cases_total"] == 2
+
+	files = client.get("/api/data/files?kind=video").get_json()["files"]
+	assert files[0]["metadata"]["duration_seconds"] == 12.5 and files[0]["metadata"]["width"] == 1920
+
+
+def test_reporting_already_extracted_content_locates_the_case(client, extractor):
+	first = _report(client, _photo(), "dog.jpg")
+	assert extractor.run_if_due(NOW) == 1
+	again = _report(client, _photo(), "same-dog.jpg")
+	assert MediaBlob.query.count() == 1  # stored once, already extracted
+
+	assert extractor.run_if_due(NOW + timedelta(minutes=1)) == 0
+	db.session.expire_all()
+	for case_id in (first, again):
+		case = db.session.get(AnimalCase, case_id)
+		assert (round(case.latitude, 4), round(case.longitude, 4)) == (12.9717, 77.59)
+
+
+def test_unreadable_files_are_not_retried(client, extractor):
+	_report(client, b"\xff\xd8\xff" + b"\x00" * 100, "broken.jpg")
+	assert extractor.run_if_due(NOW) == 1
+	blob = MediaBlob.query.one()
+	assert blob.metadata_at is not None and blob.width is None
+
+
+def test_one_worker_extracts_at_a_time(client, extractor):
+	_report(client, _photo(), "dog.jpg")
+	db.session.add(ScheduledJob(name=JOB_NAME, owner="other-worker", leased_until=NOW + timedelta(minutes=1), next_run_at=NOW))
+	db.session.commit()
+	assert extractor.run_if_due(NOW) is None
+	assert extractor.run_if_due(NOW + timedelta(minutes=2)) == 1
@@ -0,0 +1,94 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.media import blob_path
+from backend.app.media_zip import CHUNK_BYTES
+from backend.app.models import AnimalCase, CaseStatus
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2000
+MP4 = b"\x00\x00\x00\x18ftypisom" + b"\x00" * 2000
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+	app.config["UPLOAD_FOLDER"] = str(tmp_path)
+	return tmp_path
+
+
+def _report(client, content, name):
+	data = {"file": (io.BytesIO(content), name), "reporter_phone": "9", "location": "MG Road"}
+	case_id = client.post("/api/cases", data=data, content_type="multipart/form-data").get_json()["case_id"]
+	return db.session.get(AnimalCase, case_id)
+
+
+def _bundle(client, **query):
+	res = client.get("/api/admin/cases/media.zip", query_string=query)
+	assert res.status_code == 200 and res.mimetype == "application/zip"
+	assert res.headers["Content-Disposition"].startswith("attachment; filename=case-media-")
+	return zipfile.ZipFile(io.BytesIO(res.data))
+
+
+def _manifest(bundle):
+	return list(csv.DictReader(io.StringIO(bundle.read("MANIFEST.csv").decode())))
+
+
+def test_bundle_of_ids_holds_each_cases_files_uncompressed(client, uploads):
+	photo = _report(client, PNG, "dog.png")
+	video = _report(client, MP4, "rescue.mp4")
+	_report(client, PNG + b"other", "cat.png")
+
+	bundle = _bundle(client, ids=f"{photo.id},{video.id}")
+	assert bundle.namelist() == [f"{photo.case_code}/dog.png", f"{video.case_code}/rescue.mp4", "MANIFEST.csv"]
+	assert bundle.read(f"{photo.case_code}/dog.png") == PNG and bundle.read(f"{video.case_code}/rescue.mp4") == MP4
+	assert {info.compress_type for info in bundle.infolist()} == {zipfile.ZIP_STORED}
+	assert bundle.testzip() is None
+	rows = _manifest(bundle)
+	assert [(r["path"], r["size"], r["sha256"], r["status"]) for r in rows] == [
+		(f"{photo.case_code}/dog.png", str(len(PNG)), hashlib.sha256(PNG).hexdigest(), "ok"),
+		(f"{video.case_code}/rescue.mp4", str(len(MP4)), hashlib.sha256(MP4).hexdigest(), "ok"),
+	]
+
+
+def test_bundle_by_filter_and_bad_selections(client, uploads):
+	open_case = _report(client, PNG, "dog.png")
+	rescued = _report(client, MP4, "rescue.mp4")
+	rescued.status = CaseStatus.RESCUED
+	db.session.commit()
+
+	bundle = _bundle(client, filter=json.dumps({"status": "RESCUED"}))
+	assert bundle.namelist() == [f"{rescued.case_code}/rescue.mp4", "MANIFEST.csv"]
+	assert open_case.case_code not in "".join(bundle.namelist())
+
+	url = "/api/admin/cases/media.zip"
+	assert client.get(url).status_code == 400
+	assert client.get(url, query_string={"ids": "1,x"}).status_code == 400
+	assert client.get(url, query_string={"filter": "{"}).status_code == 400
+	assert client.get(url, query_string={"filter": json.dumps({"colour": "red"})}).status_code == 400
+	assert client.get(url, query_string={"filter": json.dumps({"ngo_id": "x"})}).status_code == 400
+
+
+def test_bundle_is_streamed_in_bounded_pieces(client, uploads):
+	big = PNG + bytes(range(256)) * 4096  # about 1 MB
+	case = _report(client, big, "large.png")
+
+	res = client.get("/api/admin/cases/media.zip", query_string={"ids": case.id}, buffered=False)
+	pieces = list(res.response)
+	res.close()
+	assert len(pieces) > len(big) // CHUNK_BYTES
+	assert max(len(p) for p in pieces) <= CHUNK_BYTES + 1024
+	assert zipfile.ZipFile(io.BytesIO(b"".join(pieces))).read(f"{case.case_code}/large.png") == big
+
+
+def test_missing_files_are_listed_in_the_manifest(client, uploads):
+	case = _report(client, PNG, "dog.png")
+	os.unlink(blob_path(hashlib.sha256(PNG).hexdigest()))
+	bundle = _bundle(client, ids=str(case.id))
+	assert bundle.namelist() == ["MANIFEST.csv"]
+	assert [(r["path"], r["status"]) for r in _manifest(bundle)] == [(f"{case.case_code}/dog.png", "missing")]
@@ -0,0 +1,103 @@
+import socket
+from datetime import datetime
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from backend.app.extensions import db, mail
+from backend.app.models import NotificationOutbox, OutboxStatus
+
+
+class _Sink:
+	def __init__(self):
+		self.messages = []
+
+	async def handle_DATA(self, server, session, envelope):
+		self.messages.append(envelope)
+		return "250 OK"
+
+
+def _free_port():
+	with socket.socket() as s:
+		s.bind(("127.0.0.1", 0))
+		return s.getsockname()[1]
+
+
+def _use_smtp(app, port):
+	app.config.update(
+		MAIL_SERVER="127.0.0.1",
+		MAIL_PORT=port,
+		MAIL_USE_TLS=False,
+		MAIL_USE_SSL=False,
+		MAIL_USERNAME=None,
+		MAIL_PASSWORD=None,
+		MAIL_DEFAULT_SENDER="no-reply@resqtrack.local",
+		OUTBOX_BACKOFF_SECONDS=60,
+		MAIL_SEND_RETRIES=0,
+	)
+	mail.init_app(app)
+	app.extensions.pop("smtp_pool", None)
+
+
+@pytest.fixture()
+def smtp_sink(app):
+	sink = _Sink()
+	controller = Controller(sink, hostname="127.0.0.1", port=_free_port())
+	controller.start()
+	_use_smtp(app, controller.port)
+	yield sink
+	controller.stop()
+
+
+def _dispatcher(app):
+	return app.extensions["outbox_dispatcher"]
+
+
+def test_report_case_queues_confirmation_without_sending(client):
+	res = client.post("/api/cases", json={
+		"reporter_phone": "9999999999",
+		"reporter_email": "citizen@example.com",
+		"location": "Test City",
+	})
+	assert res.status_code == 201
+
+	item = NotificationOutbox.query.one()
+	assert item.kind == "case_confirmation"
+	assert item.status == OutboxStatus.PENDING
+	assert res.get_json()["case_code"] in item.subject
+
+
+def test_dispatcher_delivers_batch_over_smtp(app, smtp_sink):
+	for n in range(3):
+		db.session.add(NotificationOutbox(kind="test", recipient=f"user{n}@example.com", subject="hi", body="body"))
+	db.session.commit()
+
+	assert _dispatcher(app).dispatch_once() == 3
+
+	assert len(smtp_sink.messages) == 3
+	statuses = {i.status for i in NotificationOutbox.query.all()}
+	assert statuses == {OutboxStatus.SENT}
+	assert _dispatcher(app).metrics()["pending"] == 0
+
+
+def test_unreachable_smtp_is_retried_with_backoff(app):
+	_use_smtp(app, _free_port())
+	app.config["OUTBOX_MAX_ATTEMPTS"] = 2
+	db.session.add(NotificationOutbox(kind="test", recipient="user@example.com", subject="hi", body="body"))
+	db.session.commit()
+	dispatcher = _dispatcher(app)
+
+	assert dispatcher.dispatch_once() == 1
+	item = NotificationOutbox.query.one()
+	assert item.status == OutboxStatus.PENDING
+	assert item.attempts == 1
+	assert item.last_error
+	assert item.next_attempt_at > datetime.utcnow()
+	# Not due yet, so nothing is claimed
+	assert dispatcher.dispatch_once() == 0
+
+	item.next_attempt_at = datetime.utcnow()
+	db.session.commit()
+	dispatcher.dispatch_once()
+	assert NotificationOutbox.query.one().status == OutboxStatus.FAILED
+	assert dispatcher.metrics()["failed"] == 1
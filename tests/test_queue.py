@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.models import AnimalCase, CaseStatus, Urgency
+
+
+def _case(code, urgency, status=CaseStatus.PENDING, age_minutes=0):
+	c = AnimalCase(
+		case_code=code, reporter_phone="9999999999", location="MG Road",
+		urgency=urgency, status=status, created_at=datetime.utcnow() - timedelta(minutes=age_minutes),
+	)
+	db.session.add(c)
+	return c
+
+
+@pytest.mark.parametrize("value,expected", [
+	("critical", Urgency.CRITICAL), ("High", Urgency.HIGH), (" MEDIUM ", Urgency.MEDIUM),
+	(3, Urgency.LOW), ("0", Urgency.CRITICAL), (Urgency.HIGH, Urgency.HIGH),
+])
+def test_urgency_parse(value, expected):
+	assert Urgency.parse(value) is expected
+
+
+@pytest.mark.parametrize("value", ["urgent", 7, "", None])
+def test_urgency_parse_rejects_unknown(value):
+	with pytest.raises(ValueError):
+		Urgency.parse(value)
+
+
+def test_report_rejects_invalid_urgency(client):
+	res = client.post("/api/cases", json={"reporter_phone": "9", "location": "X", "urgency": "urgent"})
+	assert res.status_code == 400
+	assert "Critical" in res.get_json()["allowed"]
+
+
+def test_report_stores_urgency_as_rank(client, app):
+	res = client.post("/api/cases", json={"reporter_phone": "9", "location": "X", "urgency": "high"})
+	assert res.status_code == 201
+	case = db.session.get(AnimalCase, res.get_json()["case_id"])
+	assert case.urgency is Urgency.HIGH
+	raw = db.session.execute(db.text("SELECT urgency FROM animal_cases WHERE id = :id"), {"id": case.id}).scalar()
+	assert raw == 1
+
+
+def test_report_with_numeric_critical_urgency_is_not_defaulted(client):
+	res = client.post("/api/cases", json={"reporter_phone": "9", "location": "X", "urgency": 0})
+	assert res.status_code == 201
+	assert db.session.get(AnimalCase, res.get_json()["case_id"]).urgency is Urgency.CRITICAL
+	res = client.post("/api/cases", json={"reporter_phone": "9", "location": "Y", "urgency": ""})
+	assert db.session.get(AnimalCase, res.get_json()["case_id"]).urgency is Urgency.LOW
+
+
+def test_queue_orders_by_urgency_then_age(client):
+	_case("Q1", Urgency.LOW, age_minutes=90)
+	_case("Q2", Urgency.CRITICAL, age_minutes=5)
+	_case("Q3", Urgency.CRITICAL, status=CaseStatus.IN_PROGRESS, age_minutes=30)
+	_case("Q4", Urgency.MEDIUM, age_minutes=60)
+	_case("Q5", Urgency.HIGH, status=CaseStatus.RESCUED, age_minutes=120)
+	db.session.commit()
+
+	res = client.get("/api/cases/queue")
+	assert res.status_code == 200
+	items = res.get_json()["items"]
+	assert [i["case_code"] for i in items] == ["Q3", "Q2", "Q4", "Q1"]
+	assert items[0]["urgency"] == "Critical" and items[0]["urgency_rank"] == 0
+	assert items[0]["age_seconds"] >= 30 * 60
+
+	res = client.get("/api/cases/queue?status=pending&limit=2")
+	assert [i["case_code"] for i in res.get_json()["items"]] == ["Q2", "Q4"]
+
+
+def test_queue_rejects_closed_statuses(client):
+	assert client.get("/api/cases/queue?status=CLOSED").status_code == 400
+	assert client.get("/api/cases/queue?status=bogus").status_code == 400
@@ -0,0 +1,101 @@
+import pytest
+
+from backend.app.extensions import db
+from backend.app.media import blob_hash, blob_path
+from backend.app.models import Donation, MediaBlob, MediaFile, NotificationOutbox
+from backend.app.receipts import DEFAULT_TEMPLATE, get_receipt_renderer
+
+DONATION = {"amount": 500, "currency": "inr", "category": "Medical Aid", "donor_email": "d@example.com"}
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+	app.config.update(UPLOAD_FOLDER=str(tmp_path), RECEIPT_WORKERS=0, PUBLIC_BASE_URL="https://resqtrack.example")
+	yield tmp_path
+	get_receipt_renderer().shutdown()
+
+
+def _donate(client, **fields):
+	res = client.post("/api/donations", json={**DONATION, **fields})
+	assert res.status_code == 201
+	return db.session.get(Donation, res.get_json()["id"])
+
+
+def _new_template(app, tmp_path, marker):
+	path = tmp_path / f"receipt-{marker}.html"
+	with open(DEFAULT_TEMPLATE, encoding="utf-8") as f:
+		path.write_text(f.read().replace("Thank you", f"{marker}. Thank you"), encoding="utf-8")
+	app.config["RECEIPT_TEMPLATE"] = str(path)
+
+
+def test_donation_gets_a_stored_receipt_and_an_email_linking_it(client, uploads):
+	donation = _donate(client, donor_name="<b>Asha</b>", payment_id="pay_1", payment_provider="Razorpay")
+
+	assert donation.receipt_url.startswith("/api/uploads/") and donation.receipt_digest
+	res = client.get(donation.receipt_url)
+	assert res.status_code == 200 and res.mimetype == "text/html"
+	assert "sandbox" in res.headers["Content-Security-Policy"]
+	html = res.get_data(as_text=True)
+	assert f"RQ-{donation.id:08d}" in html and "INR 500.00" in html and "Razorpay pay_1" in html
+	assert "&lt;b&gt;Asha&lt;/b&gt;" in html and "<b>Asha" not in html
+
+	email = NotificationOutbox.query.filter_by(kind="donation_receipt").one()
+	link = email.body.rsplit("https://resqtrack.example", 1)[1]
+	assert link.startswith("/api/donations/receipts/")
+	res = client.get(link)
+	assert res.status_code == 302 and res.headers["Location"].endswith(donation.receipt_url)
+	assert MediaFile.query.filter_by(source="receipt").one().filename == f"receipt-{donation.id}.html"
+
+
+def test_current_receipts_are_cached_and_stale_ones_rerendered(client, app, uploads):
+	donation = _donate(client)
+	old_url = donation.receipt_url
+	renderer = get_receipt_renderer()
+	assert renderer.regenerate() == {"rendered": 0, "current": 1, "failed": 0}
+
+	_new_template(app, uploads, "Revised")
+	assert renderer.regenerate() == {"rendered": 1, "current": 0, "failed": 0}
+	donation = db.session.get(Donation, donation.id)
+	assert donation.receipt_url != old_url and "Revised" in client.get(donation.receipt_url).get_data(as_text=True)
+	old = blob_hash(old_url)
+	assert db.session.get(MediaBlob, old) is None and not (uploads / old[:2] / old[2:4] / old).exists()
+	assert MediaFile.query.filter_by(source="receipt").count() == 1
+	assert NotificationOutbox.query.filter_by(kind="donation_receipt").count() == 1  # donors are emailed once
+
+
+def test_regeneration_renders_in_the_worker_pool(client, app, uploads):
+	ids = [_donate(client, payment_id=f"pay_{i}").id for i in range(6)]
+	_new_template(app, uploads, "Pooled")
+	app.config["RECEIPT_WORKERS"] = 2
+
+	assert get_receipt_renderer().regenerate(batch_size=4) == {"rendered": 6, "current": 0, "failed": 0}
+	for donation_id in ids:
+		url = db.session.get(Donation, donation_id).receipt_url
+		with open(blob_path(blob_hash(url)), encoding="utf-8") as f:
+			html = f.read()
+		assert "Pooled" in html and f"RQ-{donation_id:08d}" in html
+
+
+def test_failed_render_still_emails_a_link_that_renders_it(client, app, uploads):
+	app.config["RECEIPT_TEMPLATE"] = str(uploads / "missing.html")
+	donation = _donate(client)
+	assert donation.receipt_url is None
+	email = NotificationOutbox.query.filter_by(kind="donation_receipt").one()  # queued with the donation
+	link = email.body.rsplit("https://resqtrack.example", 1)[1]
+	res = client.get(link)
+	assert res.status_code == 503 and res.headers["Retry-After"]
+
+	app.config["RECEIPT_TEMPLATE"] = ""
+	res = client.get(link)
+	receipt_url = db.session.get(Donation, donation.id).receipt_url
+	assert receipt_url is not None and res.status_code == 302 and res.headers["Location"].endswith(receipt_url)
+	assert get_receipt_renderer().regenerate() == {"rendered": 0, "current": 1, "failed": 0}
+	assert NotificationOutbox.query.filter_by(kind="donation_receipt").count() == 1
+	assert client.get(link[:-2] + "xx").status_code == 404
+
+
+def test_receipt_email_is_queued_even_with_receipts_disabled(client, app, uploads):
+	app.config["RECEIPTS_ENABLED"] = False
+	donation = _donate(client)
+	assert donation.receipt_url is None
+	assert NotificationOutbox.query.filter_by(kind="donation_receipt").count() == 1
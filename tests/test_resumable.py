@@ -0,0 +1,104 @@
+import base64
+import hashlib
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.app.extensions import db
+from backend.app.models import AnimalCase, MediaBlob, ResumableUpload
+from backend.app.resumable import purge_expired
+
+VIDEO = (b"\x00\x00\x00\x18ftypisom" + bytes(range(256)) * 400)[:100_000]
+SHA = hashlib.sha256(VIDEO).hexdigest()
+TUS = {"Tus-Resumable": "1.0.0"}
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+	app.config["UPLOAD_FOLDER"] = str(tmp_path)
+	return tmp_path
+
+
+def _metadata(**values):
+	return ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in values.items())
+
+
+def _create(client, length=len(VIDEO), **metadata):
+	metadata = {"filename": "clip.mp4", "sha256": SHA, **metadata}
+	return client.post(
+		"/api/uploads/resumable", headers={**TUS, "Upload-Length": str(length), "Upload-Metadata": _metadata(**metadata)}
+	)
+
+
+def _patch(client, location, offset, body, **kwargs):
+	headers = {**TUS, "Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"}
+	return client.patch(location, data=body, headers=headers, **kwargs)
+
+
+def test_upload_in_chunks_and_attach_to_case(client, uploads):
+	res = client.post("/api/cases", json={"reporter_phone": "9", "location": "MG Road, Pune"})
+	case_code = res.get_json()["case_code"]
+
+	res = _create(client, case_code=case_code)
+	assert res.status_code == 201 and res.headers["Tus-Resumable"] == "1.0.0"
+	location = res.headers["Location"]
+
+	assert _patch(client, location, 0, VIDEO[:40_000]).headers["Upload-Offset"] == "40000"
+	res = client.head(location)
+	assert res.status_code == 200 and res.headers["Upload-Offset"] == "40000"
+	assert res.headers["Upload-Length"] == str(len(VIDEO))
+	assert _patch(client, location, 0, VIDEO[:40_000]).status_code == 409  # stale offset
+
+	res = _patch(client, location, 40_000, VIDEO[40_000:])
+	assert res.status_code == 204 and res.headers["Upload-Media-Url"] == f"/api/uploads/{SHA}"
+	case = AnimalCase.query.filter_by(case_code=case_code).one()
+	assert case.media_url == f"/api/uploads/{SHA}"
+	assert MediaBlob.query.get(SHA).content_type == "video/mp4"
+	assert (uploads / SHA[:2] / SHA[2:4] / SHA).read_bytes() == VIDEO
+	assert os.listdir(uploads / ".partial") == []
+	assert client.head(location).headers["Upload-Media-Url"] == f"/api/uploads/{SHA}"
+
+
+def test_dropped_connection_keeps_received_bytes(client, uploads):
+	location = _create(client).headers["Location"]
+	# Client promises 60000 bytes but the connection dies after 25000
+	res = _patch(client, location, 0, None, input_stream=io.BytesIO(VIDEO[:25_000]), content_length=60_000)
+	assert client.head(location).headers["Upload-Offset"] == "25000"
+
+	res = _patch(client, location, 25_000, VIDEO[25_000:])
+	assert res.status_code == 204 and "Upload-Media-Url" in res.headers
+
+
+def test_checksum_mismatch_discards_the_upload(client, uploads):
+	location = _create(client).headers["Location"]
+	res = _patch(client, location, 0, VIDEO[:-1] + b"!")
+	assert res.status_code == 460
+	assert client.head(location).status_code == 404
+	assert MediaBlob.query.count() == 0 and os.listdir(uploads / ".partial") == []
+
+
+def test_creation_is_validated(app, client, uploads):
+	assert _create(client, filename="notes.csv").status_code == 400
+	assert _create(client, sha256="abc").status_code == 400
+	assert _create(client, case_code="NOPE").status_code == 404
+	assert client.post("/api/uploads/resumable", headers=TUS).status_code == 400
+	location = _create(client).headers["Location"]
+	res = client.patch(location, data=VIDEO, headers={**TUS, "Upload-Offset": "0", "Content-Type": "video/mp4"})
+	assert res.status_code == 415
+	app.config["UPLOAD_MAX_FILE_BYTES"] = 1000
+	assert _create(client).status_code == 413
+
+
+def test_delete_and_expiry(app, client, uploads):
+	location = _create(client).headers["Location"]
+	assert client.delete(location).status_code == 204
+	assert client.head(location).status_code == 404
+
+	location = _create(client).headers["Location"]
+	upload = ResumableUpload.query.one()
+	upload.updated_at = datetime.utcnow() - timedelta(hours=25)
+	db.session.commit()
+	assert purge_expired() == 1
+	assert client.head(location).status_code == 404 and os.listdir(uploads / ".partial") == []
@@ -0,0 +1,58 @@
+from backend.app.extensions import db
+from backend.app.models import AnimalCase, CaseStatus
+
+
+def _case(code, location, notes=None, reporter_name=None, status=CaseStatus.PENDING):
+	case = AnimalCase(
+		case_code=code, reporter_phone="9", location=location, notes=notes, reporter_name=reporter_name, status=status
+	)
+	db.session.add(case)
+	return case
+
+
+def _search(client, **params):
+	res = client.get("/api/cases/search", query_string=params)
+	assert res.status_code == 200, res.get_json()
+	return res.get_json()
+
+
+def test_search_ranks_matches_across_fields(client):
+	_case("S1", "MG Road, Bengaluru", notes="Injured dog near the metro, dog is limping")
+	_case("S2", "Indiranagar, Bengaluru", notes="Cat stuck on a tree")
+	_case("S3", "Koramangala", notes="Stray dog", reporter_name="Asha Rao")
+	db.session.commit()
+
+	assert [i["case_code"] for i in _search(client, q="dog")["items"]] == ["S1", "S3"]
+	assert [i["case_code"] for i in _search(client, q="bengaluru cat")["items"]] == ["S2"]
+	assert [i["case_code"] for i in _search(client, q="asha")["items"]] == ["S3"]
+	# The last term matches as a prefix
+	assert [i["case_code"] for i in _search(client, q="injur")["items"]] == ["S1"]
+	assert _search(client, q="dog", status="closed")["items"] == []
+
+
+def test_index_follows_updates_and_deletes(client):
+	case = _case("S1", "MG Road", notes="cat")
+	db.session.commit()
+	case.notes = "puppy"
+	db.session.commit()
+	assert _search(client, q="cat")["items"] == []
+	assert _search(client, q="puppy")["items"][0]["id"] == case.id
+
+	db.session.delete(case)
+	db.session.commit()
+	assert _search(client, q="puppy")["items"] == []
+
+
+def test_search_pagination_and_validation(client):
+	for n in range(5):
+		_case(f"S{n}", f"Lane {n}", notes="cow on the highway")
+	db.session.commit()
+	first = _search(client, q="cow", per_page=2)
+	last = _search(client, q="cow", per_page=2, page=3)
+	assert first["has_more"] and len(first["items"]) == 2
+	assert not last["has_more"] and len(last["items"]) == 1
+	# Query syntax in the input is treated as plain words, all of which must match
+	assert _search(client, q='cow" OR')["items"] == []
+	assert len(_search(client, q='"cow" -highway*', per_page=10)["items"]) == 5
+	assert client.get("/api/cases/search?q=%20%22").status_code == 400
+	assert client.get("/api/cases/search?q=cow&status=bogus").status_code == 400
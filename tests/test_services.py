@@ -0,0 +1,81 @@
+import random
+import time
+
+from backend.app.extensions import db
+from backend.app.geo import GridIndex, haversine_km
+from backend.app.models import Hospital, NGO, PoliceStation
+
+
+def _hospital(name, lat, lon, is_24x7=False):
+	h = Hospital(name=name, latitude=lat, longitude=lon, is_24x7=is_24x7)
+	db.session.add(h)
+	return h
+
+
+def test_grid_index_matches_brute_force():
+	rng = random.Random(7)
+	index = GridIndex(cell_deg=0.05)
+	points = {i: (rng.uniform(12.8, 13.2), rng.uniform(77.4, 77.8)) for i in range(5000)}
+	for key, (lat, lon) in points.items():
+		index.upsert(key, lat, lon)
+
+	for _ in range(50):
+		lat, lon = rng.uniform(12.7, 13.3), rng.uniform(77.3, 77.9)
+		expected = sorted((haversine_km(lat, lon, *p), k) for k, p in points.items())[:10]
+		got = [(round(d, 9), k) for d, k, _ in index.nearest(lat, lon, k=10)]
+		assert got == [(round(d, 9), k) for d, k in expected]
+
+		within = {k for _, k, _ in index.nearest(lat, lon, k=None, radius_km=3)}
+		assert within == {k for k, p in points.items() if haversine_km(lat, lon, *p) <= 3}
+
+
+def test_grid_index_query_is_fast_at_city_scale():
+	rng = random.Random(1)
+	index = GridIndex()
+	for i in range(20_000):
+		index.upsert(i, rng.uniform(12.8, 13.2), rng.uniform(77.4, 77.8))
+	start = time.perf_counter()
+	for _ in range(100):
+		index.nearest(rng.uniform(12.8, 13.2), rng.uniform(77.4, 77.8), k=10)
+	assert (time.perf_counter() - start) / 100 < 0.005
+
+
+def test_nearby_endpoint_filters_type_radius_and_24x7(client):
+	_hospital("Near clinic", 12.9716, 77.5946)
+	_hospital("Near 24x7", 12.9750, 77.6000, is_24x7=True)
+	_hospital("Far 24x7", 13.5, 78.5, is_24x7=True)
+	db.session.add(PoliceStation(name="Station", latitude=12.972, longitude=77.595))
+	db.session.add(NGO(name="Unapproved", email="n@example.com", phone="1", latitude=12.9716, longitude=77.5946))
+	db.session.commit()
+
+	res = client.get("/api/services/nearby?lat=12.9716&lon=77.5946&radius=5")
+	assert res.status_code == 200
+	names = [i["name"] for i in res.get_json()["items"]]
+	assert names[0] == "Near clinic"
+	assert set(names) == {"Near clinic", "Near 24x7", "Station"}
+
+	res = client.get("/api/services/nearby?lat=12.9716&lon=77.5946&type=hospital&is_24x7=true&radius=500&limit=1")
+	items = res.get_json()["items"]
+	assert [i["name"] for i in items] == ["Near 24x7"]
+	assert items[0]["distance_km"] < 1
+
+
+def test_index_follows_writes_without_rebuild(client, app):
+	h = _hospital("Moving", 12.97, 77.59)
+	db.session.commit()
+	url = "/api/services/nearby?lat=12.97&lon=77.59&radius=2&type=hospital"
+	assert len(client.get(url).get_json()["items"]) == 1
+
+	h.latitude, h.longitude = 19.07, 72.87
+	db.session.commit()
+	assert client.get(url).get_json()["items"] == []
+	assert client.get("/api/services/nearby?lat=19.07&lon=72.87&radius=2").get_json()["items"][0]["name"] == "Moving"
+
+	db.session.delete(h)
+	db.session.commit()
+	assert client.get("/api/services/nearby?lat=19.07&lon=72.87&radius=2").get_json()["items"] == []
+
+
+def test_nearby_rejects_bad_input(client):
+	assert client.get("/api/services/nearby?lat=abc&lon=1").status_code == 400
+	assert client.get("/api/services/nearby?lat=1&lon=1&type=volunteer").status_code == 400
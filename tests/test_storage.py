@@ -0,0 +1,149 @@
+import hashlib
+import io
+
+import boto3
+import pytest
+import requests
+from moto import mock_aws
+
+from backend.app.models import MediaBlob
+from backend.app.storage import S3Storage
+
+BUCKET = "resqtrack-media"
+PART = 5 * 1024 * 1024  # S3's minimum part size
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2000
+
+
+@pytest.fixture
+def s3(app, tmp_path, monkeypatch):
+	for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN"):
+		monkeypatch.setenv(name, "testing")
+	with mock_aws():
+		client = boto3.client("s3", region_name="us-east-1")
+		client.create_bucket(Bucket=BUCKET)
+		app.config["UPLOAD_FOLDER"] = str(tmp_path)
+		app.extensions["storage"] = S3Storage(
+			client, BUCKET, str(tmp_path), prefix="media/", multipart_threshold=PART, multipart_chunk=PART
+		)
+		yield client
+
+
+def _video(size: int) -> bytes:
+	return (b"\x00\x00\x00\x18ftypisom" + bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def _key(sha: str) -> str:
+	return f"media/{sha[:2]}/{sha[2:4]}/{sha}"
+
+
+def test_uploads_through_flask_land_in_the_bucket(client, s3):
+	sha = hashlib.sha256(PNG).hexdigest()
+	res = client.post("/api/uploads", data={"file": (io.BytesIO(PNG), "dog.png")}, content_type="multipart/form-data")
+	assert res.status_code == 201
+	obj = s3.get_object(Bucket=BUCKET, Key=_key(sha))
+	assert obj["Body"].read() == PNG and obj["ContentType"] == "image/png"
+
+	res = client.get(f"/api/uploads/{sha}")
+	assert res.status_code == 302
+	assert _key(sha) in res.headers["Location"] and "Signature" in res.headers["Location"]
+	assert requests.get(res.headers["Location"]).content == PNG
+
+
+def test_large_files_use_multipart_upload(app, s3, tmp_path):
+	video = _video(2 * PART + 1000)
+	source = tmp_path / "clip.tmp"
+	source.write_bytes(video)
+	storage = app.extensions["storage"]
+	storage.put_file("ab/cd/clip", str(source), "video/mp4")
+	head = s3.head_object(Bucket=BUCKET, Key="media/ab/cd/clip")
+	assert head["ContentLength"] == len(video)
+	assert head["ETag"].strip('"').endswith("-3")  # three parts
+	assert not source.exists() and open(storage.local_path("ab/cd/clip"), "rb").read() == video
+
+
+def test_direct_upload_with_one_presigned_put(client, s3):
+	sha = hashlib.sha256(PNG).hexdigest()
+	res = client.post("/api/uploads/direct", json={"filename": "dog.png", "size": len(PNG), "sha256": sha})
+	assert res.status_code == 200
+	upload = res.get_json()
+	assert upload["method"] == "PUT"
+	assert requests.put(upload["url"], data=PNG, headers=upload["headers"]).status_code == 200
+
+	res = client.post("/api/uploads/direct/complete", json={"filename": "dog.png", "sha256": sha})
+	assert res.status_code == 201
+	body = res.get_json()
+	assert body["url"] == f"/api/uploads/{sha}" and body["content_type"] == "image/png" and not body["deduplicated"]
+	assert MediaBlob.query.get(sha).ref_count == 1
+
+	# Known content needs no second upload, just another reference
+	res = client.post("/api/uploads/direct/complete", json={"filename": "again.png", "sha256": sha})
+	assert res.get_json()["deduplicated"] and MediaBlob.query.get(sha).ref_count == 2
+
+
+def _multipart(client, video, sha):
+	res = client.post("/api/uploads/direct", json={"filename": "clip.mp4", "size": len(video), "sha256": sha})
+	upload = res.get_json()
+	assert upload["method"] == "MULTIPART" and len(upload["parts"]) == 3
+
+	etags = []
+	for part in upload["parts"]:
+		start = (part["part_number"] - 1) * upload["part_size"]
+		put = requests.put(part["url"], data=video[start:start + upload["part_size"]])
+		etags.append(put.headers["ETag"])
+	return client.post(
+		"/api/uploads/direct/complete",
+		json={
+			"filename": "clip.mp4", "sha256": sha, "upload_id": upload["upload_id"],
+			"upload_key": upload["upload_key"], "etags": etags,
+		},
+	)
+
+
+def test_direct_multipart_upload_of_a_large_video(client, s3):
+	video = _video(2 * PART + 1000)
+	sha = hashlib.sha256(video).hexdigest()
+	res = _multipart(client, video, sha)
+	assert res.status_code == 201
+	assert res.get_json()["size"] == len(video) and res.get_json()["content_type"] == "video/mp4"
+	head = s3.head_object(Bucket=BUCKET, Key=_key(sha))
+	assert head["ContentLength"] == len(video) and head["ContentType"] == "video/mp4"
+	assert [o["Key"] for o in s3.list_objects_v2(Bucket=BUCKET)["Contents"]] == [_key(sha)]  # staging copy removed
+
+	# Stored content gets no upload URLs at all
+	res = client.post("/api/uploads/direct", json={"filename": "clip.mp4", "size": len(video), "sha256": sha})
+	assert res.get_json() == {"method": "STORED"}
+
+
+def test_direct_multipart_upload_must_match_its_declared_hash(client, s3):
+	real = _video(2 * PART + 1000)
+	victim = hashlib.sha256(real[:-1] + b"!").hexdigest()
+	res = _multipart(client, real, victim)
+	assert res.status_code == 400 and "sha256" in res.get_json()["error"]
+	assert s3.list_objects_v2(Bucket=BUCKET).get("KeyCount") == 0
+	assert MediaBlob.query.count() == 0
+
+	# An object already in the bucket is never offered for upload again
+	s3.put_object(Bucket=BUCKET, Key=_key(victim), Body=PNG)
+	res = client.post("/api/uploads/direct", json={"filename": "clip.mp4", "size": len(real), "sha256": victim})
+	assert res.get_json() == {"method": "STORED"}
+	assert s3.get_object(Bucket=BUCKET, Key=_key(victim))["Body"].read() == PNG
+
+
+def test_direct_upload_is_checked_like_any_other(app, client, s3):
+	text = b"not really a picture"
+	sha = hashlib.sha256(text).hexdigest()
+	s3.put_object(Bucket=BUCKET, Key=_key(sha), Body=text)
+	res = client.post("/api/uploads/direct/complete", json={"filename": "dog.png", "sha256": sha})
+	assert res.status_code == 400
+	assert s3.list_objects_v2(Bucket=BUCKET).get("KeyCount") == 0
+	assert MediaBlob.query.count() == 0
+
+	app.config["UPLOAD_MAX_FILE_BYTES"] = 1024
+	res = client.post("/api/uploads/direct", json={"filename": "clip.mp4", "size": 4096, "sha256": sha})
+	assert res.status_code == 413
+	assert client.post("/api/uploads/direct/complete", json={"filename": "x.png", "sha256": "0" * 64}).status_code == 409
+
+
+def test_direct_uploads_need_s3(client):
+	res = client.post("/api/uploads/direct", json={"filename": "dog.png", "size": 10, "sha256": "0" * 64})
+	assert res.status_code == 501
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from backend.app.events import Broadcaster, EventLog, LocalBackend, TooManySubscribers, get_event_broadcaster, init_event_broadcaster
+
+
+def _frames(res):
+	return b"".join(res.response).decode()
+
+
+def test_event_log_resume_and_truncation():
+	log = EventLog(size=3)
+	backend = LocalBackend(3)
+	backend.log = log
+	backend.deliver = lambda e: None
+	for n in range(5):
+		backend.publish("case.created", {"n": n})
+
+	assert [e.id for e in log.since(3)] == [4, 5]
+	assert log.since(5) == []
+	assert [e.id for e in log.since(2)] == [3, 4, 5]
+	assert log.since(1) is None
+
+
+def test_slow_subscriber_is_dropped_and_cap_enforced():
+	b = Broadcaster(LocalBackend(10), max_subscribers=1, queue_size=2)
+	sub = b.subscribe()
+	with pytest.raises(TooManySubscribers):
+		b.subscribe()
+	for n in range(3):
+		b.publish("case.created", {"n": n})
+	assert sub.closed and b.subscriber_count == 0 and b.dropped_total == 1
+
+
+def test_stream_replays_from_last_event_id(app, client):
+	app.config.update(STREAM_MAX_SECONDS=0.2, STREAM_HEARTBEAT_SECONDS=0.05)
+	first = client.post("/api/cases", json={"reporter_phone": "9", "location": "A", "urgency": "Critical"})
+	client.post("/api/cases", json={"reporter_phone": "9", "location": "B"})
+
+	res = client.get("/api/stream/cases", headers={"Last-Event-ID": "0"})
+	assert res.mimetype == "text/event-stream"
+	body = _frames(res)
+	assert body.startswith("retry: ")
+	assert body.count("event: case.created") == 2
+	assert f'"case_code":"{first.get_json()["case_code"]}"' in body
+	assert '"urgency":"Critical"' in body
+	assert "reporter_phone" not in body
+	assert ": keepalive" in body
+
+	res = client.get("/api/stream/cases", headers={"Last-Event-ID": "1"})
+	assert _frames(res).count("event: case.created") == 1
+
+
+def test_stream_delivers_live_status_change(app, client):
+	app.config.update(STREAM_MAX_SECONDS=2, STREAM_HEARTBEAT_SECONDS=0.05)
+	case_id = client.post("/api/cases", json={"reporter_phone": "9", "location": "A"}).get_json()["case_id"]
+	broadcaster = get_event_broadcaster()
+
+	res = client.get("/api/stream/cases")
+	frames = iter(res.response)
+	assert next(frames).startswith(b"retry:")
+
+	def change():
+		with app.app_context():
+			from backend.app.events import publish_case_event
+			from backend.app.extensions import db
+			from backend.app.models import AnimalCase, CaseStatus
+
+			case = db.session.get(AnimalCase, case_id)
+			case.status = CaseStatus.IN_PROGRESS
+			db.session.commit()
+			publish_case_event("case.status", case)
+
+	threading.Thread(target=change).start()
+	for frame in frames:
+		if frame.startswith(b"id: "):
+			assert b"event: case.status" in frame and b'"status":"IN_PROGRESS"' in frame
+			break
+	else:
+		pytest.fail("no live event received")
+	res.close()
+	assert broadcaster.subscriber_count == 0
+
+
+def test_stream_rejects_when_full(app, client):
+	app.extensions["event_broadcaster"].max_subscribers = 0
+	res = client.get("/api/stream/cases")
+	assert res.status_code == 503 and res.headers["Retry-After"]
+
+
+def test_streams_leave_a_server_thread_for_other_requests(app, client):
+	app.config.update(SERVER_THREADS=3, STREAM_MAX_CONNECTIONS=500)
+	init_event_broadcaster(app)
+	streams = [client.get("/api/stream/cases", buffered=False) for _ in range(2)]
+	assert [res.status_code for res in streams] == [200, 200]
+
+	assert client.get("/api/stream/cases").status_code == 503
+	assert client.get("/api/health").status_code == 200
+	for res in streams:
+		res.close()
+	assert get_event_broadcaster().subscriber_count == 0
@@ -0,0 +1,76 @@
+import io
+
+import pytest
+from PIL import Image
+
+PHOTO_SIZE = (1200, 800)
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+	app.config.update(UPLOAD_FOLDER=str(tmp_path), IMAGE_VARIANT_WIDTHS="100,400", IMAGE_WORKERS=0)
+	yield tmp_path
+	app.extensions["variant_renderer"].shutdown()
+
+
+def _photo() -> bytes:
+	image = Image.new("RGB", PHOTO_SIZE, "orange")
+	exif = Image.Exif()
+	exif[0x0110] = "Phone X"  # camera model
+	exif[0x0112] = 6  # orientation: rotated 90 degrees
+	buf = io.BytesIO()
+	image.save(buf, format="JPEG", exif=exif, quality=95)
+	return buf.getvalue()
+
+
+def _upload(client, content=None):
+	data = {"file": (io.BytesIO(content or _photo()), "photo.jpg")}
+	res = client.post("/api/uploads", data=data, content_type="multipart/form-data")
+	assert res.status_code == 201
+	return res.get_json()["url"]
+
+
+def _image(res):
+	assert res.status_code == 200
+	return Image.open(io.BytesIO(res.data))
+
+
+def test_variant_is_resized_rotated_and_stripped(client, uploads):
+	url = _upload(client)
+	res = client.get(f"{url}?w=90")
+	image = _image(res)
+	assert res.mimetype == "image/jpeg" and "Accept" in res.headers["Vary"]
+	# Orientation 6 is applied, then the 800px-wide result is scaled to the 100px variant
+	assert image.size == (100, 150)
+	assert not image.getexif()
+	assert len(res.data) < len(_photo()) / 10
+
+
+def test_widths_snap_and_variants_are_cached(app, client, uploads):
+	url = _upload(client)
+	renderer = app.extensions["variant_renderer"]
+	assert _image(client.get(f"{url}?w=150")).width == 400
+	assert _image(client.get(f"{url}?w=5000")).width == 400
+	assert renderer.rendered_total == 1
+	assert _image(client.get(f"{url}?w=100")).width == 100
+	assert renderer.rendered_total == 2
+
+
+def test_webp_is_negotiated(client, uploads):
+	url = _upload(client)
+	assert client.get(f"{url}?w=100&format=webp").mimetype == "image/webp"
+	assert client.get(f"{url}?w=100", headers={"Accept": "image/webp,*/*"}).mimetype == "image/webp"
+	assert client.get(f"{url}?w=100", headers={"Accept": "image/jpeg"}).mimetype == "image/jpeg"
+
+
+def test_variants_render_in_worker_processes(app, client, uploads):
+	app.config["IMAGE_WORKERS"] = 1
+	url = _upload(client)
+	assert _image(client.get(f"{url}?w=100")).width == 100
+	assert app.extensions["variant_renderer"]._pool is not None
+
+
+def test_original_is_served_without_w(client, uploads):
+	photo = _photo()
+	url = _upload(client, photo)
+	assert client.get(url).data == photo